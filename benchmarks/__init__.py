@@ -0,0 +1,10 @@
+"""
+mnemos 基准测试
+
+生成合成的 git 仓库和记忆文件，测量主要操作的耗时并输出 JSON，用于比较不同版本之间的性能变化:
+
+    python -m benchmarks --commits 1000,10000 --sizes 1KB,1MB,50MB -o result.json
+    python -m benchmarks --compare baseline.json result.json
+
+本目录不随 mnemos 发布，只依赖标准库和 git。
+"""
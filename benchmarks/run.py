@@ -0,0 +1,271 @@
+"""
+基准测试执行与结果比较
+"""
+
+import argparse
+import datetime
+import json
+import math
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from mnemos import __version__
+from mnemos.compress import extract_old_short_term
+from mnemos.config import DEFAULT_CONFIG, merge_config
+from mnemos.git import aggregate_activity, get_recent_commits, summarize_commits
+from mnemos.gitbatch import GitBatch
+from mnemos.hotspots import get_hotspots
+from mnemos.memory import update_long_term_memory
+from mnemos.scoring import rank_hotspots
+from mnemos.search import search_memory
+from .synthetic import format_size, make_churn_rows, make_memory_project, make_repo, parse_size
+
+SCHEMA_VERSION = 1
+
+DEFAULT_COMMITS = "1000"
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB,50MB"
+DEFAULT_HOTSPOT_ROWS = 300_000
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Callable[[], object] = None) -> dict:
+    """执行 repeat 次并统计耗时（秒）；setup 在每次计时前执行，不计入耗时"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {
+        "repeat": repeat,
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+    }
+
+
+def _git_benchmarks(root: Path, commits: int, fanout: int, files: int, span_days: int, repeat: int) -> list[dict]:
+    repo = make_repo(root / f"repo-{commits}", commits, fanout, files, span_days)
+    project = str(repo)
+    # 窗口覆盖全部合成提交
+    config = merge_config(DEFAULT_CONFIG, {"git": {"days": span_days + 1, "max_count": commits, "ignore_files": []}})
+    params = {"commits": commits, "fanout": fanout, "files": files}
+    cache = repo / ".memory" / ".cache"
+
+    def drop_cache():
+        shutil.rmtree(cache, ignore_errors=True)
+
+    fetched = get_recent_commits(project, use_cache=False, config=config)
+    if len(fetched) != commits:
+        raise RuntimeError(f"合成仓库的提交数不符: {len(fetched)} != {commits}")
+    hashes = [c["full_hash"] for c in fetched]
+    batch = GitBatch(project)
+
+    cases = [
+        ("get_recent_commits[no_cache]", lambda: get_recent_commits(project, use_cache=False, config=config), None),
+        ("get_recent_commits[cold_cache]", lambda: get_recent_commits(project, config=config), drop_cache),
+        ("get_recent_commits[warm_cache]", lambda: get_recent_commits(project, config=config), None),
+        ("aggregate_activity", lambda: aggregate_activity(fetched), None),
+        ("summarize_commits[warm_cache]", lambda: summarize_commits(project, config=config), None),
+        ("get_hotspots[warm_index]", lambda: get_hotspots(project, days=span_days + 1, config=config), None),
+        ("read_commits[batch]", lambda: batch.commits(hashes), None),
+    ]
+    results = []
+    with batch:
+        for name, fn, setup in cases:
+            # 预热一次（建立缓存、加载模块、启动 cat-file 进程），不计入结果
+            if setup is None:
+                fn()
+            results.append({"name": name, "params": params, **measure(fn, repeat, setup)})
+    return results
+
+
+def _dict_baseline(rows: list[tuple], half_life: float = 5, churn_weight: float = 1.0) -> dict[str, float]:
+    """
+    最朴素的文件计分：逐行计算衰减并累加到字典，不选 top-K、不汇总目录。
+
+    rank_hotspots 做的事情更多，耗时应与它处于同一量级，明显更慢说明计分路径有额外开销。
+    """
+    today = datetime.date.today().toordinal()
+    scores = {}
+    for path, day, commits, added, deleted in rows:
+        decay = 0.5 ** ((today - datetime.date.fromisoformat(day).toordinal()) / half_life)
+        score = commits * decay * (1 + churn_weight * math.log1p((added + deleted) / commits))
+        scores[path] = scores.get(path, 0.0) + score
+    return scores
+
+
+def _scoring_benchmarks(rows: int, span_days: int, repeat: int) -> list[dict]:
+    data = make_churn_rows(rows, span_days)
+    params = {"rows": rows}
+    cases = [
+        ("rank_hotspots", lambda: rank_hotspots(data)),
+        ("rank_hotspots[dict_baseline]", lambda: _dict_baseline(data)),
+    ]
+    return [{"name": name, "params": params, **measure(fn, repeat)} for name, fn in cases]
+
+
+def _memory_benchmarks(root: Path, size: int, repeat: int) -> list[dict]:
+    sections = list(DEFAULT_CONFIG["memory"]["valid_sections"])
+    project_dir = make_memory_project(root / f"memory-{format_size(size)}", size, sections)
+    project = str(project_dir)
+    memory_dir = project_dir / ".memory"
+    params = {"size": format_size(size), "bytes": size}
+
+    short_term = memory_dir / "short_term.md"
+    original_short = short_term.read_bytes()
+
+    def drop_index():
+        shutil.rmtree(memory_dir / ".cache", ignore_errors=True)
+
+    def restore_short_term():
+        short_term.write_bytes(original_short)
+        shutil.rmtree(memory_dir / "archive", ignore_errors=True)
+
+    cases = [
+        ("search_memory[cold_index]", lambda: search_memory("缓存 sqlite", project_path=project), drop_index),
+        ("search_memory[warm_index]", lambda: search_memory("缓存 sqlite", project_path=project), None),
+        ("update_long_term_memory[append]", lambda: update_long_term_memory(sections[1], "基准测试追加的一行。", "append", project), None),
+        ("extract_old_short_term", lambda: extract_old_short_term(3, project), restore_short_term),
+    ]
+    results = []
+    for name, fn, setup in cases:
+        if setup is None:
+            fn()
+        results.append({"name": name, "params": params, **measure(fn, repeat, setup)})
+    return results
+
+
+def _git_version() -> str:
+    try:
+        return subprocess.run(["git", "--version"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_benchmarks(
+    commits: list[int],
+    sizes: list[int],
+    fanout: int = 5,
+    files: int = 200,
+    span_days: int = 30,
+    repeat: int = 3,
+    workdir: str = None,
+    hotspot_rows: int = DEFAULT_HOTSPOT_ROWS,
+) -> dict:
+    """
+    生成合成数据并执行全部基准测试。
+
+    Args:
+        commits: 合成仓库的提交数，每个值生成一个仓库
+        sizes: 记忆文件大小（字节），每个值生成一组 long_term.md / short_term.md
+        fanout: 每条提交修改的文件数
+        files: 合成仓库的文件池大小
+        span_days: 提交时间分布的天数
+        repeat: 每项测量的重复次数
+        workdir: 生成数据的目录，默认使用临时目录并在结束后删除
+        hotspot_rows: 热点计分使用的日汇总行数，0 表示跳过
+
+    Returns:
+        可直接序列化为 JSON 的结果
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix="mnemos-bench-", dir=workdir) as tmp:
+        root = Path(tmp)
+        for n in commits:
+            results += _git_benchmarks(root, n, fanout, files, span_days, repeat)
+        for size in sizes:
+            results += _memory_benchmarks(root, size, repeat)
+    if hotspot_rows:
+        results += _scoring_benchmarks(hotspot_rows, span_days, repeat)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "mnemos_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "git": _git_version(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "params": {"commits": commits, "sizes": [format_size(s) for s in sizes], "fanout": fanout,
+                   "files": files, "span_days": span_days, "repeat": repeat, "hotspot_rows": hotspot_rows},
+        "results": results,
+    }
+
+
+def _result_key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()) if k != "bytes")
+    return f"{result['name']}({params})"
+
+
+def compare(baseline: dict, current: dict, threshold: float = 1.2) -> tuple[list[str], bool]:
+    """
+    按 median 比较两次结果。
+
+    Returns:
+        (报告行, 是否存在超过 threshold 倍的退化)
+    """
+    old = {_result_key(r): r for r in baseline["results"]}
+    lines = [f"{'benchmark':<64} {'baseline':>10} {'current':>10} {'ratio':>7}"]
+    regressed = False
+    for r in current["results"]:
+        key = _result_key(r)
+        if key not in old:
+            lines.append(f"{key:<64} {'-':>10} {r['median_s']:>9.4f}s {'new':>7}")
+            continue
+        ratio = r["median_s"] / old[key]["median_s"] if old[key]["median_s"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            regressed = True
+            flag = "  ✗"
+        lines.append(f"{key:<64} {old[key]['median_s']:>9.4f}s {r['median_s']:>9.4f}s {ratio:>6.2f}x{flag}")
+    return lines, regressed
+
+
+def _format_table(report: dict) -> str:
+    lines = [f"mnemos {report['mnemos_version']} / Python {report['python']} / {report['git']}"]
+    for r in report["results"]:
+        lines.append(f"{_result_key(r):<64} median {r['median_s']:.4f}s  min {r['min_s']:.4f}s")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="mnemos 基准测试")
+    parser.add_argument("--commits", default=DEFAULT_COMMITS, help=f"合成仓库的提交数，逗号分隔（默认 {DEFAULT_COMMITS}）")
+    parser.add_argument("--fanout", type=int, default=5, help="每条提交修改的文件数（默认 5）")
+    parser.add_argument("--files", type=int, default=200, help="合成仓库的文件池大小（默认 200）")
+    parser.add_argument("--span-days", type=int, default=30, help="提交时间分布的天数（默认 30）")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"记忆文件大小，逗号分隔（默认 {DEFAULT_SIZES}）")
+    parser.add_argument("--hotspot-rows", type=int, default=DEFAULT_HOTSPOT_ROWS,
+                        help=f"热点计分的日汇总行数，0 表示跳过（默认 {DEFAULT_HOTSPOT_ROWS}）")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="每项测量的重复次数（默认 3）")
+    parser.add_argument("-o", "--output", default=None, help="JSON 结果写入的文件（默认输出到 stdout）")
+    parser.add_argument("--workdir", default=None, help="生成合成数据的目录（默认系统临时目录）")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="比较两个 JSON 结果文件")
+    parser.add_argument("--threshold", type=float, default=1.2, help="--compare 判定退化的倍数（默认 1.2）")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline, current = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare)
+        lines, regressed = compare(baseline, current, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressed else 0
+
+    commits = [int(c) for c in args.commits.split(",") if c.strip()]
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    report = run_benchmarks(commits, sizes, args.fanout, args.files, args.span_days, args.repeat, args.workdir,
+                            args.hotspot_rows)
+
+    print(_format_table(report), file=sys.stderr)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
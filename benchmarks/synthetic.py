@@ -0,0 +1,158 @@
+"""
+合成测试数据：git 仓库和记忆文件
+
+仓库通过 `git fast-import` 一次性写入，上万条提交也只需要几秒；
+提交时间均匀分布在最近 span_days 天内，每条提交修改 fanout 个文件。
+"""
+
+import datetime
+import random
+import subprocess
+from pathlib import Path
+
+_TYPES = ["feat", "fix", "docs", "refactor", "test", "chore", "perf"]
+_SCOPES = ["core", "cli", "git", "search", "store", "docs"]
+
+# 生成记忆正文用的词表，混合中英文，保证搜索有命中
+_WORDS = [
+    "缓存", "索引", "提交", "配置", "数据库", "性能", "重构", "接口", "解析", "并发",
+    "cache", "index", "commit", "config", "sqlite", "latency", "parser", "daemon", "token", "archive",
+]
+
+
+def parse_size(text: str) -> int:
+    """解析 `512`、`1KB`、`10MB` 形式的大小"""
+    text = text.strip().upper()
+    for suffix, factor in (("KB", 1 << 10), ("MB", 1 << 20), ("GB", 1 << 30), ("B", 1)):
+        if text.endswith(suffix):
+            return int(float(text[: -len(suffix)]) * factor)
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    for suffix, factor in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10)):
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{suffix}"
+    return f"{size}B"
+
+
+def _file_pool(files: int) -> list[str]:
+    """按包 / 子目录分布的文件路径"""
+    return [f"src/pkg{i % 8}/mod{i % 5}/file{i}.py" for i in range(files)]
+
+
+def make_repo(path: Path, commits: int, fanout: int = 5, files: int = 200, span_days: int = 30, seed: int = 0) -> Path:
+    """
+    在 path 创建带有 `.memory/` 的合成 git 仓库。
+
+    Args:
+        commits: 提交数
+        fanout: 每条提交修改的文件数（即 numstat 行数）
+        files: 文件池大小
+        span_days: 提交时间分布的天数
+        seed: 随机种子，相同参数生成相同的仓库
+    """
+    rng = random.Random(seed)
+    path.mkdir(parents=True, exist_ok=True)
+    subprocess.run(["git", "init", "-q"], cwd=path, check=True)
+    subprocess.run(["git", "symbolic-ref", "HEAD", "refs/heads/main"], cwd=path, check=True)
+    (path / ".memory").mkdir(exist_ok=True)
+
+    pool = _file_pool(files)
+    end = int(datetime.datetime.now().timestamp()) - 60
+    start = end - span_days * 86400
+    step = (end - start) / max(commits, 1)
+
+    proc = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=path, stdin=subprocess.PIPE)
+    out = proc.stdin
+
+    def data(payload: bytes) -> None:
+        out.write(b"data %d\n" % len(payload))
+        out.write(payload)
+        out.write(b"\n")
+
+    for n in range(1, commits + 1):
+        ts = int(start + n * step)
+        message = f"{rng.choice(_TYPES)}({rng.choice(_SCOPES)}): synthetic change {n}".encode()
+        out.write(b"commit refs/heads/main\n")
+        out.write(b"mark :%d\n" % n)
+        out.write(b"committer Bench <bench@example.com> %d +0000\n" % ts)
+        data(message)
+        if n > 1:
+            out.write(b"from :%d\n" % (n - 1))
+        for name in rng.sample(pool, min(fanout, len(pool))):
+            lines = rng.randint(1, 8)
+            content = "".join(f"value_{i} = {n}\n" for i in range(lines)).encode()
+            out.write(f"M 100644 inline {name}\n".encode())
+            data(content)
+
+    out.close()
+    if proc.wait() != 0:
+        raise RuntimeError("git fast-import 失败")
+    subprocess.run(["git", "reset", "-q", "--hard", "main"], cwd=path, check=True)
+    return path
+
+
+def _paragraph(rng: random.Random, words: int = 40) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words))
+
+
+def make_long_term(path: Path, size: int, sections: list[str], seed: int = 0) -> None:
+    """生成约 size 字节的 long_term.md，内容均匀分布在各 section 中"""
+    rng = random.Random(seed)
+    per_section = max(size // len(sections), 1)
+    parts = ["# 长期记忆\n\n"]
+    for name in sections:
+        parts.append(f"## {name}\n\n")
+        written = 0
+        while written < per_section:
+            line = f"- {_paragraph(rng)}\n"
+            parts.append(line)
+            written += len(line.encode())
+        parts.append("\n")
+    path.write_text("".join(parts), encoding="utf-8")
+
+
+def make_short_term(path: Path, size: int, seed: int = 0) -> None:
+    """生成约 size 字节的 short_term.md，日期块从今天起逐日向前"""
+    rng = random.Random(seed)
+    parts = ["# 短期记忆\n\n## 核心变动区域\n\n"]
+    parts += [f"- `src/pkg{i}/core.py` ({10 - i} 次修改, +{i * 7}/-{i * 3})\n" for i in range(5)]
+    parts.append("\n## 最近活动\n\n")
+    written = sum(len(p.encode()) for p in parts)
+
+    day = datetime.date.today()
+    while written < size:
+        block = [f"### {day.isoformat()}\n\n#### ✨ 新功能\n"]
+        block += [f"- `{rng.getrandbits(28):07x}` feat: {_paragraph(rng, 12)}\n" for _ in range(8)]
+        block.append("\n")
+        text = "".join(block)
+        parts.append(text)
+        written += len(text.encode())
+        day -= datetime.timedelta(days=1)
+    path.write_text("".join(parts), encoding="utf-8")
+
+
+def make_churn_rows(rows: int, span_days: int = 30, seed: int = 0) -> list[tuple[str, str, int, int, int]]:
+    """
+    生成变动索引的日汇总行 (path, day, commits, added, deleted)，即 rank_hotspots 的输入。
+
+    每个文件在 span_days 天内每天一行，(path, day) 不重复。
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    days = [(today - datetime.timedelta(days=d)).isoformat() for d in range(span_days)]
+    paths = _file_pool(-(-rows // span_days))
+    return [
+        (paths[i // span_days], days[i % span_days], rng.randint(1, 5), rng.randint(0, 200), rng.randint(0, 100))
+        for i in range(rows)
+    ]
+
+
+def make_memory_project(path: Path, size: int, sections: list[str], seed: int = 0) -> Path:
+    """创建只含 `.memory/`（long_term.md 和 short_term.md 各约 size 字节）的项目目录"""
+    memory_dir = path / ".memory"
+    memory_dir.mkdir(parents=True, exist_ok=True)
+    make_long_term(memory_dir / "long_term.md", size, sections, seed)
+    make_short_term(memory_dir / "short_term.md", size, seed)
+    return path
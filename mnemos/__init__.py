@@ -2,52 +2,56 @@
 Mnemos - AI Agent 记忆系统
 
 让 AI Agent 具备持久记忆的库。
-"""
 
-from .memory import (
-    read_memory,
-    read_short_term,
-    read_long_term,
-    update_long_term_memory,
-    get_memory_dir,
-    get_short_term_path,
-    get_long_term_path,
-)
-from .git import (
-    summarize_commits,
-    get_recent_commits,
-)
-from .compress import (
-    get_memory_stats,
-    extract_old_short_term,
-)
-from .search import (
-    search_memory,
-)
-from .doctor import (
-    run_doctor,
-)
+公开接口按需导入：`import mnemos` 只加载本文件，首次访问 `mnemos.summarize_commits`
+等属性时才导入对应的子模块，CLI 的每个子命令因此只加载自己用到的模块。
+"""
 
 __version__ = "0.1.0"
 
-__all__ = [
+# 公开名称 -> 定义它的子模块
+_EXPORTS = {
     # 读写记忆
-    "read_memory",
-    "read_short_term",
-    "read_long_term",
-    "update_long_term_memory",
+    "read_memory": "memory",
+    "read_short_term": "memory",
+    "read_long_term": "memory",
+    "update_long_term_memory": "memory",
+    "update_long_term_sections": "memory",
     # Git 历史
-    "summarize_commits",
-    "get_recent_commits",
+    "summarize_commits": "git",
+    "get_recent_commits": "git",
+    "iter_recent_commits": "git",
+    "get_hotspots": "hotspots",
+    "read_commits": "gitbatch",
     # 压缩
-    "get_memory_stats",
-    "extract_old_short_term",
+    "get_memory_stats": "compress",
+    "extract_old_short_term": "compress",
     # 搜索
-    "search_memory",
+    "search_memory": "search",
+    "query_memory": "search",
+    # 工作区
+    "update_workspace": "workspace",
     # 诊断
-    "run_doctor",
+    "run_doctor": "doctor",
     # 路径
-    "get_memory_dir",
-    "get_short_term_path",
-    "get_long_term_path",
-]
+    "get_memory_dir": "memory",
+    "get_short_term_path": "memory",
+    "get_long_term_path": "memory",
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+
+    value = getattr(import_module(f".{module}", __name__), name)
+    # 缓存到模块字典，之后的访问不再经过 __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
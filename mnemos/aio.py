@@ -0,0 +1,246 @@
+"""
+mnemos.aio - asyncio 接口
+
+与同步接口同名的协程版本，用于在同一个事件循环中并发处理多个项目（如 Agent 宿主、
+编辑器插件）。耗时的部分是等待 git 子进程，这里改用 asyncio.create_subprocess_exec，
+不占用线程。缓存数据库和记忆文件的读写与同步版共用同一套实现和文件锁，但可能要等待其他进程
+持有的锁（SQLite 的 BEGIN IMMEDIATE 最多等 10 秒、记忆文件的 flock），因此都通过
+asyncio.to_thread 放到工作线程执行，不阻塞事件循环。写事务只在全部 git 步骤完成后开启，
+不跨越 await。
+"""
+
+import asyncio
+import os
+import sqlite3
+from collections.abc import AsyncIterator, Mapping
+from contextlib import closing
+from pathlib import Path
+from . import store
+from .config import load_config
+from .doctor import _render_report
+from .git import (
+    DEFAULT_BODY_MAX_CHARS,
+    _LogParser,
+    _READ_SIZE,
+    _log_args,
+    _resolve_window,
+    _store_window,
+    _summary_message,
+    _sync_steps,
+    _write_update,
+    aggregate_activity,
+    compile_ignore_matcher,
+    read_head,
+)
+from .hotspots import _aggregate_hotspots, _churn_steps, _resolve_options, _since
+from .scoring import scoring_options
+from .memory import get_memory_dir
+from . import memory as _memory
+from . import search as _search
+from .timing import span
+
+
+async def _run_git(project_path: str, *args: str) -> tuple[int, str]:
+    """在项目目录下执行 git 命令，返回 (returncode, stdout)"""
+    with span("git.run", command=args[0]):
+        proc = await asyncio.create_subprocess_exec(
+            "git", *args,
+            cwd=project_path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await proc.communicate()
+    return proc.returncode, stdout.decode("utf-8", errors="replace")
+
+
+async def aiter_commits(
+    project_path: str,
+    since_date: str,
+    max_count: int,
+    revision: str = None,
+    ignore_files: tuple[str, ...] = (),
+    exclude_in_git: bool = False,
+    body_max_chars: int = DEFAULT_BODY_MAX_CHARS,
+) -> AsyncIterator[dict]:
+    """
+    iter_commits 的异步版本：流式执行 `git log` 并逐条产出提交。
+
+    提前关闭（aclose 或任务被取消）时会终止 git 子进程。
+    """
+    ignore_files = tuple(ignore_files)
+    proc = await asyncio.create_subprocess_exec(
+        "git", *_log_args(since_date, max_count, revision, ignore_files, exclude_in_git),
+        cwd=project_path,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    parser = _LogParser(compile_ignore_matcher(ignore_files), body_max_chars)
+    try:
+        while chunk := await proc.stdout.read(_READ_SIZE):
+            for commit in parser.feed(chunk):
+                yield commit
+        for commit in parser.close():
+            yield commit
+    finally:
+        if proc.returncode is None:
+            try:
+                proc.kill()
+            except ProcessLookupError:
+                pass
+        await proc.wait()
+
+
+async def _fetch_commits(project_path: str, since_date: str, max_count: int, revision: str = None, **filters) -> list[dict]:
+    """执行一次 `git log` 并解析结果"""
+    return [c async for c in aiter_commits(project_path, since_date, max_count, revision, **filters)]
+
+
+async def _resolve_head(project_path: str) -> str | None:
+    """获取 HEAD 的完整哈希，优先读取文件，必要时回退到 `git rev-parse`"""
+    head = read_head(project_path)
+    if head:
+        return head
+    returncode, stdout = await _run_git(project_path, "rev-parse", "--verify", "-q", "HEAD")
+    return stdout.strip() if returncode == 0 else None
+
+
+async def _open_store(project_path: str) -> sqlite3.Connection:
+    """在工作线程中打开提交缓存；之后的数据库操作也都在工作线程中依次执行"""
+    return await asyncio.to_thread(store.open_store, project_path, check_same_thread=False)
+
+
+def _advance(steps, result):
+    """推进同步逻辑一步（可能包含写事务），结束时返回 None；在工作线程中执行"""
+    try:
+        return steps.send(result)
+    except StopIteration:
+        return None
+
+
+async def _sync_store(conn, project_path: str, since_date: str, max_count: int, filters: dict) -> bool:
+    """git._sync_store 的异步版本，同步逻辑由 _sync_steps 提供"""
+    head = await _resolve_head(project_path)
+    if head is None:
+        return False
+
+    await _run_steps(project_path, _sync_steps(conn, head, since_date, max_count, filters), filters)
+    return True
+
+
+async def _run_steps(project_path: str, steps, filters: dict) -> None:
+    """git._run_steps 的异步版本"""
+    result = None
+    while (step := await asyncio.to_thread(_advance, steps, result)) is not None:
+        if step[0] == "is_ancestor":
+            returncode, _ = await _run_git(project_path, "merge-base", "--is-ancestor", *step[1:])
+            result = returncode == 0
+        else:
+            result = await _fetch_commits(project_path, *step[1:], **filters)
+
+
+async def get_recent_commits(project_path: str = None, days: int = None, max_count: int = None, use_cache: bool = True, config: Mapping = None) -> list[dict]:
+    """get_recent_commits 的异步版本，参数和返回值相同"""
+    if project_path is None:
+        project_path = os.getcwd()
+
+    since_date, max_count, filters = _resolve_window(project_path, days, max_count, config)
+
+    if use_cache and get_memory_dir(project_path).exists():
+        with closing(await _open_store(project_path)) as conn:
+            if not await _sync_store(conn, project_path, *_store_window(project_path, since_date, max_count, config), filters):
+                return []
+            return await asyncio.to_thread(store.query_commits, conn, since_date, max_count)
+
+    return await _fetch_commits(project_path, since_date, max_count, **filters)
+
+
+async def _collect_activity(project_path: str, days: int, config: Mapping = None) -> tuple[list[dict], dict]:
+    """git._collect_activity 的异步版本"""
+    if config is None:
+        config = load_config(project_path)
+    scoring = scoring_options(config)
+
+    if get_memory_dir(project_path).exists():
+        since_date, max_count, filters = _resolve_window(project_path, days, config=config)
+        with closing(await _open_store(project_path)) as conn:
+            if await _sync_store(conn, project_path, *_store_window(project_path, since_date, max_count, config), filters):
+                return await asyncio.to_thread(lambda: (
+                    store.query_commits(conn, since_date, max_count),
+                    store.query_activity(conn, since_date, max_count, **scoring),
+                ))
+
+    commits = await get_recent_commits(project_path, days, config=config)
+    return commits, aggregate_activity(commits, **scoring)
+
+
+async def summarize_commits(project_path: str = None, days: int = None, config: Mapping = None) -> str:
+    """summarize_commits 的异步版本：从 git 历史生成结构化的短期记忆"""
+    if project_path is None:
+        project_path = os.getcwd()
+
+    if not Path(project_path).joinpath(".git").exists():
+        raise FileNotFoundError(f"目录不是 Git 仓库: {project_path}")
+
+    if config is None:
+        config = load_config(project_path)
+    days = days if days is not None else config["git"]["days"]
+
+    commits, stats = await _collect_activity(project_path, days, config)
+    hotspots = await get_hotspots(project_path, config=config) if get_memory_dir(project_path).exists() else None
+    stats, _ = await asyncio.to_thread(_write_update, project_path, commits, stats, hotspots, config)
+    return _summary_message(commits, stats)
+
+
+async def get_hotspots(project_path: str = None, days: int = None, top: int = None, config: Mapping = None) -> dict:
+    """hotspots.get_hotspots 的异步版本"""
+    if project_path is None:
+        project_path = os.getcwd()
+    days, top, config = _resolve_options(project_path, days, top, config)
+    since_date = _since(days)
+    _, _, filters = _resolve_window(project_path, days, config=config)
+    # 变动索引用不到提交正文
+    filters = {**filters, "body_max_chars": 0}
+    scoring = scoring_options(config)
+
+    if get_memory_dir(project_path).exists():
+        head = await _resolve_head(project_path)
+        if head is None:
+            return {"hotspots": [], "hot_dirs": []}
+        with closing(await _open_store(project_path)) as conn:
+            await _run_steps(project_path, _churn_steps(conn, head, since_date, filters), filters)
+            return await asyncio.to_thread(store.query_hotspots, conn, since_date, top, **scoring)
+
+    return _aggregate_hotspots(await _fetch_commits(project_path, since_date, None, **filters), top, scoring)
+
+
+async def read_memory(memory_type: str = "all", section: str = None, project_path: str = None) -> str:
+    """read_memory 的异步版本"""
+    return await asyncio.to_thread(_memory.read_memory, memory_type, section, project_path)
+
+
+async def update_long_term_memory(section: str, content: str, mode: str = "replace", project_path: str = None, config: Mapping = None) -> str:
+    """update_long_term_memory 的异步版本，等待文件锁时不阻塞事件循环"""
+    return await asyncio.to_thread(_memory.update_long_term_memory, section, content, mode, project_path, config)
+
+
+async def search_memory(keyword: str | list[str], memory_type: str = "all", days: int = None, project_path: str = None) -> str:
+    """search_memory 的异步版本"""
+    return await asyncio.to_thread(_search.search_memory, keyword, memory_type, days, project_path)
+
+
+async def _check_git(project_path: str) -> tuple[bool, str]:
+    """doctor.check_git 的异步版本"""
+    try:
+        returncode, stdout = await _run_git(project_path, "rev-parse", "--is-inside-work-tree")
+    except FileNotFoundError:
+        return False, "未找到 Git 命令，请确保已安装 Git。"
+    if returncode != 0 or "true" not in stdout.lower():
+        return False, "当前目录不是 Git 仓库，短期记忆功能将无法使用。"
+    return True, "Git 环境正常。"
+
+
+async def run_doctor(project_path: str = None) -> str:
+    """run_doctor 的异步版本"""
+    if project_path is None:
+        project_path = os.getcwd()
+    return _render_report(project_path, await _check_git(project_path))
@@ -0,0 +1,219 @@
+"""
+mnemos.archive - 短期记忆归档
+
+extract_old_short_term 移出的日期块按月份追加到 `.memory/archive/` 下的分段文件
+（如 `2026-09.md.gz`），分段只追加不改写：gzip / zstd 都支持多帧拼接，
+每次追加写入一个新的压缩帧即可。`manifest.json` 记录每个分段覆盖的日期范围和统计，
+搜索时只解压与日期范围相交的分段，统计信息直接读取清单。
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import tempfile
+from collections.abc import Mapping
+from pathlib import Path
+from .config import load_config
+from .document import lock_file, parse_document
+from .memory import get_memory_dir
+from .timing import timed
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MANIFEST_VERSION = 1
+
+# 压缩方式 -> 分段文件后缀
+CODECS = {
+    "gzip": ".md.gz",
+    "zstd": ".md.zst",
+    "none": ".md",
+}
+
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_STAT_FIELDS = ("blocks", "lines", "raw_bytes", "bytes")
+
+
+def get_archive_dir(project_path: str = None) -> Path:
+    """获取归档目录路径"""
+    return get_memory_dir(project_path) / "archive"
+
+
+def get_manifest_path(project_path: str = None) -> Path:
+    """获取归档清单路径"""
+    return get_archive_dir(project_path) / "manifest.json"
+
+
+def _empty_manifest() -> dict:
+    return {
+        "version": MANIFEST_VERSION,
+        "segments": {},
+        "totals": {"segments": 0, **{field: 0 for field in _STAT_FIELDS}, "first": None, "last": None},
+    }
+
+
+def load_manifest(project_path: str = None) -> dict:
+    """
+    读取归档清单，不存在时返回空清单。
+
+    Returns:
+        {'version': int,
+         'segments': {分段名: {'file', 'codec', 'first', 'last', 'blocks', 'lines', 'raw_bytes', 'bytes'}},
+         'totals': {'segments', 'blocks', 'lines', 'raw_bytes', 'bytes', 'first', 'last'}}
+    """
+    path = get_manifest_path(project_path)
+    if not path.exists():
+        return _empty_manifest()
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"不支持的归档清单版本: {manifest.get('version')}（{path}）")
+    return manifest
+
+
+def _write_manifest(manifest: dict, project_path: str = None) -> None:
+    """原子地写入归档清单"""
+    path = get_manifest_path(project_path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".manifest.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def _resolve_codec(project_path: str = None, config: Mapping = None) -> str:
+    """读取配置中的压缩方式；zstd 需要可选依赖 zstandard，未安装时退回 gzip"""
+    if config is None:
+        config = load_config(project_path)
+    codec = config.get("archive", {}).get("compression", "gzip")
+    if codec not in CODECS:
+        raise ValueError(f"无效的归档压缩方式: {codec}（可选 {', '.join(CODECS)}）")
+    if codec == "zstd" and zstandard is None:
+        return "gzip"
+    return codec
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "gzip":
+        return gzip.compress(data, mtime=0)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    # gzip.decompress 和 read_across_frames 都会依次解出拼接在一起的多个帧
+    if codec == "gzip":
+        return gzip.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("读取 zstd 压缩的归档需要安装 zstandard")
+        with zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True) as reader:
+            return reader.read()
+    return data
+
+
+def _partition(header: str) -> str:
+    """按月份分段；不是日期的块标题归入 undated"""
+    return header[:7] if _DATE_RE.fullmatch(header) else "undated"
+
+
+@timed("archive.append")
+def append_blocks(blocks: list[dict], project_path: str = None, config: Mapping = None) -> list[str]:
+    """
+    把短期记忆的日期块追加到归档。
+
+    Args:
+        blocks: [{'header': str, 'text': str}]，text 为块原文（含 `### ` 标题行）
+        project_path: 项目路径，默认为当前目录
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
+
+    Returns:
+        被追加的分段名列表
+    """
+    if not blocks:
+        return []
+
+    archive_dir = get_archive_dir(project_path)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+
+    by_partition = {}
+    for block in blocks:
+        by_partition.setdefault(_partition(block["header"]), []).append(block)
+
+    with lock_file(archive_dir):
+        manifest = load_manifest(project_path)
+        for name, items in sorted(by_partition.items()):
+            segment = manifest["segments"].get(name)
+            if segment is None:
+                codec = _resolve_codec(project_path, config)
+                segment = {"file": f"{name}{CODECS[codec]}", "codec": codec, "first": None, "last": None}
+                segment.update({field: 0 for field in _STAT_FIELDS})
+                manifest["segments"][name] = segment
+
+            data = "".join(b["text"] if b["text"].endswith("\n") else b["text"] + "\n" for b in items).encode("utf-8")
+            payload = _compress(data, segment["codec"])
+            with open(archive_dir / segment["file"], "ab") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            dates = [b["header"] for b in items if _DATE_RE.fullmatch(b["header"])]
+            if dates:
+                segment["first"] = min(filter(None, [segment["first"], *dates]))
+                segment["last"] = max(filter(None, [segment["last"], *dates]))
+            segment["blocks"] += len(items)
+            segment["lines"] += data.count(b"\n")
+            segment["raw_bytes"] += len(data)
+            segment["bytes"] += len(payload)
+
+        segments = manifest["segments"].values()
+        firsts = [s["first"] for s in segments if s["first"]]
+        lasts = [s["last"] for s in segments if s["last"]]
+        manifest["totals"] = {
+            "segments": len(manifest["segments"]),
+            **{field: sum(s[field] for s in segments) for field in _STAT_FIELDS},
+            "first": min(firsts, default=None),
+            "last": max(lasts, default=None),
+        }
+        _write_manifest(manifest, project_path)
+
+    return sorted(by_partition)
+
+
+@timed("archive.load")
+def load_archived_blocks(since_date: str = None, project_path: str = None) -> list[dict]:
+    """
+    读取归档中日期不早于 since_date 的块。
+
+    只解压日期范围与 [since_date, +∞) 相交的分段。返回的块结构同 Document.blocks，
+    另带 'segment'（分段名），line 为块在分段文件中的行号。
+    """
+    manifest = load_manifest(project_path)
+    archive_dir = get_archive_dir(project_path)
+
+    blocks = []
+    for name, segment in sorted(manifest["segments"].items(), reverse=True):
+        if since_date and segment["last"] and segment["last"] < since_date:
+            continue
+        path = archive_dir / segment["file"]
+        if not path.exists():
+            continue
+        text = _decompress(path.read_bytes(), segment["codec"]).decode("utf-8")
+        for block in parse_document(text, "### ").blocks:
+            if not block["start"] or (since_date and block["header"] < since_date):
+                continue
+            block["segment"] = name
+            blocks.append(block)
+
+    blocks.sort(key=lambda b: b["header"], reverse=True)
+    return blocks
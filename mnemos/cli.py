@@ -3,8 +3,10 @@ Mnemos CLI - 命令行工具
 """
 
 import argparse
+import os
 import shutil
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 
 
@@ -81,42 +83,88 @@ def init_project(project_path: str = None, force: bool = False, only_skills: boo
     print("  2. 运行 `mnemos update` 生成短期记忆")
 
 
-def update_memory(project_path: str = None) -> None:
-    """更新项目的短期记忆"""
-    from . import summarize_commits
-    from .compress import check_compression_needed
-    
-    if project_path is None:
-        project_path = Path.cwd()
-    
-    result = summarize_commits(str(project_path))
-    print(result)
-    
-    # 检查是否需要压缩
-    needs_comp, reason = check_compression_needed(str(project_path))
-    if needs_comp:
-        print(f"\n[⚠️ 提醒] {reason}")
-        print("建议运行 `mnemos compress` 来归档旧记忆并减小上下文负担。")
+def execute(command: str, project_path: str, **options) -> str:
+    """
+    在当前进程内执行一个记忆命令并返回输出文本。
+
+    CLI 的本地执行和守护进程共用这一入口，两者的输出完全一致。
+    """
+    from .timing import span
+
+    with span(f"command.{command}"):
+        return _execute(command, project_path, **options)
+
+
+def _execute(command: str, project_path: str, **options) -> str:
+    if command == "update":
+        from .config import load_config
+        from .git import summarize_commits
+        from .compress import check_compression_needed
+
+        config = load_config(project_path)
+        output = summarize_commits(project_path, config=config)
+        # 检查是否需要压缩
+        needs_comp, reason = check_compression_needed(project_path, config)
+        if needs_comp:
+            output += f"\n\n[⚠️ 提醒] {reason}\n建议运行 `mnemos compress` 来归档旧记忆并减小上下文负担。"
+        return output
+    if command == "show":
+        from .memory import read_memory
+        return read_memory(options.get("memory_type", "all"), project_path=project_path)
+    if command == "write":
+        from .memory import update_long_term_memory
+        return update_long_term_memory(options["section"], options["content"], options.get("mode", "replace"), project_path)
+    if command == "write_batch":
+        from .memory import update_long_term_sections
+        return update_long_term_sections(options["updates"], project_path)
+    if command == "compress":
+        from .compress import extract_old_short_term
+        return extract_old_short_term(options.get("days", 3), project_path)
+    if command == "search":
+        from .search import search_memory
+        return search_memory(options["queries"], options.get("memory_type", "all"), options.get("days"), project_path)
+    if command == "hotspots":
+        from .hotspots import hotspots_report
+        return hotspots_report(project_path, options.get("days"), options.get("top"))
+    if command == "context":
+        from .context import build_context
+        return build_context(options.get("max_tokens"), options.get("query"), options.get("sections"), project_path)
+    if command == "doctor":
+        from .doctor import run_doctor
+        return run_doctor(project_path)
+    raise ValueError(f"未知命令: {command}")
+
+
+def _run(command: str, project_path: str = None, **options) -> str:
+    """优先转发给运行中的守护进程，否则在本进程内执行"""
+    from .daemon import request
+    from .timing import is_active
+
+    project_path = str(project_path or Path.cwd())
+    # 计时只覆盖本进程，开启剖析时不转发给守护进程
+    output = None if is_active() else request(command, project_path, **options)
+    if output is None:
+        output = execute(command, project_path, **options)
+    return output
+
+
+def update_memory(project_path: str = None, workspace: str = None, jobs: int = None, output: str = None) -> None:
+    """更新项目的短期记忆；指定 workspace 时并发更新工作区内的所有仓库"""
+    if workspace:
+        # 工作区不属于单个项目，直接在本进程内执行
+        from .workspace import update_workspace
+        print(update_workspace(workspace, max_workers=jobs, output=output))
+        return
+    print(_run("update", project_path))
 
 
 def show_memory(project_path: str = None, memory_type: str = "all") -> None:
     """显示项目的记忆内容"""
-    from . import read_memory
-    
-    if project_path is None:
-        project_path = Path.cwd()
-    
-    content = read_memory(memory_type, project_path=str(project_path))
-    print(content)
+    print(_run("show", project_path, memory_type=memory_type))
 
 
 def write_memory(project_path: str = None, section: str = None, content: str = None, file: str = None, append: bool = False) -> None:
     """更新长期记忆"""
-    from . import update_long_term_memory
-    
-    if project_path is None:
-        project_path = Path.cwd()
-    
     if not section:
         print("错误：必须指定 --section")
         sys.exit(1)
@@ -149,41 +197,103 @@ def write_memory(project_path: str = None, section: str = None, content: str = N
             print("操作已取消。")
             return
 
-    result = update_long_term_memory(section, final_content, mode, str(project_path))
-    print(result)
+    print(_run("write", project_path, section=section, content=final_content, mode=mode))
+
+
+def write_batch_cmd(project_path: str = None, file: str = None, append: bool = False) -> None:
+    """从 stdin（或文件）读取 JSON / 多 section Markdown，一次性更新多个长期记忆 section"""
+    from .memory import parse_section_updates
+
+    if file:
+        file_path = Path(file)
+        if not file_path.exists():
+            print(f"错误：文件不存在: {file}")
+            sys.exit(1)
+        text = file_path.read_text(encoding="utf-8")
+    else:
+        if sys.stdin.isatty():
+            print("请输入批量内容（JSON 或多个 `## section` 块，按 Ctrl+D 结束）:")
+        text = sys.stdin.read()
+
+    updates = parse_section_updates(text, "append" if append else None)
+
+    # 交互式确认 (仅针对包含替换操作且在 TTY 环境)
+    replaced = [u["section"] for u in updates if u["mode"] == "replace"]
+    if replaced and file and sys.stdin.isatty():
+        confirm = input(f"即将覆盖 {', '.join(f'[{s}]' for s in replaced)} 的现有内容，确认继续？[y/N]: ")
+        if confirm.lower() != 'y':
+            print("操作已取消。")
+            return
+
+    print(_run("write_batch", project_path, updates=updates))
 
 
 def compress_memory_cmd(project_path: str = None, days: int = 3) -> None:
     """压缩旧的短期记忆"""
-    from . import extract_old_short_term
-    
-    if project_path is None:
-        project_path = Path.cwd()
-    
-    result = extract_old_short_term(days, str(project_path))
-    print(result)
+    print(_run("compress", project_path, days=days))
 
 
-def search_memory_cmd(keyword: str, project_path: str = None, memory_type: str = "all", days: int = None) -> None:
+def search_memory_cmd(keyword: str, project_path: str = None, memory_type: str = "all", days: int = None, queries: list[str] = None) -> None:
     """在记忆中搜索关键词"""
-    from . import search_memory
-    
-    if project_path is None:
-        project_path = Path.cwd()
-        
-    result = search_memory(keyword, memory_type, days, str(project_path))
-    print(result)
+    print(_run("search", project_path, queries=[keyword, *(queries or [])], memory_type=memory_type, days=days))
+
+
+def hotspots_cmd(project_path: str = None, days: int = None, top: int = None) -> None:
+    """列出最近 N 天的变动热点"""
+    print(_run("hotspots", project_path, days=days, top=top))
+
+
+def context_cmd(project_path: str = None, max_tokens: int = None, query: str = None, sections: list[str] = None) -> None:
+    """在 token 预算内输出记忆上下文"""
+    print(_run("context", project_path, max_tokens=max_tokens, query=query, sections=sections))
 
 
 def doctor_cmd(project_path: str = None) -> None:
     """运行项目健康检查"""
-    from . import run_doctor
-    
-    if project_path is None:
-        project_path = Path.cwd()
-        
-    result = run_doctor(str(project_path))
-    print(result)
+    print(_run("doctor", project_path))
+
+
+def serve_cmd(project_path: str = None) -> None:
+    """在前台运行守护进程"""
+    from .daemon import serve
+    serve(project_path)
+
+
+@contextmanager
+def _profiling(table: bool = False, json_path: str = None, dump_path: str = None):
+    """
+    在命令执行期间收集分段计时，结束后输出报告。
+
+    Args:
+        table: 把分阶段耗时表输出到 stderr
+        json_path: 把 JSON 报告写入该文件，"-" 表示 stderr
+        dump_path: 同时用 cProfile 剖析并把统计写入该文件
+    """
+    if not (table or json_path or dump_path):
+        yield
+        return
+
+    from . import timing
+
+    timing.enable()
+    profiler = None
+    if dump_path:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(dump_path)
+        timing.disable()
+        if table:
+            print(timing.format_report(), file=sys.stderr)
+        if json_path == "-":
+            print(timing.format_json(), file=sys.stderr)
+        elif json_path:
+            Path(json_path).write_text(timing.format_json() + "\n", encoding="utf-8")
 
 
 def main():
@@ -192,6 +302,9 @@ def main():
         prog="mnemos",
         description="AI Agent 记忆系统 - 让 AI 具备持久记忆"
     )
+    parser.add_argument("--profile", action="store_true", help="命令结束后在 stderr 输出各阶段耗时（也可设置环境变量 MNEMOS_PROFILE=1）")
+    parser.add_argument("--profile-json", metavar="FILE", default=None, help="把各阶段耗时以 JSON 写入 FILE（'-' 为 stderr；MNEMOS_PROFILE=json 等同于 '-'）")
+    parser.add_argument("--profile-dump", metavar="FILE", default=None, help="同时用 cProfile 剖析，把统计写入 FILE（可用 pstats 查看）")
     
     subparsers = parser.add_subparsers(dest="command", help="可用命令")
     
@@ -204,6 +317,9 @@ def main():
     # update 命令
     update_parser = subparsers.add_parser("update", help="从 git 历史更新短期记忆")
     update_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
+    update_parser.add_argument("-w", "--workspace", default=None, help="工作区目录：并发更新其中所有 git 仓库并生成跨仓库热点报告")
+    update_parser.add_argument("-j", "--jobs", type=int, default=None, help="工作区模式的最大并发数（默认 8）")
+    update_parser.add_argument("-o", "--output", default=None, help="工作区报告写入的文件（默认 <工作区>/.memory/workspace.md）")
     
     # show 命令
     show_parser = subparsers.add_parser("show", help="显示记忆内容")
@@ -213,10 +329,11 @@ def main():
     # write 命令
     write_parser = subparsers.add_parser("write", help="更新长期记忆")
     write_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
-    write_parser.add_argument("-s", "--section", required=True, help="section 名称")
+    write_parser.add_argument("-s", "--section", help="section 名称（--batch 时不需要）")
     write_parser.add_argument("-c", "--content", help="要写入的内容 (使用 '-' 从 stdin 读取)")
     write_parser.add_argument("-f", "--file", help="从指定文件读取内容")
     write_parser.add_argument("-a", "--append", action="store_true", help="追加模式（默认替换）")
+    write_parser.add_argument("-b", "--batch", action="store_true", help="批量模式：从 stdin（或 --file）读取 JSON 或多个 `## section` 块，一次写入")
     
     # compress 命令
     compress_parser = subparsers.add_parser("compress", help="压缩旧的短期记忆")
@@ -225,35 +342,42 @@ def main():
     
     # search 命令
     search_parser = subparsers.add_parser("search", help="在记忆中搜索关键词")
-    search_parser.add_argument("keyword", help="要搜索的关键词")
+    search_parser.add_argument("keyword", help="要搜索的关键词或查询（支持 AND/OR/NOT、\"短语\"、/正则/、section:/type:/date: 过滤）")
     search_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
     search_parser.add_argument("-t", "--type", choices=["all", "short", "long"], default="all", help="搜索范围")
-    search_parser.add_argument("-d", "--days", type=int, default=None, help="（仅短期记忆）限定搜索最近几天")
+    search_parser.add_argument("-d", "--days", type=int, default=None, help="（仅短期记忆及其归档）限定搜索最近几天")
+    search_parser.add_argument("-e", "--query", action="append", dest="queries", help="附加查询，可重复；所有查询在一次扫描中求值")
+
+    # hotspots 命令
+    hotspots_parser = subparsers.add_parser("hotspots", help="列出最近 N 天修改最频繁的文件")
+    hotspots_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
+    hotspots_parser.add_argument("-d", "--days", type=int, default=None, help="时间范围（默认读取配置 hotspots.days）")
+    hotspots_parser.add_argument("-k", "--top", type=int, default=None, help="列出的文件数（默认读取配置 hotspots.top）")
+
+    # context 命令
+    context_parser = subparsers.add_parser("context", help="在 token 预算内组装记忆上下文")
+    context_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
+    context_parser.add_argument("-n", "--max-tokens", type=int, default=None, help="token 预算（默认读取配置 context.max_tokens）")
+    context_parser.add_argument("-q", "--query", default=None, help="优先包含与该查询相关的内容（语法同 search）")
+    context_parser.add_argument("-s", "--section", action="append", dest="sections", help="只考虑指定的长期记忆 section，可重复")
 
     # doctor 命令
     doctor_parser = subparsers.add_parser("doctor", help="运行项目健康检查")
     doctor_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
 
+    # serve 命令
+    serve_parser = subparsers.add_parser("serve", help="启动常驻守护进程，其他命令会自动转发给它")
+    serve_parser.add_argument("path", nargs="?", default=None, help="项目路径（默认当前目录）")
+
     args = parser.parse_args()
-    
+
+    env_profile = os.environ.get("MNEMOS_PROFILE", "").strip().lower()
+    profile_table = args.profile or env_profile in ("1", "true", "yes", "text")
+    profile_json = args.profile_json or ("-" if env_profile == "json" else None)
+
     try:
-        if args.command == "init":
-            init_project(args.path, args.force, args.only_skills)
-        elif args.command == "update":
-            update_memory(args.path)
-        elif args.command == "show":
-            show_memory(args.path, args.type)
-        elif args.command == "write":
-            write_memory(args.path, args.section, args.content, args.file, args.append)
-        elif args.command == "compress":
-            compress_memory_cmd(args.path, args.days)
-        elif args.command == "search":
-            search_memory_cmd(args.keyword, args.path, args.type, args.days)
-        elif args.command == "doctor":
-            doctor_cmd(args.path)
-        else:
-            parser.print_help()
-            sys.exit(1)
+        with _profiling(profile_table, profile_json, args.profile_dump):
+            _dispatch(parser, args)
     except (FileNotFoundError, ValueError) as e:
         print(f"错误: {e}")
         sys.exit(1)
@@ -262,6 +386,35 @@ def main():
         sys.exit(1)
 
 
+def _dispatch(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    """执行解析后的子命令"""
+    if args.command == "init":
+        init_project(args.path, args.force, args.only_skills)
+    elif args.command == "update":
+        update_memory(args.path, args.workspace, args.jobs, args.output)
+    elif args.command == "show":
+        show_memory(args.path, args.type)
+    elif args.command == "write":
+        if args.batch:
+            write_batch_cmd(args.path, args.file, args.append)
+        else:
+            write_memory(args.path, args.section, args.content, args.file, args.append)
+    elif args.command == "compress":
+        compress_memory_cmd(args.path, args.days)
+    elif args.command == "search":
+        search_memory_cmd(args.keyword, args.path, args.type, args.days, args.queries)
+    elif args.command == "hotspots":
+        hotspots_cmd(args.path, args.days, args.top)
+    elif args.command == "context":
+        context_cmd(args.path, args.max_tokens, args.query, args.sections)
+    elif args.command == "doctor":
+        doctor_cmd(args.path)
+    elif args.command == "serve":
+        serve_cmd(args.path)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
 if __name__ == "__main__":
     main()
-
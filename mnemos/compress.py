@@ -4,12 +4,17 @@ mnemos.compress - 记忆压缩功能
 
 import os
 import datetime
+from collections.abc import Mapping
 from pathlib import Path
 from .memory import get_short_term_path, get_long_term_path
 from .config import load_config
+from .archive import append_blocks, get_archive_dir, load_manifest
+from .document import get_file_stats, update_document
+from .timing import timed
 
 
-def check_compression_needed(project_path: str = None) -> tuple[bool, str]:
+@timed("compress.check")
+def check_compression_needed(project_path: str = None, config: Mapping = None) -> tuple[bool, str]:
     """
     检查短期记忆是否需要压缩。
     
@@ -19,7 +24,8 @@ def check_compression_needed(project_path: str = None) -> tuple[bool, str]:
     if project_path is None:
         project_path = os.getcwd()
         
-    config = load_config(project_path)
+    if config is None:
+        config = load_config(project_path)
     max_lines = config.get("compression", {}).get("max_lines", 500)
     max_kb = config.get("compression", {}).get("max_kb", 50)
     
@@ -27,9 +33,10 @@ def check_compression_needed(project_path: str = None) -> tuple[bool, str]:
     if not path.exists():
         return False, ""
         
-    content = path.read_text(encoding="utf-8")
-    line_count = len(content.splitlines())
-    size_kb = path.stat().st_size / 1024
+    # sidecar 元数据与文件一致时无需读取文件
+    file_stats = get_file_stats(path, "### ")
+    line_count = file_stats["lines"]
+    size_kb = file_stats["bytes"] / 1024
     
     if line_count > max_lines:
         return True, f"短期记忆行数 ({line_count}) 已超过阈值 ({max_lines})"
@@ -47,41 +54,48 @@ def get_memory_stats(project_path: str = None) -> dict:
         project_path: 项目路径，默认为当前目录
     
     Returns:
-        包含 short_term 和 long_term 统计信息的字典
+        包含 short_term、long_term 和 archive 统计信息的字典
     """
     if project_path is None:
         project_path = os.getcwd()
     
     stats = {"project_path": project_path}
     
-    for name, path in [
-        ("short_term", get_short_term_path(project_path)),
-        ("long_term", get_long_term_path(project_path))
+    for name, path, header_prefix in [
+        ("short_term", get_short_term_path(project_path), "### "),
+        ("long_term", get_long_term_path(project_path), "## ")
     ]:
         if path.exists():
-            content = path.read_text(encoding="utf-8")
+            file_stats = get_file_stats(path, header_prefix)
             stats[name] = {
                 "exists": True,
                 "path": str(path),
-                "size_bytes": path.stat().st_size,
-                "line_count": len(content.split("\n")),
+                "size_bytes": file_stats["bytes"],
+                "line_count": file_stats["lines"],
+                "block_count": file_stats["blocks"],
             }
         else:
             stats[name] = {"exists": False, "path": str(path)}
 
+    # 归档统计直接取自清单，不读取分段文件
+    archive_dir = get_archive_dir(project_path)
+    stats["archive"] = {"exists": archive_dir.exists(), "path": str(archive_dir), **load_manifest(project_path)["totals"]}
+
     return stats
 
 
-def extract_old_short_term(days_threshold: int = 3, project_path: str = None) -> str:
+def extract_old_short_term(days_threshold: int = 3, project_path: str = None, config: Mapping = None) -> str:
     """
     提取超过 N 天的短期记忆内容，供 LLM 压缩摘要用。
     
-    会从短期记忆中移除这些旧内容，返回待压缩的文本。
+    会从短期记忆中移除这些旧内容，原文先追加到 `.memory/archive/` 再移除，
+    返回待压缩的文本。
     LLM 应总结后调用 update_long_term_memory 写入长期记忆。
     
     Args:
         days_threshold: 超过多少天视为旧记忆
         project_path: 项目路径，默认为当前目录
+        config: 预先加载的配置（决定归档的压缩方式），默认读取项目的 .mnemos.toml
     
     Returns:
         提取的旧记忆内容，或提示信息
@@ -94,52 +108,36 @@ def extract_old_short_term(days_threshold: int = 3, project_path: str = None) ->
     if not short_term_path.exists():
         raise FileNotFoundError(f"短期记忆文件不存在: {short_term_path}")
         
-    content = short_term_path.read_text(encoding="utf-8")
-
     cutoff = (datetime.datetime.now() - datetime.timedelta(days=days_threshold)).strftime("%Y-%m-%d")
-
-    lines = content.split("\n")
-    old_lines = []
-    recent_lines = []
-    current_block = []
-    is_old = False
-
-    for line in lines:
-        if line.startswith("### "):
-            if current_block:
-                if is_old:
-                    old_lines.extend(current_block)
-                else:
-                    recent_lines.extend(current_block)
-
-            current_date = line.replace("### ", "").strip()
-            current_block = [line]
-            is_old = current_date < cutoff
-        else:
-            current_block.append(line)
-
-    if current_block:
-        if is_old:
-            old_lines.extend(current_block)
-        else:
-            recent_lines.extend(current_block)
-
-    if not old_lines:
+    old_text = ""
+    old_blocks = []
+
+    def edit(document):
+        nonlocal old_text, old_blocks
+        old_blocks = []
+        recent_blocks = []
+        for block in document.blocks:
+            if block["start"] and block["header"] < cutoff:
+                old_blocks.append(block)
+            else:
+                recent_blocks.append(block)
+
+        old_text = "".join(document.raw(b) for b in old_blocks).rstrip("\n")
+        if not old_blocks:
+            return None
+        # 第一个日期块之前的 header 部分（标题、热点、"## 最近活动"）随 recent_blocks 原样保留
+        return "".join(document.raw(b) for b in recent_blocks)
+
+    def archive(document, text):
+        # 先归档再替换短期记忆，中途失败时旧内容仍留在 short_term.md 中
+        append_blocks([{"header": b["header"], "text": document.raw(b)} for b in old_blocks], project_path, config)
+
+    update_document(short_term_path, "### ", edit, before_write=archive)
+    if not old_text:
         return "没有需要压缩的旧记忆。"
 
-    # 保留 header 部分
-    header_lines = []
-    for line in lines:
-        header_lines.append(line)
-        if line.startswith("## 最近活动"):
-            header_lines.append("")
-            break
-
-    new_content = "\n".join(header_lines) + "\n".join(recent_lines)
-    short_term_path.write_text(new_content, encoding="utf-8")
-
     return (
-        "以下是从短期记忆中提取的旧内容，请总结其中的关键信息，"
-        "然后调用 update_long_term_memory 写入合适的 section：\n\n"
-        + "\n".join(old_lines)
+        "以下是从短期记忆中提取的旧内容（原文已归档到 .memory/archive/，可用 `mnemos search -d` 检索），"
+        "请总结其中的关键信息，然后调用 update_long_term_memory 写入合适的 section：\n\n"
+        + old_text
     )
@@ -3,14 +3,10 @@ mnemos.config - 配置管理
 """
 
 import os
-import sys
+from collections.abc import Mapping
 from pathlib import Path
-
-# 尝试导入 tomllib (Python 3.11+), 否则使用默认值
-try:
-    import tomllib
-except ImportError:
-    tomllib = None
+from types import MappingProxyType
+from .timing import span
 
 # 默认配置
 DEFAULT_CONFIG = {
@@ -26,7 +22,9 @@ DEFAULT_CONFIG = {
     "git": {
         "days": 7,
         "max_count": 50,
-        "ignore_files": ["*.lock", "package-lock.json", ".gitignore"]
+        "ignore_files": ["*.lock", "package-lock.json", ".gitignore"],
+        "exclude_in_git": False,
+        "body_max_chars": 200
     },
     "search": {
         "context_lines": 1
@@ -34,6 +32,18 @@ DEFAULT_CONFIG = {
     "compression": {
         "max_lines": 500,
         "max_kb": 50
+    },
+    "context": {
+        "max_tokens": 2000
+    },
+    "hotspots": {
+        "days": 30,
+        "top": 5,
+        "half_life": 5,
+        "churn_weight": 1.0
+    },
+    "archive": {
+        "compression": "gzip"
     }
 }
 
@@ -43,25 +53,81 @@ def get_config_path(project_path: str = None) -> Path:
         project_path = os.getcwd()
     return Path(project_path) / ".mnemos.toml"
 
-def load_config(project_path: str = None) -> dict:
-    """从项目根目录加载配置，如果不存在则返回默认配置"""
+def merge_config(base: Mapping, override: Mapping) -> dict:
+    """
+    递归合并配置：两边都是表时逐层合并，其余值以 override 为准。
+
+    返回新的可修改 dict（数组为 list），不修改也不引用 base 和 override 中的可变对象，
+    因此也可以用来基于 load_config 返回的只读配置生成修改后的副本。
+    """
+    merged = {}
+    for key in [*base, *(k for k in override if k not in base)]:
+        if key in base and key in override and isinstance(base[key], Mapping) and isinstance(override[key], Mapping):
+            merged[key] = merge_config(base[key], override[key])
+        else:
+            merged[key] = _thaw(override[key] if key in override else base[key])
+    return merged
+
+
+def _thaw(value):
+    """深拷贝为普通的 dict / list"""
+    if isinstance(value, Mapping):
+        return {k: _thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _freeze(value):
+    """把嵌套的 dict / list 转换为只读的 MappingProxyType / tuple"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+# 没有配置文件时共用的默认配置
+_DEFAULTS = _freeze(DEFAULT_CONFIG)
+
+# {配置文件绝对路径: (mtime_ns, size, config)}
+_CACHE: dict[str, tuple[int, int, Mapping]] = {}
+
+
+def load_config(project_path: str = None) -> Mapping:
+    """
+    从项目根目录加载配置，如果不存在则返回默认配置。
+
+    用户配置与默认配置递归合并后冻结为只读映射（表为 MappingProxyType，数组为 tuple），
+    并按 (mtime_ns, size) 缓存，配置文件未变化时不会重复读取和解析。
+    需要修改时可用 merge_config 得到新的 dict。
+    """
     path = get_memory_config_path(project_path)
-    
-    config = DEFAULT_CONFIG.copy()
-    
-    if path.exists() and tomllib:
-        try:
-            with path.open("rb") as f:
-                user_config = tomllib.load(f)
-                # 简单的深度合并
-                for section, values in user_config.items():
-                    if section in config:
-                        config[section].update(values)
-                    else:
-                        config[section] = values
-        except Exception as e:
-            print(f"警告: 无法加载配置文件 {path}: {e}")
-            
+    try:
+        st = path.stat()
+    except OSError:
+        return _DEFAULTS
+
+    key = os.path.abspath(path)
+    cached = _CACHE.get(key)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2]
+
+    # tomllib 导入较慢，只在确实有配置文件时导入；
+    # Python 3.11 以下没有 tomllib，使用默认配置
+    try:
+        import tomllib
+    except ImportError:
+        return _DEFAULTS
+
+    config = _DEFAULTS
+    try:
+        with span("config.load"), path.open("rb") as f:
+            config = _freeze(merge_config(DEFAULT_CONFIG, tomllib.load(f)))
+    except Exception as e:
+        print(f"警告: 无法加载配置文件 {path}: {e}")
+
+    _CACHE[key] = (st.st_mtime_ns, st.st_size, config)
     return config
 
 def get_memory_config_path(project_path: str = None) -> Path:
@@ -0,0 +1,205 @@
+"""
+mnemos.context - 按 token 预算组装上下文
+
+从长期记忆 section、短期记忆的热点和日期块以及搜索命中中挑选价值最高的块，
+贪心地填满给定的 token 预算，避免每轮对话都把全部记忆塞进上下文。
+
+token 数用本地估算（中日韩字符按 1 个 token，其余文本按 4 个字符 1 个 token），
+按块的内容哈希缓存，文件未变化的块不会重复估算。
+"""
+
+import re
+from collections.abc import Mapping
+from .config import load_config
+from .document import load_document
+from .index import _CJK
+from .memory import get_memory_dir, get_long_term_path, get_short_term_path
+from .timing import timed
+
+_CJK_RE = re.compile(f"[{_CJK}]")
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+
+# summarize_commits 写入的热点 section
+HOTSPOT_SECTION = "核心变动区域"
+
+# 候选块的基础价值：显式请求的 section > 搜索命中 > 长期记忆 > 热点 > 最近的日期块（逐日衰减）
+_REQUESTED_VALUE = 100.0
+_HIT_BONUS = 60.0
+_LONG_TERM_VALUE = 50.0
+_HOTSPOT_VALUE = 40.0
+_DATE_VALUE = 30.0
+_DATE_DECAY = 0.7
+
+# {block hash: tokens}
+_TOKEN_CACHE: dict[str, int] = {}
+_TOKEN_CACHE_SIZE = 4096
+
+
+def estimate_tokens(text: str) -> int:
+    """快速估算文本的 token 数（不依赖分词器）"""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _block_tokens(block: dict, text: str) -> int:
+    """按块内容哈希缓存的 token 估算"""
+    tokens = _TOKEN_CACHE.get(block["hash"])
+    if tokens is None:
+        if len(_TOKEN_CACHE) >= _TOKEN_CACHE_SIZE:
+            _TOKEN_CACHE.clear()
+        tokens = _TOKEN_CACHE[block["hash"]] = estimate_tokens(text)
+    return tokens
+
+
+def _candidate(kind: str, key: str, text: str, value: float, tokens: int, order: tuple) -> dict:
+    return {"kind": kind, "key": key, "text": text.rstrip("\n"), "value": value, "tokens": tokens, "order": order}
+
+
+def _collect_candidates(project_path: str, sections: list[str] | None) -> list[dict]:
+    """收集长期记忆 section、热点和日期块候选"""
+    candidates = []
+
+    long_path = get_long_term_path(project_path)
+    if long_path.exists():
+        document = load_document(long_path, "## ")
+        if sections:
+            for i, name in enumerate(sections):
+                block = document.section(name)
+                if block is None:
+                    raise ValueError(f"未找到 section: {name}")
+                text = document.raw(block)
+                candidates.append(_candidate("long", name, text, _REQUESTED_VALUE - i, _block_tokens(block, text), (0, i)))
+        else:
+            for i, block in enumerate(b for b in document.blocks if b["start"]):
+                # 只有模板注释、没有实际内容的 section 不值得占用预算
+                if not _COMMENT_RE.sub("", "\n".join(block["lines"])).strip():
+                    continue
+                text = document.raw(block)
+                candidates.append(_candidate("long", block["header"], text, _LONG_TERM_VALUE, _block_tokens(block, text), (0, i)))
+
+    short_path = get_short_term_path(project_path)
+    if short_path.exists():
+        sections_doc = load_document(short_path, "## ")
+        block = sections_doc.section(HOTSPOT_SECTION)
+        if block is not None and any(line.strip() for line in block["lines"]):
+            text = sections_doc.raw(block)
+            candidates.append(_candidate("hotspots", HOTSPOT_SECTION, text, _HOTSPOT_VALUE, _block_tokens(block, text), (1, 0)))
+
+        document = load_document(short_path, "### ")
+        dated = sorted((b for b in document.blocks if _DATE_RE.fullmatch(b["header"])), key=lambda b: b["header"], reverse=True)
+        for i, block in enumerate(dated):
+            text = document.raw(block)
+            value = _DATE_VALUE * _DATE_DECAY ** i
+            candidates.append(_candidate("short", block["header"], text, value, _block_tokens(block, text), (2, i)))
+
+    return candidates
+
+
+@timed("context.build")
+def build_context(max_tokens: int = None, query: str = None, sections: list[str] = None, project_path: str = None, config: Mapping = None) -> str:
+    """
+    在 token 预算内组装记忆上下文。
+
+    候选块包括长期记忆 section（指定 sections 时只取这些）、短期记忆的热点和日期块；
+    给出 query 时，包含搜索命中的块会被加权，放不下的命中行作为 "相关片段" 填充剩余预算。
+    候选按价值从高到低贪心放入，放不下的跳过，输出时恢复为文件中的自然顺序。
+
+    Args:
+        max_tokens: token 预算，默认读取配置 context.max_tokens
+        query: 可选的查询（语法同 mnemos search）
+        sections: 可选，只考虑这些长期记忆 section
+        project_path: 项目路径，默认为当前目录
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
+
+    Returns:
+        组装好的 Markdown 上下文
+    """
+    memory_dir = get_memory_dir(project_path)
+    if not memory_dir.exists():
+        raise FileNotFoundError(f"记忆目录不存在: {memory_dir}\n请先运行 `mnemos init` 初始化。")
+
+    if max_tokens is None:
+        if config is None:
+            config = load_config(project_path)
+        max_tokens = config["context"]["max_tokens"]
+    if max_tokens <= 0:
+        raise ValueError(f"无效的 token 预算: {max_tokens}")
+
+    candidates = _collect_candidates(project_path, sections)
+
+    hits = []
+    if query:
+        from .search import query_memory
+
+        result = query_memory([query], project_path=project_path)[0]
+        best = {}
+        for kind in ("long", "short"):
+            for m in result[kind]:
+                best[(kind, m["header"])] = max(best.get((kind, m["header"]), 0.0), m["score"])
+                hits.append(m)
+        for c in candidates:
+            score = best.get((c["kind"], c["key"]))
+            if score is not None:
+                c["value"] += _HIT_BONUS + score
+
+    # 只计入实际用到的开销：每个块的分隔空行、首个日期块带出的 "最近活动" 标题。
+    # estimate_tokens 对拼接是次可加的，逐项累加的估算不会低于整体估算
+    dated_header = estimate_tokens("## 最近活动\n\n")
+    # 只为最短的结尾说明留出空间，带省略提示的完整说明放得下时才使用
+    footer_reserve = estimate_tokens(f"\n\n*上下文约 {max_tokens}/{max_tokens} tokens*")
+
+    def cost(c: dict, has_dated: bool) -> int:
+        return c["tokens"] + 1 + (dated_header if c["kind"] == "short" and not has_dated else 0)
+
+    # 贪心填充：价值高的优先，放不下的跳过继续尝试更小的块。先为结尾说明留出空间；
+    # 预算小到留出空间后一个块都放不下时，不再保留，内容优先于结尾说明
+    budget = max_tokens
+    chosen = []
+    has_dated = False
+    ordered = sorted(candidates, key=lambda c: (-c["value"], c["order"]))
+    for reserve in (footer_reserve, 0):
+        for c in ordered:
+            extra = cost(c, has_dated)
+            if extra <= budget - reserve:
+                chosen.append(c)
+                budget -= extra
+                has_dated = has_dated or c["kind"] == "short"
+        if chosen:
+            break
+    omitted = len(candidates) - len(chosen)
+
+    # 已入选块之外的命中行，逐行填充剩余预算
+    included = {(c["kind"], c["key"]) for c in chosen}
+    snippets = []
+    snippet_header = estimate_tokens(f"## 相关片段: '{query}'\n\n") + 1
+    for m in sorted(hits, key=lambda m: -m["score"]):
+        if ("long", m["header"]) in included or ("short", m["header"]) in included:
+            continue
+        line = f"- [{m['header']}] L{m['line_no']}: {m['content']}"
+        tokens = estimate_tokens(line) + 1 + (0 if snippets else snippet_header)
+        if tokens <= budget - reserve:
+            snippets.append(line)
+            budget -= tokens
+
+    chosen.sort(key=lambda c: c["order"])
+    parts = [c["text"] for c in chosen if c["kind"] != "short"]
+    dated = [c["text"] for c in chosen if c["kind"] == "short"]
+    if dated:
+        parts.append("## 最近活动\n\n" + "\n\n".join(dated))
+    if snippets:
+        parts.append(f"## 相关片段: '{query}'\n\n" + "\n".join(snippets))
+
+    if not parts:
+        notice = f"在 {max_tokens} tokens 的预算内没有可用的记忆内容。"
+        return notice if estimate_tokens(notice) <= max_tokens else ""
+
+    body = "\n\n".join(parts)
+    used = estimate_tokens(body)
+    footers = [f"*上下文约 {used}/{max_tokens} tokens*"]
+    if omitted:
+        footers.insert(0, f"*上下文约 {used}/{max_tokens} tokens，因预算省略了 {omitted} 个块（可用 `mnemos show` / `mnemos search` 查看）*")
+    for footer in footers:
+        if used + estimate_tokens(f"\n\n{footer}") <= max_tokens:
+            return f"{body}\n\n{footer}"
+    return body
@@ -0,0 +1,189 @@
+"""
+mnemos.daemon - 常驻进程与本地 socket 接口
+
+`mnemos serve` 在项目的 Unix domain socket 上监听请求，进程内常驻已解析的配置、
+记忆块和搜索索引（均按文件变化自动刷新），CLI 检测到守护进程时会把命令转发给它，
+从而省去每次调用的解释器启动和模块导入开销。
+
+协议为一行 JSON 请求对应一行 JSON 响应:
+    {"command": "show", "options": {...}}
+    {"ok": true, "output": "..."} 或 {"ok": false, "error": "...", "type": "ValueError"}
+
+本模块只依赖标准库中的轻量模块，客户端路径不会导入 mnemos 的其余部分。
+"""
+
+import json
+import os
+import socket
+from pathlib import Path
+
+# AF_UNIX 路径长度上限约 104~108 字节，过长时改放到临时目录
+_MAX_SOCKET_PATH = 100
+
+_ERROR_TYPES = {
+    "FileNotFoundError": FileNotFoundError,
+    "ValueError": ValueError,
+}
+
+
+def get_socket_path(project_path: str = None) -> Path:
+    """
+    获取项目守护进程的 socket 路径。
+
+    路径过长时改放到 $XDG_RUNTIME_DIR（只有当前用户可访问），没有时放到临时目录下
+    按用户区分的 `mnemos-<uid>` 目录中。
+    """
+    root = Path(project_path or os.getcwd()).resolve()
+    path = root / ".memory" / ".cache" / "mnemos.sock"
+    if len(str(path)) > _MAX_SOCKET_PATH:
+        import hashlib
+        import tempfile
+
+        digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:16]
+        runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+        if runtime_dir and os.path.isdir(runtime_dir):
+            base = Path(runtime_dir)
+        else:
+            base = Path(tempfile.gettempdir()) / f"mnemos-{os.getuid() if hasattr(os, 'getuid') else 0}"
+        path = base / f"mnemos-{digest}.sock"
+    return path
+
+
+def _owned_by_user(path: Path) -> bool:
+    """
+    socket 是否属于当前用户。
+
+    共享目录中的路径可以被其他本地用户抢先创建，连接前必须确认属主，
+    否则记忆内容和写入都会发给对方。
+    """
+    if not hasattr(os, "getuid"):
+        return True
+    try:
+        return path.stat().st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def _recv_line(sock: socket.socket) -> bytes:
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    return b"".join(chunks)
+
+
+def request(command: str, project_path: str = None, timeout: float = 300.0, **options) -> str | None:
+    """
+    把命令转发给守护进程。
+
+    Returns:
+        命令输出；守护进程未运行或无法连接时返回 None，调用方应回退为本地执行
+
+    Raises:
+        RuntimeError: 请求发出后连接中断、超时或没有响应。命令可能已经执行（如追加写入），
+            不能回退为本地执行，否则会执行两次
+        守护进程内抛出的 FileNotFoundError / ValueError 会在客户端原样重新抛出
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = get_socket_path(project_path)
+    if not path.exists() or not _owned_by_user(path):
+        return None
+
+    payload = {"command": command, "options": options}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(path))
+        except OSError:
+            # 残留的 socket 文件或守护进程已退出，命令尚未发出
+            return None
+        try:
+            sock.sendall(json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n")
+            raw = _recv_line(sock)
+        except OSError as e:
+            raise RuntimeError(f"守护进程在处理 {command} 时连接中断，命令可能已经执行: {e}") from e
+    if not raw:
+        raise RuntimeError(f"守护进程在处理 {command} 时退出，命令可能已经执行")
+
+    response = json.loads(raw)
+    if not response["ok"]:
+        raise _ERROR_TYPES.get(response.get("type"), RuntimeError)(response["error"])
+    return response["output"]
+
+
+def serve(project_path: str = None) -> None:
+    """
+    在前台运行守护进程，直到收到 Ctrl+C 或 shutdown 命令。
+
+    请求按顺序处理；所有缓存都在本进程内，因此文件未变化时
+    show / search 只需几次 stat 调用。
+    """
+    import socketserver
+    import threading
+    from .cli import execute
+    from .document import ensure_cache_dir
+    from .memory import get_cache_dir
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("当前平台不支持 Unix domain socket，无法启动守护进程。")
+
+    root = str(Path(project_path or os.getcwd()).resolve())
+    path = get_socket_path(root)
+    if path.parent == get_cache_dir(root):
+        ensure_cache_dir(path.parent)
+    else:
+        path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if not _owned_by_user(path.parent) or (path.exists() and not _owned_by_user(path)):
+        raise RuntimeError(f"socket 路径被其他用户占用: {path}")
+    if path.exists():
+        try:
+            running = request("ping", root, timeout=1.0) is not None
+        except RuntimeError:
+            # 能连接但没有正常响应，仍视为有进程占用
+            running = True
+        if running:
+            raise RuntimeError(f"守护进程已在运行: {path}")
+        path.unlink()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line:
+                return
+            try:
+                req = json.loads(line)
+                command = req["command"]
+                if command == "ping":
+                    output = "pong"
+                elif command == "shutdown":
+                    output = "守护进程已停止。"
+                    # shutdown() 会等待 serve_forever 退出，必须在其他线程中调用
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                else:
+                    output = execute(command, root, **req.get("options", {}))
+                response = {"ok": True, "output": output}
+            except Exception as e:
+                response = {"ok": False, "error": str(e), "type": type(e).__name__}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(str(path), Handler)
+    finally:
+        os.umask(old_umask)
+
+    print(f"✓ Mnemos 守护进程已启动: {path}")
+    print("  按 Ctrl+C 停止。")
+    try:
+        server.serve_forever(poll_interval=0.2)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if path.exists():
+            path.unlink()
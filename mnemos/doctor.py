@@ -10,10 +10,8 @@ from .config import get_memory_config_path, load_config
 
 
 def check_git(project_path: str) -> tuple[bool, str]:
-    """检查 Git 环境"""
+    """检查 Git 环境（一次子进程：命令不存在即说明未安装 git）"""
     try:
-        # 检查 git 是否安装
-        subprocess.run(["git", "--version"], capture_output=True, check=True)
         # 检查是否在 git 仓库中
         res = subprocess.run(
             ["git", "rev-parse", "--is-inside-work-tree"],
@@ -24,7 +22,7 @@ def check_git(project_path: str) -> tuple[bool, str]:
         if res.returncode != 0 or "true" not in res.stdout.lower():
             return False, "当前目录不是 Git 仓库，短期记忆功能将无法使用。"
         return True, "Git 环境正常。"
-    except (subprocess.CalledProcessError, FileNotFoundError):
+    except FileNotFoundError:
         return False, "未找到 Git 命令，请确保已安装 Git。"
 
 
@@ -54,12 +52,16 @@ def run_doctor(project_path: str = None) -> str:
     """运行全项诊断"""
     if project_path is None:
         project_path = os.getcwd()
-        
+    return _render_report(project_path, check_git(project_path))
+
+
+def _render_report(project_path: str, git_result: tuple[bool, str]) -> str:
+    """根据 Git 检查结果和文件、配置检查生成诊断报告"""
     output = ["=== Mnemos 项目诊断报告 ===", ""]
     is_healthy = True
 
     # 1. Git 检查
-    git_ok, git_msg = check_git(project_path)
+    git_ok, git_msg = git_result
     output.append(f"[{'✓' if git_ok else '✗'}] {git_msg}")
     if not git_ok:
         is_healthy = False
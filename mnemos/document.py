@@ -0,0 +1,352 @@
+"""
+mnemos.document - 记忆文件的解析模型
+
+把 long_term.md（`## ` section）和 short_term.md（`### ` 日期块）解析为块列表，
+每个块记录标题、行号、字符偏移和内容哈希。所有读写记忆文件的函数都通过这里
+取得同一份解析结果，标题的匹配规则因此只有一处定义:
+
+    以 header_prefix 开头的行是块标题，去掉前缀和首尾空白后的文本是块名，
+    按块名精确匹配。
+
+解析结果按 (path, mtime_ns, size, inode) 缓存在进程内，文件未变化时不会重新读取和解析。
+
+写入总是先写临时文件、fsync 后原子重命名，读者不会看到写了一半的文件；
+读-改-写通过 update_document 以乐观并发方式完成，只在最后的比较和替换期间持有
+建议锁（`.cache/<文件名>.lock`），多个进程同时更新不同 section 时互不覆盖。
+
+每次写入还会在 `.cache/<文件名>.meta.json` 中记录行数、字节数和块数，
+get_file_stats 在 (mtime_ns, size) 一致时直接信任它，无需读取文件。
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Callable
+from contextlib import contextmanager
+from pathlib import Path
+from .timing import span
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# 回退计数时每次读取的字节数
+_COUNT_CHUNK = 1 << 20
+
+# 乐观并发的最大重试次数，之后在锁内完成整个读-改-写
+MAX_RETRIES = 5
+
+# {(path, header_prefix): (mtime_ns, size, inode, Document)}
+_CACHE: dict[tuple[str, str], tuple[int, int, int, "Document"]] = {}
+
+
+class Document:
+    """
+    解析后的记忆文件。应视为只读；修改文件请通过 write_document / update_document。
+
+    Attributes:
+        text: 文件全文
+        lines: 按行切分的文本（不含换行符）
+        blocks: 按文件顺序排列的块，每块形如
+            {'header': str, 'line': int, 'lines': list[str], 'start': int,
+             'offset': int, 'body_offset': int, 'end_offset': int, 'hash': str}
+            line 为块内第一行的行号（1 起），start 为标题行的行号（第一个标题之前的
+            "Header" 块为 0）；offset / body_offset / end_offset 是标题行、正文和块结尾
+            在 text 中的字符偏移；hash 是整块原文的 sha1
+        sections: {块名: 块}，同名块以第一个为准
+    """
+
+    def __init__(self, text: str, header_prefix: str):
+        self.text = text
+        self.header_prefix = header_prefix
+        self.lines = []
+        self.blocks = []
+        self.sections = {}
+
+        current = {"header": "Header", "line": 1, "lines": [], "start": 0, "offset": 0, "body_offset": 0}
+        offset = 0
+        for i, raw in enumerate(text.splitlines(keepends=True), 1):
+            line = raw.rstrip("\r\n")
+            self.lines.append(line)
+            if line.startswith(header_prefix):
+                self._close(current, offset)
+                current = {
+                    "header": line[len(header_prefix):].strip(),
+                    "line": i + 1,
+                    "lines": [],
+                    "start": i,
+                    "offset": offset,
+                    "body_offset": offset + len(raw),
+                }
+            else:
+                current["lines"].append(line)
+            offset += len(raw)
+        self._close(current, offset)
+
+    def _close(self, block: dict, end_offset: int) -> None:
+        # 空的前导块（文件直接以标题开头）不计入
+        if block["start"] == 0 and not block["lines"]:
+            return
+        block["end_offset"] = end_offset
+        block["hash"] = hashlib.sha1(self.text[block["offset"]:end_offset].encode("utf-8")).hexdigest()
+        self.blocks.append(block)
+        if block["start"]:
+            self.sections.setdefault(block["header"], block)
+
+    def section(self, name: str) -> dict | None:
+        """按块名查找块，不存在时返回 None"""
+        return self.sections.get(name)
+
+    def raw(self, block: dict) -> str:
+        """块的原文（含标题行和结尾换行）"""
+        return self.text[block["offset"]:block["end_offset"]]
+
+
+def parse_document(text: str, header_prefix: str) -> Document:
+    """解析 Markdown 文本，不经过缓存"""
+    return Document(text, header_prefix)
+
+
+def _stat_key(st: os.stat_result) -> tuple[int, int, int]:
+    # 原子替换总会换一个 inode，因此 mtime 精度不足时也能识别出其他进程的写入
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def load_document(path: Path, header_prefix: str) -> Document:
+    """
+    读取并解析记忆文件，(mtime_ns, size, inode) 未变时直接返回缓存的解析结果。
+
+    Raises:
+        FileNotFoundError: 文件不存在
+    """
+    path = Path(path)
+    key = (str(path), header_prefix)
+    stat_key = _stat_key(path.stat())
+    cached = _CACHE.get(key)
+    if cached and cached[:3] == stat_key:
+        return cached[3]
+
+    with span("file.read", file=path.name):
+        text = path.read_text(encoding="utf-8")
+    with span("document.parse", file=path.name):
+        document = Document(text, header_prefix)
+    # 读取期间文件被替换时不缓存，避免缓存键与内容错配
+    if _stat_key(path.stat()) == stat_key:
+        _CACHE[key] = (*stat_key, document)
+    return document
+
+
+def _cache_path(path: Path, suffix: str) -> Path:
+    """记忆文件在同目录 `.cache/` 下的附属文件（锁、元数据）"""
+    return path.parent / ".cache" / f"{path.name}{suffix}"
+
+
+def ensure_cache_dir(cache_dir: Path) -> Path:
+    """
+    创建缓存目录，并在其中放一个只含 `*` 的 .gitignore。
+
+    缓存目录里都是可重建的机器数据；不依赖 init 模板的忽略规则，
+    未初始化或手动创建的 `.memory/` 也不会把缓存提交进仓库。
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    ignore_path = cache_dir / ".gitignore"
+    if not ignore_path.exists():
+        ignore_path.write_text("*\n", encoding="utf-8")
+    return cache_dir
+
+
+def _count(data: bytes, header_prefix: str) -> tuple[int, int]:
+    """统计 (行数, 块数)；行数按 \\n 计（末行没有换行也算一行），块数为标题行数"""
+    if not data:
+        return 0, 0
+    prefix = header_prefix.encode("utf-8")
+    lines = data.count(b"\n") + (not data.endswith(b"\n"))
+    blocks = data.count(b"\n" + prefix) + data.startswith(prefix)
+    return lines, blocks
+
+
+def _count_file(path: Path, header_prefix: str) -> tuple[int, int]:
+    """分块读取文件计数，内存占用与文件大小无关"""
+    needle = b"\n" + header_prefix.encode("utf-8")
+    lines = blocks = 0
+    # 在文件开头虚拟一个换行，第一行的标题也能按 needle 统计
+    carry = b"\n"
+    last = b""
+    with open(path, "rb") as f:
+        while chunk := f.read(_COUNT_CHUNK):
+            lines += chunk.count(b"\n")
+            # 带上前一块的结尾，跨块边界的标题也只统计一次
+            buf = carry + chunk
+            blocks += buf.count(needle)
+            carry = buf[-(len(needle) - 1):]
+            last = chunk
+    if not last:
+        return 0, 0
+    return lines + (not last.endswith(b"\n")), blocks
+
+
+def _write_meta(path: Path, st: os.stat_result, header_prefix: str, lines: int, blocks: int) -> dict:
+    """写入 sidecar 元数据；它只是缓存，写入失败不影响主流程"""
+    meta = {
+        "mtime_ns": st.st_mtime_ns,
+        "size": st.st_size,
+        "header_prefix": header_prefix,
+        "lines": lines,
+        "bytes": st.st_size,
+        "blocks": blocks,
+    }
+    meta_path = _cache_path(path, ".meta.json")
+    try:
+        ensure_cache_dir(meta_path.parent)
+        tmp_path = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, meta_path)
+    except OSError:
+        pass
+    return meta
+
+
+def get_file_stats(path: Path, header_prefix: str) -> dict:
+    """
+    获取记忆文件的行数、字节数和块数（以 header_prefix 开头的标题行数）。
+
+    sidecar 元数据的 (mtime_ns, size) 与文件一致时直接返回，不读取文件；
+    否则分块读取文件、用 bytes.count 计数并刷新 sidecar。
+
+    Returns:
+        {'lines': int, 'bytes': int, 'blocks': int}
+
+    Raises:
+        FileNotFoundError: 文件不存在
+    """
+    path = Path(path)
+    st = path.stat()
+    try:
+        meta = json.loads(_cache_path(path, ".meta.json").read_text(encoding="utf-8"))
+        if (meta["mtime_ns"], meta["size"], meta["header_prefix"]) == (st.st_mtime_ns, st.st_size, header_prefix):
+            return {"lines": meta["lines"], "bytes": meta["bytes"], "blocks": meta["blocks"]}
+    except (OSError, ValueError, KeyError):
+        pass
+
+    lines, blocks = _count_file(path, header_prefix)
+    meta = _write_meta(path, st, header_prefix, lines, blocks)
+    return {"lines": meta["lines"], "bytes": meta["bytes"], "blocks": meta["blocks"]}
+
+
+@contextmanager
+def lock_file(path: Path):
+    """
+    对记忆文件加排他的建议锁（跨进程、跨线程均有效）。
+
+    锁文件放在同目录的 `.cache/` 下，与记忆文件本身的替换互不影响。
+    """
+    path = Path(path)
+    lock_path = _cache_path(path, ".lock")
+    ensure_cache_dir(lock_path.parent)
+    with open(lock_path, "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _replace_file(path: Path, text: str, header_prefix: str) -> Document:
+    """写临时文件、fsync、原子重命名，并用新内容刷新缓存；调用方负责加锁"""
+    mode = path.stat().st_mode & 0o777 if path.exists() else 0o644
+    data = text.encode("utf-8")
+    with span("file.write", file=path.name, bytes=len(data)):
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+
+        # 目录项也要落盘，否则断电后重命名可能丢失
+        if hasattr(os, "O_DIRECTORY"):
+            dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    st = path.stat()
+    with span("document.parse", file=path.name):
+        document = Document(text, header_prefix)
+    _CACHE[(str(path), header_prefix)] = (*_stat_key(st), document)
+    _write_meta(path, st, header_prefix, *_count(data, header_prefix))
+    return document
+
+
+def write_document(path: Path, text: str, header_prefix: str) -> Document:
+    """
+    原子地整体写入记忆文件（持有文件锁），并用新内容刷新缓存。
+
+    适用于不依赖旧内容的写入（如重新生成短期记忆）；基于旧内容的修改请用 update_document。
+    """
+    path = Path(path)
+    with lock_file(path):
+        return _replace_file(path, text, header_prefix)
+
+
+def update_document(
+    path: Path,
+    header_prefix: str,
+    edit: Callable[[Document], str | None],
+    retries: int = MAX_RETRIES,
+    before_write: Callable[[Document, str], None] = None,
+) -> Document:
+    """
+    以乐观并发方式读-改-写记忆文件。
+
+    edit 在锁外基于当前解析结果计算新全文（返回 None 表示无需写入）；随后加锁确认文件
+    在此期间未被替换，未变则原子写入，已变则基于新内容重新调用 edit。重试 retries 次
+    仍有冲突时，在锁内完成最后一次读-改-写，保证一定成功。
+    edit 抛出的异常（如 section 不存在）原样向上传递。
+
+    before_write(document, text) 在持有锁、确认写入之后、替换文件之前调用，
+    用于必须先于写入落盘的副作用（如先归档再删除）；它抛出异常时文件保持不变。
+
+    Returns:
+        写入后（或无需写入时的当前）解析结果
+    """
+    path = Path(path)
+
+    def commit(document: Document, text: str) -> Document:
+        if before_write is not None:
+            before_write(document, text)
+        return _replace_file(path, text, header_prefix)
+
+    for _ in range(retries):
+        document = load_document(path, header_prefix)
+        text = edit(document)
+        if text is None:
+            return document
+        with lock_file(path):
+            if load_document(path, header_prefix) is document:
+                return commit(document, text)
+
+    with lock_file(path):
+        document = load_document(path, header_prefix)
+        text = edit(document)
+        if text is None:
+            return document
+        return commit(document, text)
@@ -3,166 +3,740 @@ mnemos.git - Git 历史解析和短期记忆生成
 """
 
 import re
+import sqlite3
 import subprocess
+import sys
 import datetime
 import os
+import time
 from pathlib import Path
 from collections import Counter
-from .memory import get_short_term_path
+from collections.abc import Callable, Generator, Iterable, Iterator, Mapping
+from contextlib import closing
+from functools import lru_cache
+from . import store
+from .document import write_document
+from .gitbatch import get_batch, split_trailers
+from .memory import get_short_term_path, get_memory_dir
 from .config import load_config
+from .scoring import DEFAULT_CHURN_WEIGHT, DEFAULT_HALF_LIFE, follow_renames, rank_hotspots, scoring_options
+from .timing import record, span, timed
+
+
+_READ_SIZE = 64 * 1024
+
+# 映射类型到显示文本
+TYPE_LABELS = {
+    "feat": "✨ 功能",
+    "fix": "🐛 修复",
+    "refactor": "🔨 重构",
+    "docs": "📝 文档",
+    "test": "✅ 测试",
+    "chore": "🔧 杂务",
+    "other": "📦 其他"
+}
+
+_SHA_RE = re.compile(r"[0-9a-f]{40}|[0-9a-f]{64}")
+
+# 匹配 "feat: ...", "fix(scope): ...", "chore!: ..." 等格式
+_COMMIT_TYPE_RE = re.compile(r"^(\w+)(?:\(.*\))?!?:")
 
 
 def parse_commit_type(message: str) -> str:
     """解析 Conventional Commits 类型"""
-    # 匹配 "feat: ...", "fix(scope): ...", "chore!: ..." 等格式
-    match = re.match(r"^(\w+)(?:\(.*\))?!?:", message)
+    match = _COMMIT_TYPE_RE.match(message)
     if match:
         return match.group(1).lower()
     return "other"
 
 
-def get_recent_commits(project_path: str = None, days: int = None, max_count: int = None) -> list[dict]:
+def _glob_to_regex(pattern: str) -> str:
+    """
+    将 glob 模式翻译为正则表达式。
+
+    `*` 和 `?` 不跨越目录分隔符，`**` 可匹配任意层级目录，语义与 git 的 glob pathspec 一致。
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=32)
+def compile_ignore_matcher(patterns: tuple[str, ...]) -> Callable[[str], bool] | None:
+    """
+    将 `git.ignore_files` 中的 glob 模式编译为单个匹配函数。
+
+    不含 `/` 的模式匹配任意目录下的文件名（如 `*.lock`），含 `/` 的模式匹配
+    相对仓库根目录的完整路径。所有模式合并为一个正则，每个路径只匹配一次。
+
+    Returns:
+        接受路径、返回是否忽略的函数；没有模式时返回 None
+    """
+    if not patterns:
+        return None
+    basename_alts = [_glob_to_regex(p) for p in patterns if "/" not in p]
+    path_alts = [_glob_to_regex(p.lstrip("/")) for p in patterns if "/" in p]
+    alternatives = []
+    if basename_alts:
+        alternatives.append(f"(?:^|/)(?:{'|'.join(basename_alts)})$")
+    if path_alts:
+        alternatives.append(f"^(?:{'|'.join(path_alts)})$")
+    return re.compile("|".join(alternatives)).search
+
+
+def _exclude_pathspecs(patterns: tuple[str, ...]) -> list[str]:
+    """将忽略模式转换为 git 的 `:(exclude)` pathspec"""
+    specs = []
+    for p in patterns:
+        glob = p.lstrip("/") if "/" in p else f"**/{p}"
+        specs.append(f":(exclude,glob){glob}")
+    return specs
+
+
+def _run_git(project_path: str, *args: str) -> subprocess.CompletedProcess:
+    """在项目目录下执行 git 命令"""
+    with span("git.run", command=args[0]):
+        return subprocess.run(
+            ["git", *args],
+            cwd=project_path,
+            capture_output=True,
+            text=True,
+        )
+
+
+# 每条提交以 \x1e 开头，头部字段以 NUL 结尾；配合 -z，numstat 条目同样以 NUL 分隔
+# 字段: 哈希、父提交、作者日期、作者、提交时间戳、标题、正文
+_LOG_FORMAT = "%x1e%H%x00%P%x00%ad%x00%aN%x00%ct%x00%s%x00%b%x00"
+_RECORD_SEP = b"\x1e"
+
+# 正文默认保留的字符数（git.body_max_chars）
+DEFAULT_BODY_MAX_CHARS = 200
+
+# numstat 条目: "added\tdeleted\tpath"，重命名时 path 为空，随后是 "old\0new"
+_NUMSTAT_RE = re.compile(r"(\d+|-)\t(\d+|-)\t(?:([^\0]+)|\0([^\0]*)\0([^\0]*))")
+
+
+def _parse_numstat(tail: str, ignore: Callable[[str], bool] = None) -> tuple[list, list]:
+    """
+    解析一条提交的全部 numstat 条目，并丢弃被忽略的路径。
+
+    常见情况（无重命名、无二进制文件）下整段只做一次 split，
+    否则回退到逐条正则匹配。
+    """
+    tail = tail.strip("\n\0")
+    if not tail:
+        return [], []
+
+    if "\t\0" not in tail:
+        fields = tail.replace("\0", "\t").split("\t")
+        if len(fields) % 3 == 0:
+            try:
+                files = list(zip(map(int, fields[0::3]), map(int, fields[1::3]), fields[2::3]))
+                if ignore:
+                    files = [f for f in files if not ignore(f[2])]
+                return files, []
+            except ValueError:
+                # 二进制文件的 "-" 或路径中含制表符，走通用路径
+                pass
+
+    files = []
+    renames = []
+    for added, deleted, path, old, new in _NUMSTAT_RE.findall(tail):
+        if ignore and ignore(path or new):
+            continue
+        if not path:
+            path = new
+            renames.append((old, new))
+        # 对于二进制文件，git numstat 会输出 "-"
+        files.append((
+            int(added) if added != "-" else 0,
+            int(deleted) if deleted != "-" else 0,
+            path,
+        ))
+    return files, renames
+
+
+def truncate_body(body: str, max_chars: int) -> str:
+    """正文超过 max_chars 时截断并加省略号；max_chars 为 0 时不保留正文"""
+    if max_chars <= 0:
+        return ""
+    if len(body) <= max_chars:
+        return body
+    return body[:max_chars].rstrip() + "…"
+
+
+def _parse_record(record: bytes, ignore: Callable[[str], bool] = None, body_max_chars: int = DEFAULT_BODY_MAX_CHARS) -> dict | None:
+    """解析一条 NUL 分隔的提交记录"""
+    parts = record.split(b"\0", 7)
+    if len(parts) < 7:
+        return None
+    full_hash = parts[0].decode("ascii")
+    message = parts[5].decode("utf-8", errors="replace")
+    body, trailers = split_trailers(parts[6].decode("utf-8", errors="replace"))
+    if len(parts) == 8:
+        files, renames = _parse_numstat(parts[7].decode("utf-8", errors="replace"), ignore)
+    else:
+        files, renames = [], []
+
+    return {
+        "hash": full_hash[:8],
+        "full_hash": full_hash,
+        "parents": parts[1].decode("ascii").split(),
+        "date": parts[2].decode("ascii"),
+        # 同一作者的所有提交共享一个字符串对象
+        "author": sys.intern(parts[3].decode("utf-8", errors="replace")),
+        "timestamp": int(parts[4] or 0),
+        "message": message,
+        "body": truncate_body(body, body_max_chars),
+        "trailers": trailers, # List of (key, value)
+        "type": parse_commit_type(message),
+        "files": files, # List of (added, deleted, filename)
+        "renames": renames, # List of (old, new)
+    }
+
+
+class _LogParser:
+    """
+    `git log -z --numstat` 输出的增量解析器。
+
+    按任意大小的字节块喂入，每当下一条记录开始时产出已完整的上一条提交，
+    因此调用方可以边读边消费，无需缓存全部输出。命中 ignore 的路径在解析时即被丢弃，
+    正文在解析时即按 body_max_chars 截断，大窗口的内存占用不随正文长度增长。
+    """
+
+    def __init__(self, ignore: Callable[[str], bool] = None, body_max_chars: int = DEFAULT_BODY_MAX_CHARS):
+        # 未完成的记录；_scanned 之前的部分已确认不含记录分隔符，单条记录很大（如巨型提交的
+        # numstat）时每个块也只查找新加入的字节，整体仍是线性的
+        self._buffer = bytearray()
+        self._scanned = 0
+        self._ignore = ignore
+        self._body_max_chars = body_max_chars
+
+    def feed(self, chunk: bytes) -> list[dict]:
+        buffer = self._buffer
+        buffer += chunk
+        records = []
+        start = 0
+        end = buffer.find(_RECORD_SEP, self._scanned)
+        while end != -1:
+            records.append(bytes(buffer[start:end]))
+            start = end + len(_RECORD_SEP)
+            end = buffer.find(_RECORD_SEP, start)
+        if start:
+            del buffer[:start]
+        self._scanned = max(len(buffer) - len(_RECORD_SEP) + 1, 0)
+        return [c for c in (_parse_record(r, self._ignore, self._body_max_chars) for r in records) if c]
+
+    def close(self) -> list[dict]:
+        record = bytes(self._buffer)
+        self._buffer = bytearray()
+        self._scanned = 0
+        commit = _parse_record(record, self._ignore, self._body_max_chars) if record else None
+        return [commit] if commit else []
+
+
+def _parse_log_output(raw: bytes) -> list[dict]:
+    """一次性解析完整的 `git log` 输出"""
+    parser = _LogParser()
+    return parser.feed(raw) + parser.close()
+
+
+def _log_args(since_date: str, max_count: int | None, revision: str = None, ignore_files: tuple[str, ...] = (), exclude_in_git: bool = False) -> list[str]:
+    """构造 `git log` 参数"""
+    # 使用 --numstat 获取精确的增删行数和文件名，-z 避免路径被转义或截断（重命名输出为 old\0new，
+    # 而不是 `{a => b}`）；显式开启重命名检测，不依赖用户的 diff.renames 配置
+    args = [
+        "log",
+        f"--since={since_date}",
+        f"--pretty=format:{_LOG_FORMAT}",
+        "--date=short",
+        "--numstat",
+        "--find-renames",
+        "-z",
+    ]
+    if max_count is not None:
+        args.insert(2, f"--max-count={max_count}")
+    if revision:
+        args.append(revision)
+    if exclude_in_git and ignore_files:
+        # 让 git 直接跳过被忽略的文件；注意只改动这些文件的提交也会因此被过滤掉
+        args += ["--", ".", *_exclude_pathspecs(ignore_files)]
+    return args
+
+
+def iter_commits(
+    project_path: str,
+    since_date: str,
+    max_count: int,
+    revision: str = None,
+    ignore_files: tuple[str, ...] = (),
+    exclude_in_git: bool = False,
+    body_max_chars: int = DEFAULT_BODY_MAX_CHARS,
+) -> Iterator[dict]:
+    """
+    以流式方式执行 `git log` 并逐条产出提交。
+
+    stdout 按块读取并立即解析，内存占用与窗口大小无关。
+    提前关闭生成器时会终止 git 子进程。
+
+    Args:
+        ignore_files: 需要忽略的文件 glob 模式，解析时即丢弃
+        exclude_in_git: 是否同时以 `:(exclude)` pathspec 下推给 git
+        body_max_chars: 提交正文保留的字符数，0 表示不保留
+    """
+    ignore_files = tuple(ignore_files)
+    proc = subprocess.Popen(
+        ["git", *_log_args(since_date, max_count, revision, ignore_files, exclude_in_git)],
+        cwd=project_path,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    parser = _LogParser(compile_ignore_matcher(ignore_files), body_max_chars)
+    # 读取和解析交替进行、中间穿插 yield，无法用 span 包住，分别累计后再记录
+    read_time = parse_time = 0.0
+    clock = time.perf_counter
+    try:
+        while True:
+            t0 = clock()
+            chunk = proc.stdout.read1(_READ_SIZE)
+            t1 = clock()
+            read_time += t1 - t0
+            commits = parser.feed(chunk) if chunk else parser.close()
+            parse_time += clock() - t1
+            yield from commits
+            if not chunk:
+                break
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+        record("git.log", read_time, revision=revision)
+        record("git.parse", parse_time)
+
+
+def _fetch_commits(project_path: str, since_date: str, max_count: int, revision: str = None, **filters) -> list[dict]:
+    """执行一次 `git log` 并解析结果，revision 可以是单个提交或 `a..b` 区间"""
+    return list(iter_commits(project_path, since_date, max_count, revision, **filters))
+
+
+def read_head(project_path: str) -> str | None:
+    """
+    不启动子进程，直接从 `.git` 目录解析 HEAD 指向的提交。
+
+    支持分离 HEAD、loose ref、packed-refs 以及 worktree（`.git` 为文件）的情况；
+    无法解析时返回 None。
+    """
+    git_dir = Path(project_path) / ".git"
+    try:
+        if git_dir.is_file():
+            target = git_dir.read_text(encoding="utf-8").strip().removeprefix("gitdir:").strip()
+            git_dir = Path(project_path) / target
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if not head.startswith("ref:"):
+            return head if _SHA_RE.fullmatch(head) else None
+
+        ref = head[4:].strip()
+        common_dir = git_dir
+        if (git_dir / "commondir").is_file():
+            common_dir = git_dir / (git_dir / "commondir").read_text(encoding="utf-8").strip()
+        for base in (git_dir, common_dir):
+            if (base / ref).is_file():
+                sha = (base / ref).read_text(encoding="utf-8").strip()
+                return sha if _SHA_RE.fullmatch(sha) else None
+
+        packed = common_dir / "packed-refs"
+        if packed.is_file():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                sha, _, name = line.partition(" ")
+                if name == ref and _SHA_RE.fullmatch(sha):
+                    return sha
+    except OSError:
+        pass
+    return None
+
+
+def _resolve_head(project_path: str) -> str | None:
+    """获取 HEAD 的完整哈希，优先读取文件，必要时回退到项目共享的 `git cat-file --batch-check`"""
+    head = read_head(project_path)
+    if head:
+        return head
+    try:
+        info = get_batch(project_path).info("HEAD")
+    except RuntimeError:
+        return None
+    return info[0] if info is not None and info[1] == "commit" else None
+
+
+def _store_covers(conn: sqlite3.Connection, meta: dict, since_date: str, max_count: int) -> bool:
+    """
+    判断缓存是否覆盖了请求的时间窗口。
+
+    缓存要么自 complete_since 起是完整的，要么在窗口内已经有不少于
+    max_count 条最新提交（缓存中的提交总是从 HEAD 开始连续的）。
+    """
+    complete_since = meta.get("complete_since")
+    if complete_since is not None and complete_since <= since_date:
+        return True
+    return store.count_commits_since(conn, since_date) >= max_count
+
+
+def _churn_filters(filters: dict) -> list:
+    """变动索引依赖的过滤条件（与正文截断长度无关）"""
+    return [list(filters["ignore_files"]), filters["exclude_in_git"]]
+
+
+def _sync_steps(conn: sqlite3.Connection, head: str, since_date: str, max_count: int, filters: dict) -> Generator[tuple, object, None]:
+    """
+    _sync_store 中与执行方式无关的同步逻辑。
+
+    需要 git 时产出一个请求，由驱动方执行后把结果 send 回来：
+    ("is_ancestor", last, head) -> bool；("log", since_date, max_count, revision) -> list[dict]，
+    max_count 为 None 时不限制条数。同步版 _sync_store 和 mnemos.aio 共用这段逻辑，只是执行 git 的方式不同。
+
+    增量同步只需一次 `git log <last>..HEAD`：新提交的父提交足以判断 last 是否仍是 HEAD 的祖先。
+    变动索引与提交缓存停在同一个 HEAD 时，这批提交也顺带累加进索引，之后的热点查询不再启动 git。
+    """
+    meta = store.get_meta(conn)
+    last = meta.get("head")
+    filters_key = [list(filters["ignore_files"]), filters["exclude_in_git"], filters["body_max_chars"]]
+    valid = (
+        last is not None
+        and meta.get("filters") == filters_key
+        and _store_covers(conn, meta, since_date, max_count)
+    )
+    if valid and last == head:
+        return
+
+    complete_since = meta.get("complete_since")
+    churn_since = meta.get("churn_since")
+    feed_churn = (
+        valid
+        and meta.get("churn_head") == last
+        and churn_since is not None
+        and meta.get("churn_filters") == _churn_filters(filters)
+    )
+    churn = None
+    # 先完成全部 git 步骤，写事务只包含本地写入：异步驱动时事务不会跨越 await，
+    # 同一项目的其他协程或进程不会在事务锁上阻塞事件循环
+    rebuild = True
+    if valid:
+        # 增量区间沿用已完整覆盖的起始日期，避免合并进来的旧提交被 --since 漏掉；
+        # 顺带更新变动索引时需要区间内的全部提交
+        fetch_since = min(since_date, complete_since) if complete_since else since_date
+        if feed_churn:
+            fetch_since = min(fetch_since, churn_since)
+        new_commits = yield ("log", fetch_since, None if feed_churn else max_count, f"{last}..{head}")
+        descendants = _descendants(new_commits, last)
+        if feed_churn and head in descendants:
+            churn = new_commits
+        # 区间为空（HEAD 回退）或有提交不是 last 的后代（历史被改写、合并了旁支）时，
+        # 缓存无法与 git log 的顺序衔接；新提交填满窗口时旧缓存也不再连续。这些情况都重新扫描
+        rebuild = not new_commits or len(new_commits) >= max_count or len(descendants) <= len(new_commits)
+    if rebuild:
+        new_commits = yield ("log", since_date, max_count, head)
+        complete_since = since_date if len(new_commits) < max_count else None
+
+    expected = {key: meta.get(key) for key in store.COMMIT_META_KEYS}
+    if churn is not None:
+        expected.update({key: meta.get(key) for key in store.CHURN_META_KEYS})
+    with conn:
+        if not store.begin_update(conn, **expected):
+            # 其他连接已在此期间完成同步
+            return
+        if rebuild:
+            store.clear_commits(conn)
+        store.insert_commits(conn, new_commits)
+        # 只保留当前窗口；因 max_count 被挤出窗口的提交使 complete_since 不再成立
+        dropped = store.trim_commits(conn, since_date, max_count)
+        if dropped is not None and dropped >= since_date:
+            complete_since = None
+        elif complete_since is not None:
+            complete_since = max(complete_since, since_date)
+        store.set_meta(conn, head=head, filters=filters_key, complete_since=complete_since)
+        if churn is not None:
+            store.insert_churn(conn, churn)
+            store.set_meta(conn, churn_head=head)
+
+
+def _descendants(commits: list[dict], last: str) -> set[str]:
+    """
+    `<last>..HEAD` 这批提交中 last 的后代（包含 last 本身）。
+
+    HEAD 在其中说明 last 仍是 HEAD 的祖先；全部提交都在其中时，它们在 `git log HEAD` 中
+    整体排在缓存的提交之前，可以直接叠在缓存上。合并进来的旁支提交不是 last 的后代，
+    会与缓存中的提交按日期交错。
+    """
+    found = {last}
+    changed = True
+    # git log 中子提交通常排在父提交之前，倒序一遍即可；时钟偏差导致顺序颠倒时多遍几次
+    while changed:
+        changed = False
+        for c in reversed(commits):
+            if c["full_hash"] not in found and any(p in found for p in c["parents"]):
+                found.add(c["full_hash"])
+                changed = True
+    return found
+
+
+@timed("store.sync")
+def _sync_store(conn: sqlite3.Connection, project_path: str, since_date: str, max_count: int, filters: dict) -> bool:
+    """
+    基于高水位标记把新提交同步进缓存数据库。
+
+    缓存记录上次处理到的 HEAD，本次只拉取 `<last>..HEAD` 之间的新提交并追加。
+    若上次的 HEAD 已不是当前 HEAD 的祖先（rebase / force-push）、缓存不覆盖请求的
+    窗口或过滤条件发生变化，则回退为全量扫描。HEAD 未变化时不启动任何子进程。
+
+    Returns:
+        仓库没有可用的 HEAD 时返回 False
+    """
+    head = _resolve_head(project_path)
+    if head is None:
+        return False
+
+    _run_steps(project_path, _sync_steps(conn, head, since_date, max_count, filters), filters)
+    return True
+
+
+def _run_steps(project_path: str, steps: Generator[tuple, object, None], filters: dict) -> None:
+    """以同步方式执行 _sync_steps 一类生成器产出的 git 请求，直到生成器结束"""
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration:
+            return
+        if step[0] == "is_ancestor":
+            result = _run_git(project_path, "merge-base", "--is-ancestor", *step[1:]).returncode == 0
+        else:
+            result = _fetch_commits(project_path, *step[1:], **filters)
+
+
+def _resolve_window(project_path: str, days: int = None, max_count: int = None, config: Mapping = None) -> tuple[str, int, dict]:
+    """根据参数和配置确定起始日期、最大提交数和文件过滤条件"""
+    if config is None:
+        config = load_config(project_path)
+    git_config = config["git"]
+    days = days if days is not None else git_config["days"]
+    max_count = max_count if max_count is not None else git_config["max_count"]
+    since_date = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+    filters = {
+        "ignore_files": tuple(git_config.get("ignore_files", ())),
+        "exclude_in_git": bool(git_config.get("exclude_in_git", False)),
+        "body_max_chars": int(git_config.get("body_max_chars", DEFAULT_BODY_MAX_CHARS)),
+    }
+    return since_date, max_count, filters
+
+
+def _store_window(project_path: str, since_date: str, max_count: int, config: Mapping = None) -> tuple[str, int]:
+    """
+    提交缓存同步和裁剪使用的窗口：本次请求与配置窗口中较宽的一个。
+
+    临时的窄请求（如 max_count=2）不会把缓存裁小，之后按默认窗口读取时不需要重新全量扫描；
+    查询结果仍按请求的窗口返回。
+    """
+    configured_since, configured_count, _ = _resolve_window(project_path, config=config)
+    return min(since_date, configured_since), max(max_count, configured_count)
+
+
+def iter_recent_commits(project_path: str = None, days: int = None, max_count: int = None, config: Mapping = None) -> Iterator[dict]:
+    """
+    流式获取最近 N 天的 git 提交，不经过缓存。
+
+    适合大窗口场景：提交在 git 输出时逐条产出，可直接交给 aggregate_activity 消费。
+
+    Args:
+        project_path: 项目路径，默认为当前目录
+        days: 获取最近多少天的提交
+        max_count: 最大提交数量
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
+
+    Returns:
+        提交字典的生成器，字段同 get_recent_commits
+    """
+    if project_path is None:
+        project_path = os.getcwd()
+
+    since_date, max_count, filters = _resolve_window(project_path, days, max_count, config)
+    return iter_commits(project_path, since_date, max_count, **filters)
+
+
+def get_recent_commits(project_path: str = None, days: int = None, max_count: int = None, use_cache: bool = True, config: Mapping = None) -> list[dict]:
     """
     从项目获取最近 N 天的 git 提交，包含详细的文件变更数据。
+
+    项目已初始化（存在 `.memory/`）时，提交会缓存在 `.memory/.cache/commits.db` 中，
+    之后只增量拉取新提交，其余查询直接读取缓存。
     
     Args:
         project_path: 项目路径，默认为当前目录
         days: 获取最近多少天的提交
         max_count: 最大提交数量
+        use_cache: 是否使用增量缓存
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
     
     Returns:
-        提交列表，每个元素包含 hash, date, message, type, files
+        提交列表，每个元素包含 hash, full_hash, parents, date, author, timestamp, message, body, trailers, type, files, renames
     """
     if project_path is None:
         project_path = os.getcwd()
 
-    config = load_config(project_path)
-    days = days if days is not None else config["git"]["days"]
-    max_count = max_count if max_count is not None else config["git"]["max_count"]
-    
-    since_date = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+    since_date, max_count, filters = _resolve_window(project_path, days, max_count, config)
 
-    # 使用 --numstat 获取精确的增删行数和文件名
-    result = subprocess.run(
-        [
-            "git", "log",
-            f"--since={since_date}",
-            f"--max-count={max_count}",
-            "--pretty=format:%H||%ad||%s",
-            "--date=short",
-            "--numstat",
-        ],
-        cwd=project_path,
-        capture_output=True,
-        text=True,
-    )
+    if use_cache and get_memory_dir(project_path).exists():
+        with closing(store.open_store(project_path)) as conn:
+            if not _sync_store(conn, project_path, *_store_window(project_path, since_date, max_count, config), filters):
+                return []
+            return store.query_commits(conn, since_date, max_count)
 
-    if result.returncode != 0:
-        return []
+    return _fetch_commits(project_path, since_date, max_count, **filters)
 
-    raw = result.stdout.strip()
-    if not raw:
-        return []
 
-    commits = []
-    current_commit = None
-    
-    for line in raw.split("\n"):
-        line = line.strip()
-        if not line:
-            continue
-            
-        if "||" in line:
-            parts = line.split("||", 2)
-            if len(parts) == 3:
-                if current_commit:
-                    commits.append(current_commit)
-                current_commit = {
-                    "hash": parts[0][:8],
-                    "date": parts[1],
-                    "message": parts[2],
-                    "type": parse_commit_type(parts[2]),
-                    "files": [], # List of (added, deleted, filename)
-                }
-        elif current_commit:
-            # 解析 numstat 行: "added deleted filename"
-            parts = line.split(None, 2)
-            if len(parts) == 3:
-                try:
-                    # 对于二进制文件，git numstat 会输出 "-"
-                    added = int(parts[0]) if parts[0] != "-" else 0
-                    deleted = int(parts[1]) if parts[1] != "-" else 0
-                    filename = parts[2]
-                    current_commit["files"].append((added, deleted, filename))
-                except ValueError:
-                    pass
-
-    if current_commit:
-        commits.append(current_commit)
-
-    return commits
-
-
-def aggregate_activity(commits: list[dict]) -> dict:
+@timed("aggregate")
+def aggregate_activity(
+    commits: Iterable[dict],
+    top: int = 5,
+    half_life: float = DEFAULT_HALF_LIFE,
+    churn_weight: float = DEFAULT_CHURN_WEIGHT,
+) -> dict:
     """
     聚合提交信息，生成统计摘要。
     
     Args:
-        commits: 提交列表
+        commits: 提交列表或生成器（只遍历一次）
+        top: 保留的热点文件数和热点目录数
+        half_life, churn_weight: 热点评分参数，见 scoring.rank_hotspots
         
     Returns:
-        包含总计、类型分布和变动热点的字典
+        包含总计、类型分布、变动热点（hotspots）和热点目录（hot_dirs）的字典
     """
-    file_stats = {}
     type_counts = Counter()
-    
-    for c in commits:
-        type_counts[c["type"]] += 1
-        for added, deleted, filename in c["files"]:
-            stats = file_stats.get(filename, {"count": 0, "added": 0, "deleted": 0})
-            stats["count"] += 1
-            stats["added"] += added
-            stats["deleted"] += deleted
-            file_stats[filename] = stats
-            
-    # 排序文件，按修改次数降序
-    sorted_files = sorted(
-        file_stats.items(), 
-        key=lambda x: x[1]["count"], 
-        reverse=True
+
+    def counted():
+        for c in commits:
+            type_counts[c["type"]] += 1
+            yield c
+
+    # 先按 (文件, 日期) 汇总，与变动索引的粒度一致；重命名前的变动归入最新路径
+    churn = {}
+    for c, path, added, deleted in follow_renames(counted()):
+        key = (path, c.get("date"))
+        row = churn.get(key)
+        if row is None:
+            churn[key] = [1, added, deleted]
+        else:
+            row[0] += 1
+            row[1] += added
+            row[2] += deleted
+
+    hotspots, hot_dirs = rank_hotspots(
+        ((path, day, *row) for (path, day), row in churn.items()),
+        top, half_life, churn_weight,
     )
-    
     return {
-        "total_commits": len(commits),
+        "total_commits": sum(type_counts.values()),
         "type_distribution": dict(type_counts),
-        "hotspots": sorted_files[:5]  # 前 5 个热点文件
+        "hotspots": hotspots,
+        "hot_dirs": hot_dirs,
     }
 
 
-def summarize_commits(project_path: str = None, days: int = None) -> str:
+def _collect_activity(project_path: str, days: int, config: Mapping = None) -> tuple[list[dict], dict]:
     """
-    从 git 历史生成结构化的短期记忆。
-    
+    获取窗口内的提交及其聚合统计。
+
+    有缓存数据库可用时，统计直接由索引查询得出；否则从提交列表现场聚合。
+    """
+    if config is None:
+        config = load_config(project_path)
+    scoring = scoring_options(config)
+
+    if get_memory_dir(project_path).exists():
+        since_date, max_count, filters = _resolve_window(project_path, days, config=config)
+        with closing(store.open_store(project_path)) as conn:
+            if _sync_store(conn, project_path, *_store_window(project_path, since_date, max_count, config), filters):
+                with span("store.query"):
+                    return (
+                        store.query_commits(conn, since_date, max_count),
+                        store.query_activity(conn, since_date, max_count, **scoring),
+                    )
+
+    commits = get_recent_commits(project_path, days, config=config)
+    return commits, aggregate_activity(commits, **scoring)
+
+
+def format_hotspot(path: str, info: dict) -> str:
+    """渲染一个热点文件的 Markdown 列表行；info 带 authors 时一并显示作者数"""
+    line = f"- `{path}` ({info['count']} 次修改, +{info['added']}/-{info['deleted']}"
+    if "authors" in info:
+        line += f", {info['authors']} 位作者"
+    return line + ")"
+
+
+def format_hot_dir(path: str, info: dict) -> str:
+    """渲染一个热点目录的 Markdown 列表行"""
+    return f"- `{path}` ({info['files']} 个文件, {info['count']} 次修改, +{info['added']}/-{info['deleted']})"
+
+
+def write_short_term(commits: list[dict], stats: dict, project_path: str = None) -> None:
+    """
+    把提交列表和聚合统计渲染为短期记忆并写入 short_term.md。
+
     Args:
+        commits: 窗口内的提交（新到旧）
+        stats: aggregate_activity 的返回值；带 hotspot_days 时热点来自变动索引
         project_path: 项目路径，默认为当前目录
-        days: 获取最近多少天的提交
-    
-    Returns:
-        执行结果消息
     """
-    if project_path is None:
-        project_path = os.getcwd()
-    
-    if not Path(project_path).joinpath(".git").exists():
-         raise FileNotFoundError(f"目录不是 Git 仓库: {project_path}")
+    short_term_path = get_short_term_path(project_path)
+    content = _render_short_term(commits, stats)
 
-    config = load_config(project_path)
-    days = days if days is not None else config["git"]["days"]
+    # 确保目录存在
+    short_term_path.parent.mkdir(parents=True, exist_ok=True)
+    write_document(short_term_path, content, "### ")
 
-    commits = get_recent_commits(project_path, days)
-    short_term_path = get_short_term_path(project_path)
-    
-    stats = aggregate_activity(commits)
+
+# 几乎每条提交都有、不提供信息的 trailer，不写入短期记忆
+_HIDDEN_TRAILERS = {"signed-off-by"}
+
+
+def _render_details(commit: dict) -> list[str]:
+    """提交正文（说明改动原因）和 trailer，渲染为提交行下方缩进的引用行"""
+    lines = [f"  > {line}" for line in commit.get("body", "").split("\n") if line.strip()]
+    lines += [f"  > {key}: {value}" for key, value in commit.get("trailers", ()) if key.lower() not in _HIDDEN_TRAILERS]
+    return lines
+
+
+@timed("render")
+def _render_short_term(commits: list[dict], stats: dict) -> str:
+    """渲染短期记忆的 Markdown 文本"""
     now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
     
     lines = [
@@ -178,9 +752,18 @@ def summarize_commits(project_path: str = None, days: int = None) -> str:
         lines.append("暂无最近的提交记录。")
     else:
         # 渲染热点文件
+        if stats.get("hotspot_days"):
+            lines.append(f"*最近 {stats['hotspot_days']} 天*")
+            lines.append("")
         for filename, info in stats["hotspots"]:
-            lines.append(f"- `{filename}` ({info['count']} 次修改, +{info['added']}/-{info['deleted']})")
+            lines.append(format_hotspot(filename, info))
         lines.append("")
+        if stats.get("hot_dirs"):
+            lines.append("**热点目录**")
+            lines.append("")
+            for dirname, info in stats["hot_dirs"]:
+                lines.append(format_hot_dir(dirname, info))
+            lines.append("")
         
         lines.append("## 最近活动")
         lines.append("")
@@ -190,17 +773,6 @@ def summarize_commits(project_path: str = None, days: int = None) -> str:
         for c in commits:
             by_date.setdefault(c["date"], []).append(c)
 
-        # 映射类型到显示文本
-        type_labels = {
-            "feat": "✨ 功能",
-            "fix": "🐛 修复",
-            "refactor": "🔨 重构",
-            "docs": "📝 文档",
-            "test": "✅ 测试",
-            "chore": "🔧 杂务",
-            "other": "📦 其他"
-        }
-
         for date in sorted(by_date.keys(), reverse=True):
             lines.append(f"### {date}")
             lines.append("")
@@ -211,16 +783,80 @@ def summarize_commits(project_path: str = None, days: int = None) -> str:
                 by_type.setdefault(c["type"], []).append(c)
                 
             for t in sorted(by_type.keys()):
-                label = type_labels.get(t, f"📦 {t}")
+                label = TYPE_LABELS.get(t, f"📦 {t}")
                 lines.append(f"#### {label}")
                 for c in by_type[t]:
                     lines.append(f"- `{c['hash']}` {c['message']}")
+                    lines.extend(_render_details(c))
                 lines.append("")
 
-    content = "\n".join(lines)
+    return "\n".join(lines)
+
+
+def summarize_commits(project_path: str = None, days: int = None, config: Mapping = None) -> str:
+    """
+    从 git 历史生成结构化的短期记忆。
     
-    # 确保目录存在
-    short_term_path.parent.mkdir(parents=True, exist_ok=True)
-    short_term_path.write_text(content, encoding="utf-8")
+    Args:
+        project_path: 项目路径，默认为当前目录
+        days: 获取最近多少天的提交
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
+    
+    Returns:
+        执行结果消息
+    """
+    if project_path is None:
+        project_path = os.getcwd()
+    
+    if not Path(project_path).joinpath(".git").exists():
+         raise FileNotFoundError(f"目录不是 Git 仓库: {project_path}")
+
+    commits, stats, _ = _update_short_term(project_path, days, config)
+    return _summary_message(commits, stats)
+
+
+def _summary_message(commits: list[dict], stats: dict) -> str:
+    return f"短期记忆已更新，分析了 {len(commits)} 条提交，识别出 {len(stats['hotspots'])} 个变动热点。"
+
+
+def _update_short_term(project_path: str, days: int = None, config: Mapping = None, create: bool = True) -> tuple[list[dict], dict, bool]:
+    """
+    收集窗口内的提交和统计，换上变动索引的热点，并写入短期记忆。
+
+    summarize_commits 和工作区更新共用这一流程，两条路径写出的 short_term.md 相同。
 
-    return f"短期记忆已更新，分析了 {len(commits)} 条提交，识别出 {len(stats['hotspots'])} 个变动热点。"
\ No newline at end of file
+    Args:
+        create: 项目未初始化（没有 `.memory/`）时是否仍然写入
+
+    Returns:
+        (commits, stats, 是否写入了短期记忆)
+    """
+    if config is None:
+        config = load_config(project_path)
+    days = days if days is not None else config["git"]["days"]
+
+    commits, stats = _collect_activity(project_path, days, config)
+    hotspots = None
+    if get_memory_dir(project_path).exists():
+        from .hotspots import get_hotspots
+
+        hotspots = get_hotspots(project_path, config=config)
+    stats, written = _write_update(project_path, commits, stats, hotspots, config, create)
+    return commits, stats, written
+
+
+def _write_update(project_path: str, commits: list[dict], stats: dict, hotspots: dict | None, config: Mapping, create: bool = True) -> tuple[dict, bool]:
+    """
+    _update_short_term 中与执行方式无关的后半段，mnemos.aio 也调用它。
+
+    热点取自变动索引，时间范围（hotspots.days）通常长于提交窗口；hotspots 为 None 表示项目未初始化。
+
+    Returns:
+        (换上热点后的统计, 是否写入了短期记忆)
+    """
+    if hotspots is not None and hotspots["hotspots"]:
+        stats = {**stats, **hotspots, "hotspot_days": config.get("hotspots", {}).get("days", 30)}
+    if hotspots is None and not create:
+        return stats, False
+    write_short_term(commits, stats, project_path)
+    return stats, True
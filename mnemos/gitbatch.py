@@ -0,0 +1,255 @@
+"""
+mnemos.gitbatch - 长驻的 git 对象读取进程
+
+每次 `subprocess.run(["git", ...])` 都要付出一次进程启动的开销（Linux 上数毫秒，Windows 上更多），
+逐条提交读取正文、父提交或文件内容时，这部分开销会随提交数线性增长。
+
+这里改用长驻的 `git cat-file --batch` / `--batch-check` 进程：请求逐行写入 stdin，
+响应从 stdout 读回，同一个进程服务任意多次查询；批量请求以流水线方式发送，
+几百条提交的读取只需要一次进程启动和几次管道往返。
+
+进程在第一次查询时启动，按项目缓存在模块级注册表中，一次 CLI 调用或守护进程的整个
+生命周期内复用，解释器退出时统一关闭。同一个 GitBatch 可以被多个线程共享，请求按顺序执行。
+"""
+
+import atexit
+import os
+import re
+import subprocess
+import sys
+import threading
+from collections.abc import Iterable
+from .timing import span
+
+# 每轮流水线发送的请求数；请求行远小于管道缓冲区，先写完再读不会互相阻塞
+_PIPELINE = 128
+
+# 正文末尾的 trailer 行: "Key: value"，续行以空白开头
+_TRAILER_RE = re.compile(r"([A-Za-z0-9][A-Za-z0-9-]*):(?:[ \t]+(.*)|)")
+
+
+class GitBatch:
+    """
+    一个项目的 `git cat-file` 进程对。
+
+    --batch-check 只返回对象的类型和大小，--batch 额外返回内容；两个进程各自按需启动。
+    """
+
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self._procs: dict[str, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _proc(self, mode: str) -> subprocess.Popen:
+        proc = self._procs.get(mode)
+        if proc is None or proc.poll() is not None:
+            with span("git.run", command="cat-file"):
+                proc = subprocess.Popen(
+                    ["git", "cat-file", mode],
+                    cwd=self.project_path,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                )
+            self._procs[mode] = proc
+        return proc
+
+    def _request(self, mode: str, revs: list[str], with_content: bool) -> list:
+        for rev in revs:
+            if not rev or "\n" in rev:
+                raise ValueError(f"无效的对象名: {rev!r}")
+
+        results = []
+        with self._lock, span("git.batch", mode=mode, count=len(revs)):
+            proc = self._proc(mode)
+            for start in range(0, len(revs), _PIPELINE):
+                chunk = revs[start:start + _PIPELINE]
+                try:
+                    proc.stdin.write("".join(f"{rev}\n" for rev in chunk).encode("utf-8"))
+                    proc.stdin.flush()
+                except BrokenPipeError:
+                    raise RuntimeError(f"git cat-file 意外退出（{self.project_path} 可能不是 Git 仓库）") from None
+                try:
+                    for _ in chunk:
+                        results.append(self._read_response(proc, with_content))
+                except Exception:
+                    # 剩余的响应还留在管道里，丢弃这个进程，下次查询重新启动
+                    proc.kill()
+                    proc.wait()
+                    raise
+        return results
+
+    def _read_response(self, proc: subprocess.Popen, with_content: bool) -> tuple | None:
+        header = proc.stdout.readline()
+        if not header:
+            raise RuntimeError(f"git cat-file 意外退出（{self.project_path} 可能不是 Git 仓库）")
+        # "<rev> missing" / "<rev> ambiguous"；对象名本身可能含空格，只能看行尾
+        if header.endswith((b" missing\n", b" ambiguous\n")):
+            return None
+        oid, kind, size = header.split()
+        oid, kind, size = oid.decode("ascii"), kind.decode("ascii"), int(size)
+        if not with_content:
+            return oid, kind, size
+        data = proc.stdout.read(size + 1)[:-1]
+        return oid, kind, data
+
+    def info_many(self, revs: Iterable[str]) -> list[tuple[str, str, int] | None]:
+        """
+        批量查询对象信息。
+
+        Args:
+            revs: 任意 git 能解析的对象名（哈希、`HEAD`、`HEAD:path` 等）
+
+        Returns:
+            与 revs 一一对应的 (oid, type, size)，对象不存在时为 None
+        """
+        return self._request("--batch-check", list(revs), False)
+
+    def info(self, rev: str) -> tuple[str, str, int] | None:
+        """查询单个对象信息，见 info_many"""
+        return self.info_many([rev])[0]
+
+    def read_many(self, revs: Iterable[str]) -> list[tuple[str, str, bytes] | None]:
+        """
+        批量读取对象内容。
+
+        Returns:
+            与 revs 一一对应的 (oid, type, data)，对象不存在时为 None
+        """
+        return self._request("--batch", list(revs), True)
+
+    def read(self, rev: str) -> tuple[str, str, bytes] | None:
+        """读取单个对象，见 read_many"""
+        return self.read_many([rev])[0]
+
+    def commits(self, revs: Iterable[str]) -> list[dict | None]:
+        """批量读取并解析提交对象，非提交或不存在的对象为 None；字段见 parse_commit"""
+        return [
+            parse_commit(obj[0], obj[2]) if obj is not None and obj[1] == "commit" else None
+            for obj in self.read_many(revs)
+        ]
+
+    def close(self) -> None:
+        """关闭 cat-file 进程；之后的查询会重新启动进程"""
+        with self._lock:
+            for proc in self._procs.values():
+                if proc.poll() is None:
+                    proc.stdin.close()
+                    try:
+                        proc.wait(timeout=5)
+                    except subprocess.TimeoutExpired:
+                        proc.kill()
+                        proc.wait()
+                proc.stdout.close()
+            self._procs.clear()
+
+
+def _parse_person(value: str) -> tuple[str, str, int]:
+    """解析 "Name <email> 1700000000 +0800"，返回 (name, email, unix 时间戳)"""
+    name, _, rest = value.partition(" <")
+    email, _, stamp = rest.partition("> ")
+    seconds = stamp.split(" ", 1)[0]
+    return name, email, int(seconds) if seconds.isdigit() else 0
+
+
+def split_trailers(body: str) -> tuple[str, list[tuple[str, str]]]:
+    """
+    把正文末尾的 trailer 段落（`Fixes: #12`、`Co-authored-by: ...`）与正文分开。
+
+    最后一个段落的每一行都是 `Key: value`（或其续行）时才视为 trailer。
+
+    Returns:
+        (去掉 trailer 的正文, [(key, value)])
+    """
+    body = body.strip()
+    if not body:
+        return "", []
+    head, _, last = body.rpartition("\n\n")
+    trailers = []
+    for line in last.split("\n"):
+        if line[:1] in (" ", "\t") and trailers:
+            key, value = trailers[-1]
+            trailers[-1] = (key, f"{value} {line.strip()}")
+            continue
+        match = _TRAILER_RE.fullmatch(line.rstrip())
+        if match is None:
+            return body, []
+        trailers.append((sys.intern(match[1]), (match[2] or "").strip()))
+    return head.rstrip(), trailers
+
+
+def parse_commit(oid: str, data: bytes) -> dict:
+    """
+    解析 `git cat-file` 返回的提交对象。
+
+    Returns:
+        包含 full_hash, tree, parents, author, author_email, author_time,
+        committer, committer_time, subject, body（完整正文，不含 trailer）, trailers 的字典
+    """
+    header, _, message = data.partition(b"\n\n")
+    commit = {"full_hash": oid, "tree": "", "parents": []}
+    for line in header.decode("utf-8", errors="replace").split("\n"):
+        # gpgsig、mergetag 等多行头部的续行以空格开头
+        if line.startswith(" "):
+            continue
+        key, _, value = line.partition(" ")
+        if key == "tree":
+            commit["tree"] = value
+        elif key == "parent":
+            commit["parents"].append(value)
+        elif key in ("author", "committer"):
+            name, email, seconds = _parse_person(value)
+            commit[key] = name
+            commit[f"{key}_time"] = seconds
+            if key == "author":
+                commit["author_email"] = email
+
+    subject, _, body = message.decode("utf-8", errors="replace").partition("\n")
+    commit["subject"] = subject.strip()
+    commit["body"], commit["trailers"] = split_trailers(body)
+    return commit
+
+
+_BATCHES: dict[str, GitBatch] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+@atexit.register
+def close_all() -> None:
+    """关闭注册表中的全部 cat-file 进程"""
+    with _REGISTRY_LOCK:
+        batches = list(_BATCHES.values())
+        _BATCHES.clear()
+    for batch in batches:
+        batch.close()
+
+
+def get_batch(project_path: str = None) -> GitBatch:
+    """获取项目共享的 GitBatch（首次调用时创建，进程在第一次查询时才启动）"""
+    key = os.path.abspath(project_path or os.getcwd())
+    with _REGISTRY_LOCK:
+        batch = _BATCHES.get(key)
+        if batch is None:
+            batch = _BATCHES[key] = GitBatch(key)
+        return batch
+
+
+def read_commits(revs: Iterable[str], project_path: str = None) -> list[dict | None]:
+    """
+    批量读取提交的完整信息（正文、父提交、作者和提交者时间），复用项目的长驻 cat-file 进程。
+
+    Args:
+        revs: 提交哈希或其他对象名
+        project_path: 项目路径，默认为当前目录
+
+    Returns:
+        与 revs 一一对应的提交信息，字段见 parse_commit；不存在的提交为 None
+    """
+    return get_batch(project_path).commits(revs)
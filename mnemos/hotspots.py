@@ -0,0 +1,152 @@
+"""
+mnemos.hotspots - 长时间范围的变动热点
+
+提交缓存只保存 days / max_count 窗口内的提交，不适合回答 "最近 90 天哪些文件最热"。
+这里维护一份按 (文件, 日期) 预聚合的变动索引（store 中的 file_churn），
+与提交缓存一样以 HEAD 为高水位增量更新：HEAD 未变化时不启动 git，
+新提交只拉取 `<last>..HEAD`。请求的时间范围超出已覆盖的范围、历史被改写或过滤条件
+变化时才全量重建。索引与提交缓存停在同一个 HEAD 时，提交缓存的增量同步会把同一批提交
+顺带累加进索引（见 git._sync_steps），`mnemos update` 只需一次 git log。任意窗口的热点查询都只是对日汇总计分（时间衰减 + 变动量加权，见 scoring.py），
+同时汇总出热点目录。
+"""
+
+import datetime
+import os
+import sqlite3
+from collections.abc import Generator, Mapping
+from contextlib import closing
+from . import store
+from .config import load_config
+from .git import _churn_filters, _fetch_commits, _resolve_head, _resolve_window, _run_steps, format_hot_dir, format_hotspot
+from .scoring import follow_renames, rank_hotspots, scoring_options
+from .memory import get_memory_dir
+from .timing import timed
+
+
+def _churn_steps(conn: sqlite3.Connection, head: str, since_date: str, filters: dict) -> Generator[tuple, object, None]:
+    """
+    变动索引的同步逻辑，请求协议同 git._sync_steps。
+
+    索引记录 churn_head（上次处理到的 HEAD）、churn_since（完整覆盖的起始日期）和过滤条件。
+    """
+    meta = store.get_meta(conn)
+    last = meta.get("churn_head")
+    covered = meta.get("churn_since")
+    filters_key = _churn_filters(filters)
+    valid = (
+        last is not None
+        and covered is not None
+        and covered <= since_date
+        and meta.get("churn_filters") == filters_key
+    )
+    if valid and last == head:
+        return
+
+    # 与 _sync_steps 一样，先执行 git，再在短事务中写入
+    if valid and (yield ("is_ancestor", last, head)):
+        commits = yield ("log", covered, None, f"{last}..{head}")
+        rebuild = False
+    else:
+        commits = yield ("log", since_date, None, head)
+        rebuild = True
+        covered = since_date
+
+    with conn:
+        if not store.begin_update(conn, **{key: meta.get(key) for key in store.CHURN_META_KEYS}):
+            # 其他连接已在此期间更新了索引
+            return
+        if rebuild:
+            store.clear_churn(conn)
+        store.insert_churn(conn, commits)
+        store.set_meta(conn, churn_head=head, churn_since=covered, churn_filters=filters_key)
+
+
+def _since(days: int) -> str:
+    return (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def _resolve_options(project_path: str, days: int | None, top: int | None, config: Mapping | None) -> tuple[int, int, Mapping]:
+    if config is None:
+        config = load_config(project_path)
+    hotspot_config = config.get("hotspots", {})
+    days = days if days is not None else hotspot_config.get("days", 30)
+    top = top if top is not None else hotspot_config.get("top", 5)
+    if days <= 0 or top <= 0:
+        raise ValueError(f"无效的热点参数: days={days}, top={top}")
+    return days, top, config
+
+
+@timed("hotspots")
+def get_hotspots(project_path: str = None, days: int = None, top: int = None, config: Mapping = None) -> dict:
+    """
+    查询最近 N 天的热点文件和热点目录。
+
+    项目已初始化（存在 `.memory/`）时先增量更新变动索引再查询；
+    否则直接扫描这段时间的 git 历史。
+
+    Args:
+        project_path: 项目路径，默认为当前目录
+        days: 时间范围，默认读取配置 hotspots.days
+        top: 返回的文件数和目录数，默认读取配置 hotspots.top
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
+
+    Returns:
+        {'hotspots': [(path, {'count', 'added', 'deleted', 'authors'})],
+         'hot_dirs': [('dir/', {'count', 'added', 'deleted', 'files'})]}，
+        按得分（时间衰减 + 变动量加权）降序
+    """
+    if project_path is None:
+        project_path = os.getcwd()
+    days, top, config = _resolve_options(project_path, days, top, config)
+    since_date = _since(days)
+    _, _, filters = _resolve_window(project_path, days, config=config)
+    # 变动索引用不到提交正文
+    filters = {**filters, "body_max_chars": 0}
+    scoring = scoring_options(config)
+
+    if get_memory_dir(project_path).exists():
+        head = _resolve_head(project_path)
+        if head is None:
+            return {"hotspots": [], "hot_dirs": []}
+        with closing(store.open_store(project_path)) as conn:
+            _run_steps(project_path, _churn_steps(conn, head, since_date, filters), filters)
+            return store.query_hotspots(conn, since_date, top, **scoring)
+
+    return _aggregate_hotspots(_fetch_commits(project_path, since_date, None, **filters), top, scoring)
+
+
+def _aggregate_hotspots(commits: list[dict], top: int, scoring: dict) -> dict:
+    """未初始化的项目没有变动索引，直接从提交列表按 (文件, 日期) 汇总后计分"""
+    churn = {}
+    authors = {}
+    for c, path, added, deleted in follow_renames(commits):
+        row = churn.setdefault((path, c["date"]), [0, 0, 0])
+        row[0] += 1
+        row[1] += added
+        row[2] += deleted
+        authors.setdefault(path, set()).add(c["author"])
+    files, dirs = rank_hotspots(((path, day, *row) for (path, day), row in churn.items()), top, **scoring)
+    return {
+        "hotspots": [(path, {**info, "authors": len(authors[path])}) for path, info in files],
+        "hot_dirs": dirs,
+    }
+
+
+def hotspots_report(project_path: str = None, days: int = None, top: int = None, config: Mapping = None) -> str:
+    """
+    生成最近 N 天的热点报告文本（`mnemos hotspots` 的输出）。
+
+    Args 同 get_hotspots。
+    """
+    if project_path is None:
+        project_path = os.getcwd()
+    days, top, config = _resolve_options(project_path, days, top, config)
+    result = get_hotspots(project_path, days, top, config)
+    if not result["hotspots"]:
+        return f"最近 {days} 天没有文件变动。"
+    lines = [f"=== 最近 {days} 天的变动热点（前 {top} 个）===", ""]
+    lines += [format_hotspot(path, info) for path, info in result["hotspots"]]
+    if result["hot_dirs"]:
+        lines += ["", "热点目录:", ""]
+        lines += [format_hot_dir(path, info) for path, info in result["hot_dirs"]]
+    return "\n".join(lines)
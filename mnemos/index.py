@@ -0,0 +1,275 @@
+"""
+mnemos.index - 记忆文件的倒排索引
+
+把长期记忆的 `## ` section 和短期记忆的 `### ` 日期块作为文档建立倒排索引，
+查询时按 BM25 排序。中日韩文本按字符 n-gram（单字 + 双字）切分，其余文本按单词切分。
+查询的子串语义（`cache` 能匹配 `my_cache`）由查询端保证：拉丁查询词匹配所有包含它的索引词，
+因此倒排列表选出的块总是包含查询求值会接受的全部块。
+
+索引存放在 `.memory/.cache/search.db`，按文件的 (mtime_ns, size) 和内容哈希失效。
+"""
+
+import hashlib
+import math
+import re
+import sqlite3
+from pathlib import Path
+from .document import ensure_cache_dir, parse_document
+from .memory import get_cache_dir, get_long_term_path, get_short_term_path
+
+SCHEMA_VERSION = 1
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_TOKEN_RE = re.compile(f"([{_CJK}]+)|([^\\W{_CJK}]+)")
+
+# 参与索引的文件及其块标题前缀
+MEMORY_FILES = {
+    "long": ("## ", get_long_term_path),
+    "short": ("### ", get_short_term_path),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    name TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    id INTEGER PRIMARY KEY,
+    file TEXT NOT NULL,
+    header TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blocks_file ON blocks(file);
+CREATE TABLE IF NOT EXISTS postings (
+    token TEXT NOT NULL,
+    block_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_token ON postings(token);
+CREATE INDEX IF NOT EXISTS postings_block ON postings(block_id);
+"""
+
+
+def tokenize(text: str, query: bool = False) -> list[str]:
+    """
+    切分文本为索引词。
+
+    中日韩字符串同时产出单字和相邻双字；建索引时两者都写入，
+    查询时长度大于 1 的串只用双字，以保证短语的相邻性。其余文本按单词小写化。
+    """
+    tokens = []
+    for cjk, word in _TOKEN_RE.findall(text):
+        if word:
+            tokens.append(word.lower())
+            continue
+        bigrams = [cjk[i:i + 2] for i in range(len(cjk) - 1)]
+        if query:
+            tokens.extend(bigrams or [cjk])
+        else:
+            tokens.extend(cjk)
+            tokens.extend(bigrams)
+    return tokens
+
+
+def split_blocks(text: str, header_prefix: str) -> list[dict]:
+    """
+    按标题把 Markdown 切分为块（见 mnemos.document），只保留有正文的块。
+
+    Returns:
+        [{'header': str, 'line': int, 'lines': list[str], ...}]，line 为块内第一行的行号，
+        第一个标题之前的内容归入 "Header" 块
+    """
+    return [block for block in parse_document(text, header_prefix).blocks if block["lines"]]
+
+
+def get_index_path(project_path: str = None) -> Path:
+    """获取搜索索引数据库路径"""
+    return get_cache_dir(project_path) / "search.db"
+
+
+def open_index(project_path: str = None) -> sqlite3.Connection:
+    """打开（必要时创建）搜索索引，schema 版本不匹配时清空重建"""
+    path = get_index_path(project_path)
+    ensure_cache_dir(path.parent)
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        with conn:
+            for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _index_file(conn: sqlite3.Connection, name: str, text: str, header_prefix: str) -> None:
+    """重建单个文件的索引"""
+    conn.execute("DELETE FROM postings WHERE block_id IN (SELECT id FROM blocks WHERE file = ?)", (name,))
+    conn.execute("DELETE FROM blocks WHERE file = ?", (name,))
+    for block in split_blocks(text, header_prefix):
+        body = "\n".join(block["lines"])
+        tokens = tokenize(body)
+        cursor = conn.execute(
+            "INSERT INTO blocks (file, header, line, length, text) VALUES (?, ?, ?, ?, ?)",
+            (name, block["header"], block["line"], len(tokens), body),
+        )
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        conn.executemany(
+            "INSERT INTO postings (token, block_id, tf) VALUES (?, ?, ?)",
+            [(token, cursor.lastrowid, tf) for token, tf in counts.items()],
+        )
+
+
+def refresh_index(conn: sqlite3.Connection, project_path: str = None) -> None:
+    """
+    使索引与记忆文件保持一致。
+
+    (mtime_ns, size) 未变时直接信任索引；变化时比较内容哈希，
+    只有内容确实改变的文件才重新切分和建索引。
+    """
+    known = {name: (mtime_ns, size, sha1) for name, mtime_ns, size, sha1 in conn.execute("SELECT * FROM files")}
+    with conn:
+        for name, (header_prefix, get_path) in MEMORY_FILES.items():
+            path = get_path(project_path)
+            if not path.exists():
+                if name in known:
+                    _index_file(conn, name, "", header_prefix)
+                    conn.execute("DELETE FROM files WHERE name = ?", (name,))
+                continue
+
+            st = path.stat()
+            if name in known and known[name][:2] == (st.st_mtime_ns, st.st_size):
+                continue
+
+            data = path.read_bytes()
+            sha1 = hashlib.sha1(data).hexdigest()
+            if name not in known or known[name][2] != sha1:
+                _index_file(conn, name, data.decode("utf-8"), header_prefix)
+            conn.execute(
+                "INSERT OR REPLACE INTO files (name, mtime_ns, size, sha1) VALUES (?, ?, ?, ?)",
+                (name, st.st_mtime_ns, st.st_size, sha1),
+            )
+
+
+def _postings(conn: sqlite3.Connection, token: str) -> list[tuple[int, int]]:
+    """
+    查询一个词的倒排列表。
+
+    中日韩 n-gram 精确匹配；拉丁单词匹配所有包含它的索引词（子串），与查询求值的
+    `term in text` 一致：文本中的任一子串都落在某个完整的单词内。
+    """
+    if _TOKEN_RE.fullmatch(token).group(1):
+        return conn.execute("SELECT block_id, tf FROM postings WHERE token = ?", (token,)).fetchall()
+    return conn.execute(
+        "SELECT block_id, SUM(tf) FROM postings WHERE instr(token, ?) > 0 GROUP BY block_id",
+        (token,),
+    ).fetchall()
+
+
+def score_blocks(conn: sqlite3.Connection, terms: list[str], require_all: bool = False) -> dict[int, float]:
+    """
+    按 BM25 为包含查询词的块打分。
+
+    Args:
+        terms: 查询词（由 tokenize(..., query=True) 得到）
+        require_all: 为 True 时只保留包含全部查询词的块
+
+    Returns:
+        {block_id: score}
+    """
+    terms = list(dict.fromkeys(terms))
+    if not terms:
+        return {}
+
+    n_blocks, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM blocks").fetchone()
+    if not n_blocks:
+        return {}
+    avgdl = total_length / n_blocks or 1
+    lengths = {}
+
+    matched = None
+    per_term = []
+    for term in terms:
+        postings = _postings(conn, term)
+        idf = math.log(1 + (n_blocks - len(postings) + 0.5) / (len(postings) + 0.5))
+        per_term.append((idf, dict(postings)))
+        ids = {block_id for block_id, _ in postings}
+        if matched is None:
+            matched = ids
+        else:
+            matched = matched & ids if require_all else matched | ids
+        if require_all and not matched:
+            return {}
+
+    block_ids = list(matched)
+    # 分批查询，避免超出 SQLite 的参数个数上限
+    for i in range(0, len(block_ids), 500):
+        batch = block_ids[i:i + 500]
+        lengths.update(conn.execute(
+            f"SELECT id, length FROM blocks WHERE id IN ({','.join('?' * len(batch))})", batch
+        ).fetchall())
+
+    scores = {}
+    for block_id, length in lengths.items():
+        norm = K1 * (1 - B + B * length / avgdl)
+        scores[block_id] = sum(
+            idf * tfs[block_id] * (K1 + 1) / (tfs[block_id] + norm)
+            for idf, tfs in per_term
+            if block_id in tfs
+        )
+    return scores
+
+
+def load_blocks(conn: sqlite3.Connection, file: str, ids: set[int] = None) -> list[dict]:
+    """
+    按文件顺序读取索引中某个文件的块，结构同 split_blocks，另带块 id。
+
+    Args:
+        ids: 只读取这些块，默认读取全部
+    """
+    query = "SELECT id, header, line, text FROM blocks WHERE file = ?"
+    if ids is None:
+        batches = [[]]
+    else:
+        # 分批查询，避免超出 SQLite 的参数个数上限
+        block_ids = sorted(ids)
+        batches = [block_ids[i:i + 500] for i in range(0, len(block_ids), 500)]
+    blocks = []
+    for batch in batches:
+        sql = query + (f" AND id IN ({','.join('?' * len(batch))})" if batch else "") + " ORDER BY id"
+        blocks.extend(
+            {"id": block_id, "header": header, "line": line, "lines": text.split("\n")}
+            for block_id, header, line, text in conn.execute(sql, (file, *batch))
+        )
+    return blocks
+
+
+def term_blocks(conn: sqlite3.Connection, term: str) -> set[int] | None:
+    """
+    查询可能包含某个查询词的块，即同时含有它全部索引词的块。
+
+    拉丁单词按子串匹配、中日韩文本按双字匹配，与 score_blocks 一致；结果总是包含
+    `term in text` 成立的全部块，可以放心用来缩小求值范围。
+
+    Returns:
+        块 id 集合；查询词中没有可索引的字符（如纯标点）时为 None，表示无法用索引缩小范围
+    """
+    blocks = None
+    for token in dict.fromkeys(tokenize(term, query=True)):
+        ids = {block_id for block_id, _ in _postings(conn, token)}
+        blocks = ids if blocks is None else blocks & ids
+        if not blocks:
+            break
+    return blocks
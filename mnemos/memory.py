@@ -3,9 +3,12 @@ mnemos.memory - 记忆读写核心函数
 """
 
 import os
+import json
 import datetime
+from collections.abc import Mapping
 from pathlib import Path
 from .config import load_config
+from .document import load_document, parse_document, update_document
 
 
 def get_memory_dir(project_path: str = None) -> Path:
@@ -25,6 +28,11 @@ def get_long_term_path(project_path: str = None) -> Path:
     return get_memory_dir(project_path) / "long_term.md"
 
 
+def get_cache_dir(project_path: str = None) -> Path:
+    """获取缓存目录路径（存放 mnemos 自动生成的机器数据，可随时删除）"""
+    return get_memory_dir(project_path) / ".cache"
+
+
 def read_short_term(project_path: str = None) -> str:
     """
     读取短期记忆。
@@ -38,7 +46,7 @@ def read_short_term(project_path: str = None) -> str:
     path = get_short_term_path(project_path)
     if not path.exists():
         raise FileNotFoundError(f"短期记忆文件不存在: {path}\n请先运行 `mnemos init` 初始化。")
-    return path.read_text(encoding="utf-8") or "短期记忆为空。"
+    return load_document(path, "### ").text or "短期记忆为空。"
 
 
 def read_long_term(section: str = None, project_path: str = None) -> str:
@@ -56,30 +64,17 @@ def read_long_term(section: str = None, project_path: str = None) -> str:
     if not path.exists():
         raise FileNotFoundError(f"长期记忆文件不存在: {path}\n请先运行 `mnemos init` 初始化。")
     
-    content = path.read_text(encoding="utf-8")
+    document = load_document(path, "## ")
 
     if not section:
-        return content or "长期记忆为空。"
+        return document.text or "长期记忆为空。"
 
     # 提取指定 section
-    lines = content.split("\n")
-    capturing = False
-    result = []
-
-    for line in lines:
-        if line.startswith("## ") and section in line:
-            capturing = True
-            result.append(line)
-            continue
-        if capturing and line.startswith("## "):
-            break
-        if capturing:
-            result.append(line)
-
-    if not result:
+    block = document.section(section)
+    if block is None:
         raise ValueError(f"未找到 section: {section}")
-        
-    return "\n".join(result).strip()
+
+    return document.raw(block).strip()
 
 
 def read_memory(memory_type: str = "all", section: str = None, project_path: str = None) -> str:
@@ -104,7 +99,7 @@ def read_memory(memory_type: str = "all", section: str = None, project_path: str
         return f"{long}\n\n---\n\n{short}"
 
 
-def update_long_term_memory(section: str, content: str, mode: str = "replace", project_path: str = None) -> str:
+def update_long_term_memory(section: str, content: str, mode: str = "replace", project_path: str = None, config: Mapping = None) -> str:
     """
     更新长期记忆中的指定 section。
     
@@ -113,49 +108,120 @@ def update_long_term_memory(section: str, content: str, mode: str = "replace", p
         content: 要写入的内容（markdown 格式）
         mode: "replace" 替换 | "append" 追加
         project_path: 项目路径，默认为当前目录
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
     
     Returns:
         执行结果消息
     """
-    config = load_config(project_path)
+    mode = "append" if mode == "append" else "replace"
+    update_long_term_sections([{"section": section, "content": content, "mode": mode}], project_path, config)
+    return f"长期记忆 [{section}] 已{'追加' if mode == 'append' else '更新'}。"
+
+
+def update_long_term_sections(updates: list[dict], project_path: str = None, config: Mapping = None) -> str:
+    """
+    在一次解析、一次原子写入中批量更新长期记忆的多个 section。
+
+    所有 section 和模式都会先校验，任何一项无效时整批都不会写入。
+    同一 section 的多项更新按顺序依次生效。
+
+    Args:
+        updates: [{'section': str, 'content': str, 'mode': 'replace' | 'append'}]，mode 默认为 replace
+        project_path: 项目路径，默认为当前目录
+        config: 预先加载的配置，默认读取项目的 .mnemos.toml
+
+    Returns:
+        执行结果消息
+    """
+    if not updates:
+        raise ValueError("批量更新为空")
+
+    if config is None:
+        config = load_config(project_path)
     valid_sections = config["memory"]["valid_sections"]
 
-    if section not in valid_sections:
-        raise ValueError(f"无效的 section: {section}。当前配置允许的值: {', '.join(valid_sections)}")
+    updates = [{"mode": "replace", **u} for u in updates]
+    for u in updates:
+        if u["section"] not in valid_sections:
+            raise ValueError(f"无效的 section: {u['section']}。当前配置允许的值: {', '.join(valid_sections)}")
+        if u["mode"] not in ("replace", "append"):
+            raise ValueError(f"无效的更新模式: {u['mode']}（可选 replace / append）")
 
     path = get_long_term_path(project_path)
     if not path.exists():
         raise FileNotFoundError(f"长期记忆文件不存在: {path}\n请先运行 `mnemos init` 初始化。")
     
-    lines = path.read_text(encoding="utf-8").splitlines(keepends=True)
-
-    section_header = f"## {section}"
-    start_idx = None
-    end_idx = None
-
-    for i, line in enumerate(lines):
-        if line.strip().startswith(section_header):
-            start_idx = i
-            continue
-        if start_idx is not None and line.strip().startswith("## "):
-            end_idx = i
-            break
-
-    if start_idx is None:
-        raise ValueError(f"在长期记忆中未找到 section: {section}")
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
 
-    if end_idx is None:
-        end_idx = len(lines)
+    def edit(document):
+        by_section = {}
+        for u in updates:
+            if document.section(u["section"]) is None:
+                raise ValueError(f"在长期记忆中未找到 section: {u['section']}")
+            by_section.setdefault(u["section"], []).append(u)
+
+        # 按文件顺序拼接，只重写被更新的 section
+        parts = []
+        for block in document.blocks:
+            pending = by_section.pop(block["header"], None) if block["start"] else None
+            if pending is None:
+                parts.append(document.raw(block))
+                continue
+            body = document.text[block["body_offset"]:block["end_offset"]]
+            for u in pending:
+                if u["mode"] == "append":
+                    body = f"{body}\n{u['content']}\n*追加于: {now}*\n\n"
+                else:
+                    body = f"*更新于: {now}*\n\n{u['content']}\n\n"
+            parts.append(f"## {block['header']}\n{body}")
+        return "".join(parts)
+
+    # 文件在计算期间被其他写入者替换时，会基于新内容重新拼接，不会覆盖对方的修改
+    update_document(path, "## ", edit)
+
+    summary = "、".join(f"[{u['section']}] {'追加' if u['mode'] == 'append' else '更新'}" for u in updates)
+    return f"长期记忆已批量更新 {len(updates)} 项: {summary}。"
+
+
+def parse_section_updates(text: str, mode: str = None) -> list[dict]:
+    """
+    解析 `mnemos write --batch` 的输入。
 
-    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-    
-    if mode == "append":
-        existing = lines[start_idx + 1:end_idx]
-        new_section = [f"{section_header}\n"] + existing + [f"\n{content}\n", f"*追加于: {now}*\n", "\n"]
-    else:
-        new_section = [f"{section_header}\n", f"*更新于: {now}*\n", "\n", f"{content}\n", "\n"]
+    支持两种格式:
+        JSON: [{"section": "架构决策", "content": "...", "mode": "append"}, ...]
+              或 {"架构决策": "...", ...}
+        Markdown: 多个 `## section` 块，每块正文即该 section 的新内容
 
-    lines[start_idx:end_idx] = new_section
-    path.write_text("".join(lines), encoding="utf-8")
+    指定 mode 时（即 `-a`）所有项都使用该模式，覆盖 JSON 中各项自带的 mode；
+    未指定时使用各项自带的 mode，缺省为 replace。
 
-    return f"长期记忆 [{section}] 已{'追加' if mode == 'append' else '更新'}。"
+    Raises:
+        ValueError: 输入为空或格式无效
+    """
+    stripped = text.strip()
+    if not stripped:
+        raise ValueError("批量输入为空")
+
+    if stripped[0] in "[{":
+        try:
+            data = json.loads(stripped)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"无效的批量 JSON: {e}")
+        if isinstance(data, dict):
+            data = [{"section": section, "content": content} for section, content in data.items()]
+        if not isinstance(data, list) or not all(isinstance(u, dict) and "section" in u and "content" in u for u in data):
+            raise ValueError("无效的批量 JSON: 每一项都需要包含 section 和 content")
+        if mode is not None:
+            return [{**u, "mode": mode} for u in data]
+        return [{"mode": "replace", **u} for u in data]
+
+    document = parse_document(text, "## ")
+    updates = []
+    for block in document.blocks:
+        content = "\n".join(block["lines"]).strip()
+        if not block["start"]:
+            if content:
+                raise ValueError("无效的批量 Markdown: 第一个 `## section` 标题之前不能有内容")
+            continue
+        updates.append({"section": block["header"], "content": content, "mode": mode or "replace"})
+    return updates
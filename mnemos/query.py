@@ -0,0 +1,258 @@
+"""
+mnemos.query - 记忆搜索的查询语言
+
+支持的语法:
+    缓存 数据库          多个词隐式 AND
+    缓存 OR 索引         OR / AND / NOT（大写）以及括号分组，`-词` 等价于 NOT
+    "查询 缓存"          引号短语
+    /fix(ed)?\\s+bug/     正则（不区分大小写）
+    section:架构决策     字段过滤: section（长期记忆 section 名）、type（提交类型）、
+    type:fix             date（短期记忆日期，支持 >=、<=、>、<、=）
+    date:>=2026-10-01
+
+长期记忆以整个 `## ` section 为一条记录求值，短期记忆以每一行为一条记录、
+并继承所在 `### ` 日期块与 `#### ` 类型分组。
+"""
+
+import re
+import operator
+from collections.abc import Callable
+
+FIELDS = ("section", "type", "date")
+
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "=": operator.eq,
+}
+
+
+def _tokenize_query(query: str) -> list[tuple[str, object]]:
+    """把查询字符串切分为 (kind, value) 词法单元"""
+    tokens = []
+    i, n = 0, len(query)
+
+    def read_quoted(start: int, quote: str) -> tuple[str, int]:
+        end = start + 1
+        chars = []
+        while end < n and query[end] != quote:
+            if query[end] == "\\" and end + 1 < n:
+                end += 1
+            chars.append(query[end])
+            end += 1
+        if end >= n:
+            raise ValueError(f"无效的查询: 未闭合的 {quote}")
+        return "".join(chars), end + 1
+
+    while i < n:
+        c = query[i]
+        if c.isspace():
+            i += 1
+        elif c in "()":
+            tokens.append((c, c))
+            i += 1
+        elif c == '"':
+            value, i = read_quoted(i, '"')
+            tokens.append(("text", value))
+        elif c == "/" and query.find("/", i + 1) != -1:
+            value, i = read_quoted(i, "/")
+            try:
+                tokens.append(("regex", re.compile(value, re.IGNORECASE)))
+            except re.error as e:
+                raise ValueError(f"无效的查询: 正则 /{value}/ 有误: {e}")
+        else:
+            start = i
+            while i < n and not query[i].isspace() and query[i] not in "()":
+                i += 1
+            word = query[start:i]
+            if word in ("AND", "OR", "NOT"):
+                tokens.append((word, word))
+            elif word.startswith("-") and len(word) > 1 and word[1] != "-":
+                tokens.append(("NOT", "NOT"))
+                i = start + 1
+            else:
+                field, sep, value = word.partition(":")
+                if sep and field.lower() in FIELDS:
+                    if not value and i < n and query[i] == '"':
+                        value, i = read_quoted(i, '"')
+                    tokens.append(("field", (field.lower(), value)))
+                else:
+                    tokens.append(("text", word))
+
+    return tokens
+
+
+def _field_node(field: str, value: str) -> tuple:
+    if field == "date":
+        for symbol in (">=", "<=", ">", "<", "="):
+            if value.startswith(symbol):
+                return ("field", field, _OPERATORS[symbol], value[len(symbol):])
+        return ("field", field, operator.eq, value)
+    return ("field", field, None, value.lower())
+
+
+class _Parser:
+    """递归下降解析器: or_expr := and_expr (OR and_expr)*"""
+
+    def __init__(self, tokens: list):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else None
+
+    def next(self) -> tuple:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def parse(self) -> tuple:
+        node = self.or_expr()
+        if self.peek() is not None:
+            raise ValueError(f"无效的查询: 多余的 '{self.tokens[self.pos][1]}'")
+        return node
+
+    def or_expr(self) -> tuple:
+        children = [self.and_expr()]
+        while self.peek() == "OR":
+            self.next()
+            children.append(self.and_expr())
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def and_expr(self) -> tuple:
+        children = [self.unary()]
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.next()
+            children.append(self.unary())
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def unary(self) -> tuple:
+        kind = self.peek()
+        if kind is None:
+            raise ValueError("无效的查询: 表达式不完整")
+        if kind == "NOT":
+            self.next()
+            return ("not", self.unary())
+        if kind == "(":
+            self.next()
+            node = self.or_expr()
+            if self.peek() != ")":
+                raise ValueError("无效的查询: 缺少 ')'")
+            self.next()
+            return node
+        kind, value = self.next()
+        if kind == "text":
+            return ("text", value.lower())
+        if kind == "regex":
+            return ("regex", value)
+        if kind == "field":
+            return _field_node(*value)
+        raise ValueError(f"无效的查询: 意外的 '{value}'")
+
+
+class Query:
+    """
+    编译后的查询。
+
+    Attributes:
+        source: 原始查询字符串
+        terms: 未被 NOT 否定的文本词，用于相关度排序和命中行定位
+        patterns: 未被 NOT 否定的正则
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        tokens = _tokenize_query(source)
+        if not tokens:
+            raise ValueError("无效的查询: 查询为空")
+        self.root = _Parser(tokens).parse()
+        self.terms = []
+        self.patterns = []
+        self._collect(self.root, negated=False)
+
+    def _collect(self, node: tuple, negated: bool) -> None:
+        kind = node[0]
+        if kind in ("and", "or"):
+            for child in node[1]:
+                self._collect(child, negated)
+        elif kind == "not":
+            self._collect(node[1], not negated)
+        elif not negated and kind == "text":
+            self.terms.append(node[1])
+        elif not negated and kind == "regex":
+            self.patterns.append(node[1])
+
+    def matches(self, record: dict) -> bool:
+        """
+        判断记录是否满足查询。
+
+        record 需包含 text_lower（小写文本）、text，以及可选的 section / type / date。
+        """
+        return self._eval(self.root, record)
+
+    def _eval(self, node: tuple, record: dict) -> bool:
+        kind = node[0]
+        if kind == "text":
+            return node[1] in record["text_lower"]
+        if kind == "regex":
+            return node[1].search(record["text"]) is not None
+        if kind == "and":
+            return all(self._eval(child, record) for child in node[1])
+        if kind == "or":
+            return any(self._eval(child, record) for child in node[1])
+        if kind == "not":
+            return not self._eval(node[1], record)
+
+        _, field, op, value = node
+        actual = record.get(field)
+        if actual is None:
+            return False
+        if field == "date":
+            return op(actual, value)
+        if field == "section":
+            return value in actual.lower()
+        return actual == value
+
+    def candidates(self, lookup: Callable[[str], set | None]) -> set | None:
+        """
+        借助倒排索引缩小需要求值的范围。
+
+        lookup(文本词) 返回可能包含该词的块，无法判断时返回 None。AND 取交集、OR 取并集；
+        NOT、正则和字段过滤无法由索引判断，在 AND 中被忽略，在 OR 中使整体无法判断。
+
+        Returns:
+            可能满足查询的块集合；为 None 时需要检查全部块
+        """
+        return self._candidates(self.root, lookup)
+
+    def _candidates(self, node: tuple, lookup: Callable[[str], set | None]) -> set | None:
+        kind = node[0]
+        if kind == "text":
+            return lookup(node[1])
+        if kind == "and":
+            sets = [found for found in (self._candidates(child, lookup) for child in node[1]) if found is not None]
+            return set.intersection(*sets) if sets else None
+        if kind == "or":
+            union = set()
+            for child in node[1]:
+                found = self._candidates(child, lookup)
+                if found is None:
+                    return None
+                union |= found
+            return union
+        return None
+
+    def highlights(self, line: str) -> bool:
+        """判断一行是否包含查询中的正向文本词或正则；没有正向词时任何非空行都算"""
+        if not self.terms and not self.patterns:
+            return bool(line.strip())
+        lower = line.lower()
+        return any(t in lower for t in self.terms) or any(p.search(line) for p in self.patterns)
+
+
+def parse_query(source: str) -> Query:
+    """解析查询字符串，语法错误时抛出 ValueError"""
+    return Query(source)
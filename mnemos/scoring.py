@@ -0,0 +1,173 @@
+"""
+mnemos.scoring - 变动热点评分
+
+热点按 (文件, 日期) 的日汇总计分，而不是简单地比较修改次数：
+
+    score = commits × (1 + churn_weight × ln(1 + 行数 / commits)) × 0.5 ^ (距今天数 / half_life)
+
+- 时间衰减：half_life 天前的修改只算一半，今天重写 3 次的文件可以排在六天前改了 10 次的文件前面；
+- 变动量加权：修改次数相同时，平均改动行数多的文件得分更高。取对数，避免生成文件、
+  大批量格式化主导排名。
+
+目录热点在同一遍中沿路径前缀树累加得到，只报告含两个以上子项的目录（只有一个子项的目录
+与该子项得分相同，不提供额外信息）。文件和目录的 top-K 都用有界堆选出，不对全部文件排序。
+
+重命名和移动后，文件在旧路径下的历史归入它的最新路径（follow_renames），
+重构不会把一个文件的变动拆成多条热点。
+
+计分是对日汇总的一遍字典累加：衰减系数按日期只计算一次，每个文件一个 [score, count, added,
+deleted, last] 列表原地累加。纯 Python 下这比列式 array 更快（array 的逐元素索引每次都要装箱
+新的 int / float），benchmarks 中的 rank_hotspots[dict_baseline] 用来对照。
+"""
+
+import datetime
+import heapq
+import math
+from collections.abc import Iterable, Iterator, Mapping
+
+DEFAULT_HALF_LIFE = 5
+DEFAULT_CHURN_WEIGHT = 1.0
+
+
+def scoring_options(config: Mapping) -> dict:
+    """
+    从配置的 [hotspots] 读取评分参数，作为 rank_hotspots / aggregate_activity 的关键字参数。
+
+    Raises:
+        ValueError: half_life 或 churn_weight 为负数
+    """
+    hotspot_config = config.get("hotspots", {})
+    half_life = hotspot_config.get("half_life", DEFAULT_HALF_LIFE)
+    churn_weight = hotspot_config.get("churn_weight", DEFAULT_CHURN_WEIGHT)
+    if half_life < 0 or churn_weight < 0:
+        raise ValueError(f"无效的热点评分参数: half_life={half_life}, churn_weight={churn_weight}")
+    return {"half_life": half_life, "churn_weight": churn_weight}
+
+
+def follow_renames(commits: Iterable[dict]) -> Iterator[tuple[dict, str, int, int]]:
+    """
+    逐条产出 (commit, path, added, deleted)，path 为文件在这批提交中的最新路径。
+
+    commits 按 git log 的顺序（新到旧）排列：遇到 old → new 的重命名后，
+    更早的提交中 old 的变动都记到 new（或 new 之后再改的名字）上。
+    重命名之后在 old 新建的文件先于重命名被处理，不受影响。
+    """
+    aliases = {}
+    for c in commits:
+        for added, deleted, path in c["files"]:
+            yield c, aliases.get(path, path), added, deleted
+        for old, new in c.get("renames", ()):
+            aliases[old] = aliases.get(new, new)
+
+
+def _day_ordinal(day: str | None, today: int) -> int:
+    if not day:
+        return today
+    try:
+        return datetime.date.fromisoformat(day).toordinal()
+    except ValueError:
+        return today
+
+
+def rank_hotspots(
+    rows: Iterable[tuple[str, str | None, int, int, int]],
+    top: int = 5,
+    half_life: float = DEFAULT_HALF_LIFE,
+    churn_weight: float = DEFAULT_CHURN_WEIGHT,
+    today: datetime.date = None,
+) -> tuple[list[tuple[str, dict]], list[tuple[str, dict]]]:
+    """
+    对日汇总计分，选出得分最高的文件和目录。
+
+    Args:
+        rows: (path, day, commits, added, deleted)，同一 (path, day) 只能出现一次；
+              day 为 YYYY-MM-DD，缺失时按今天计算
+        top: 文件和目录各保留的数量
+        half_life: 衰减半衰期（天），0 表示不衰减
+        churn_weight: 变动行数的权重，0 表示只看修改次数
+        today: 计算衰减的基准日期，默认今天（只影响得分大小，不影响排名）
+
+    Returns:
+        (files, dirs)：files 为 [(path, {'count', 'added', 'deleted'})]，
+        dirs 为 [('dir/', {'count', 'added', 'deleted', 'files'})]，均按得分降序，
+        同分时较新的在前，再按路径排序
+    """
+    today_ord = (today or datetime.date.today()).toordinal()
+    log1p = math.log1p
+
+    # 每个日期只计算一次 (衰减系数, 日期序号)
+    day_weights: dict[str | None, tuple[float, int]] = {}
+    # 文件: [score, count, added, deleted, 最近修改的日期序号]
+    files: dict[str, list] = {}
+    for path, day, commits, added, deleted in rows:
+        weight = day_weights.get(day)
+        if weight is None:
+            ordinal = _day_ordinal(day, today_ord)
+            decay = 0.5 ** (max(today_ord - ordinal, 0) / half_life) if half_life else 1.0
+            weight = day_weights[day] = (decay, ordinal)
+        s = commits * weight[0]
+        if churn_weight and commits:
+            s *= 1 + churn_weight * log1p((added + deleted) / commits)
+        acc = files.get(path)
+        if acc is None:
+            files[path] = [s, commits, added, deleted, weight[1]]
+        else:
+            acc[0] += s
+            acc[1] += commits
+            acc[2] += added
+            acc[3] += deleted
+            if weight[1] > acc[4]:
+                acc[4] = weight[1]
+
+    if not files:
+        return [], []
+
+    # 得分按日汇总累加，顺序不同会带来末位误差，比较前先取整，保证排名与输入顺序无关
+    def rank_key(value: float, newest: int, path: str) -> tuple:
+        return -round(value, 9), -newest, path
+
+    best = heapq.nsmallest(top, files.items(), key=lambda item: rank_key(item[1][0], item[1][4], item[0]))
+    return (
+        [(path, {"count": acc[1], "added": acc[2], "deleted": acc[3]}) for path, acc in best],
+        _rank_dirs(files, top, rank_key),
+    )
+
+
+def _rank_dirs(files: dict[str, list], top: int, rank_key) -> list[tuple[str, dict]]:
+    """沿路径前缀树一遍累加文件得分，选出得分最高的目录"""
+    # 节点: [子节点, score, count, added, deleted, files, last, 子项数]
+    root = [{}, 0.0, 0, 0, 0, 0, 0, 0]
+    for path, (score, count, added, deleted, last) in files.items():
+        node = root
+        parts = path.split("/")
+        for part in parts[:-1]:
+            child = node[0].get(part)
+            if child is None:
+                child = node[0][part] = [{}, 0.0, 0, 0, 0, 0, 0, 0]
+                node[7] += 1
+            child[1] += score
+            child[2] += count
+            child[3] += added
+            child[4] += deleted
+            child[5] += 1
+            if last > child[6]:
+                child[6] = last
+            node = child
+        # 文件本身也是父目录的一个子项
+        node[7] += 1
+
+    candidates = []
+    stack = [("", root)]
+    while stack:
+        prefix, node = stack.pop()
+        for name, child in node[0].items():
+            path = f"{prefix}{name}/"
+            if child[7] >= 2:
+                candidates.append((path, child))
+            stack.append((path, child))
+
+    best = heapq.nsmallest(top, candidates, key=lambda item: rank_key(item[1][1], item[1][6], item[0]))
+    return [
+        (path, {"count": node[2], "added": node[3], "deleted": node[4], "files": node[5]})
+        for path, node in best
+    ]
@@ -3,82 +3,186 @@ mnemos.search - 记忆搜索功能
 """
 
 import re
+import sqlite3
 import datetime
-from pathlib import Path
-from .memory import get_long_term_path, get_short_term_path
+from collections.abc import Iterator
+from .archive import load_archived_blocks
+from .document import load_document
+from .memory import get_memory_dir
+from .index import MEMORY_FILES, open_index, refresh_index, load_blocks, score_blocks, term_blocks, tokenize
+from .query import Query, parse_query
+from .git import TYPE_LABELS
+from .timing import timed
 
 
-def search_in_file(path: Path, keyword: str, header_prefix: str) -> list[dict]:
+# 短期记忆中 "#### ✨ 功能" 等分组标题到提交类型的反向映射
+_LABEL_TYPES = {label: commit_type for commit_type, label in TYPE_LABELS.items()}
+_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def _iter_records(name: str, blocks: list[dict]) -> Iterator[dict]:
     """
-    在 Markdown 文件中搜索关键词，并关联到最近的上级标题。
-    
-    Returns:
-        matches: [{'header': str, 'line_no': int, 'content': str}]
+    把块展开为查询求值的记录。
+
+    长期记忆每个 section 是一条记录；短期记忆每一行是一条记录，
+    继承所在日期块和 `#### ` 类型分组。
     """
-    if not path.exists():
-        return []
-
-    results = []
-    current_header = "Header"
-    lines = path.read_text(encoding="utf-8").splitlines()
-    
-    # 编译不区分大小写的正则
-    pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-
-    for i, line in enumerate(lines):
-        # 跟踪当前所在的标题 (如 ## Section 或 ### Date)
-        if line.startswith(header_prefix):
-            current_header = line.strip().lstrip("#").strip()
+    for block in blocks:
+        header = block["header"]
+        if name == "long":
+            text = "\n".join(block["lines"])
+            yield {
+                "block": block.get("id"),
+                "header": header,
+                "section": header,
+                "line": block["line"],
+                "lines": block["lines"],
+                "text": text,
+                "text_lower": text.lower(),
+            }
             continue
-            
-        if pattern.search(line):
-            # 获取前后各一行的上下文
-            start = max(0, i - 1)
-            end = min(len(lines), i + 2)
-            context = lines[start:end]
-            
-            results.append({
-                "header": current_header,
-                "line_no": i + 1,
-                "content": line.strip(),
-                "context": "\n".join(context)
-            })
-            
-    return results
 
+        date = header if _DATE_RE.fullmatch(header) else None
+        commit_type = None
+        for i, line in enumerate(block["lines"]):
+            if line.startswith("#### "):
+                label = line[5:].strip()
+                commit_type = _LABEL_TYPES.get(label, label.split()[-1].lower() if label else None)
+                continue
+            if not line.strip():
+                continue
+            yield {
+                "block": block.get("id"),
+                "header": header,
+                "date": date,
+                "type": commit_type,
+                "line": block["line"] + i,
+                "lines": [line],
+                "text": line,
+                "text_lower": line.lower(),
+            }
 
-def search_memory(keyword: str, memory_type: str = "all", days: int = None, project_path: str = None) -> str:
+
+def _load_memory_blocks(names: list[str], queries: list[Query], project_path: str = None) -> tuple[dict, list[set | None], sqlite3.Connection | None]:
     """
-    执行跨文件的记忆搜索。
+    读取各记忆文件中需要求值的块。
+
+    优先使用 `.memory/.cache/search.db` 的倒排索引（不再读取 Markdown 文件）：含正向文本词的查询
+    先由倒排列表选出候选块（AND 取交集、OR 取并集），只读取这些块；只有全部由 NOT、正则或字段
+    过滤组成的查询才读取全部块。项目未初始化或索引不可用时，直接切分文件。返回的连接由调用方关闭。
+
+    Returns:
+        (各文件的块, 与 queries 一一对应的候选块 id 集合（None 表示不限）, 索引连接)
     """
-    output = [f"搜索关键词: '{keyword}'", ""]
-    found_any = False
+    if get_memory_dir(project_path).exists():
+        conn = None
+        try:
+            conn = open_index(project_path)
+            refresh_index(conn, project_path)
+            found = {}
 
-    # 1. 搜索长期记忆
-    if memory_type in ("all", "long"):
-        path = get_long_term_path(project_path)
-        matches = search_in_file(path, keyword, "## ")
-        if matches:
-            found_any = True
-            output.append("=== 长期记忆匹配 ===")
-            for m in matches:
-                output.append(f"[{m['header']}] L{m['line_no']}: {m['content']}")
-            output.append("")
+            def lookup(term: str) -> set[int] | None:
+                if term not in found:
+                    found[term] = term_blocks(conn, term)
+                return found[term]
+
+            candidates = [q.candidates(lookup) for q in queries]
+            ids = None if None in candidates else set().union(*candidates)
+            return {name: load_blocks(conn, name, ids) for name in names}, candidates, conn
+        except (sqlite3.Error, OSError):
+            if conn is not None:
+                conn.close()
+
+    blocks = {}
+    for name in names:
+        header_prefix, get_path = MEMORY_FILES[name]
+        path = get_path(project_path)
+        blocks[name] = [b for b in load_document(path, header_prefix).blocks if b["lines"]] if path.exists() else []
+    return blocks, [None] * len(queries), None
 
-    # 2. 搜索短期记忆
-    if memory_type in ("all", "short"):
-        path = get_short_term_path(project_path)
-        matches = search_in_file(path, keyword, "### ")
-        
-        # 如果指定了天数，根据标题中的日期过滤
-        if days is not None:
-            cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+
+@timed("search")
+def query_memory(queries: list[str], memory_type: str = "all", days: int = None, project_path: str = None) -> list[dict[str, list[dict]]]:
+    """
+    在一次扫描中对多个查询求值。
+
+    有索引时先由倒排列表选出各查询的候选块，只读取、遍历候选块一次，所有查询在同一轮中求值，
+    结果按 BM25 排序。
+    指定 days 且搜索范围包含短期记忆时，还会检索 `.memory/archive/` 中日期范围
+    相交的归档分段（结果放在 'archive' 下，line_no 为分段内的行号）。
+    查询语法见 mnemos.query。
+
+    Args:
+        queries: 查询字符串列表
+        memory_type: "all" | "long" | "short"
+        days: 仅保留短期记忆中最近 N 天的结果
+        project_path: 项目路径，默认为当前目录
+
+    Returns:
+        与 queries 一一对应的结果，每项形如
+        {'long': [match, ...], 'short': [match, ...], 'archive': [match, ...]}，
+        match 为 {'header': str, 'line_no': int, 'content': str, 'score': float}
+    """
+    compiled = [parse_query(q) for q in queries]
+    names = [name for name in ("long", "short") if memory_type in ("all", name)]
+    results = [{name: [] for name in names} for _ in compiled]
+
+    cutoff = None
+    if days is not None:
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
+
+    blocks, candidates, conn = _load_memory_blocks(names, compiled, project_path)
+    if cutoff and "short" in names:
+        blocks["archive"] = load_archived_blocks(cutoff, project_path)
+        names.append("archive")
+        for result in results:
+            result["archive"] = []
+    try:
+        scores = [
+            score_blocks(conn, tokenize(" ".join(q.terms), query=True)) if conn and q.terms else {}
+            for q in compiled
+        ]
+    finally:
+        if conn is not None:
+            conn.close()
+
+    for name in names:
+        for record in _iter_records("short" if name == "archive" else name, blocks[name]):
             # 这里的匹配逻辑假设标题格式是 "### YYYY-MM-DD"
-            matches = [m for m in matches if m['header'] >= cutoff]
+            if name != "long" and cutoff and record["header"] < cutoff:
+                continue
+            for qi, q in enumerate(compiled):
+                # 归档分段不在索引中，总是逐条求值
+                if name != "archive" and candidates[qi] is not None and record["block"] not in candidates[qi]:
+                    continue
+                if not q.matches(record):
+                    continue
+                score = scores[qi].get(record["block"], 0.0)
+                for i, line in enumerate(record["lines"]):
+                    if q.highlights(line):
+                        results[qi][name].append({
+                            "header": record["header"],
+                            "line_no": record["line"] + i,
+                            "content": line.strip(),
+                            "score": score,
+                        })
+
+    for result in results:
+        for matches in result.values():
+            matches.sort(key=lambda m: -m["score"])
+    return results
 
+
+def _format_results(keyword: str, result: dict[str, list[dict]]) -> str:
+    """把单个查询的结果渲染为文本"""
+    output = [f"搜索关键词: '{keyword}'", ""]
+    found_any = False
+
+    for name, title in (("long", "=== 长期记忆匹配 ==="), ("short", "=== 短期记忆匹配 ==="), ("archive", "=== 归档记忆匹配 ===")):
+        matches = result.get(name)
         if matches:
             found_any = True
-            output.append("=== 短期记忆匹配 ===")
+            output.append(title)
             for m in matches:
                 output.append(f"[{m['header']}] L{m['line_no']}: {m['content']}")
             output.append("")
@@ -86,4 +190,16 @@ def search_memory(keyword: str, memory_type: str = "all", days: int = None, proj
     if not found_any:
         return f"未在记忆中找到与 '{keyword}' 相关的匹配项。"
 
-    return "\n".join(output)
\ No newline at end of file
+    return "\n".join(output)
+
+
+def search_memory(keyword: str | list[str], memory_type: str = "all", days: int = None, project_path: str = None) -> str:
+    """
+    执行跨文件的记忆搜索，结果按相关度（BM25）排序。
+
+    keyword 支持 AND/OR/NOT、引号短语、正则和字段过滤（见 mnemos.query），
+    也可以传入多个查询，它们会在同一次扫描中求值。
+    """
+    keywords = [keyword] if isinstance(keyword, str) else list(keyword)
+    results = query_memory(keywords, memory_type, days, project_path)
+    return "\n\n".join(_format_results(k, r) for k, r in zip(keywords, results))
@@ -0,0 +1,449 @@
+"""
+mnemos.store - 基于 SQLite 的提交缓存
+
+所有从 git 派生的记忆（短期记忆、热点统计等）都从这里读取。
+数据库位于 `.memory/.cache/commits.db`，只是 git 历史的缓存，删除后会自动重建。
+
+commits / file_changes 只保存窗口（配置的 days / max_count，或更宽的单次请求）内的提交，
+每次写入后裁掉窗口之外的部分；
+file_churn 是按 (文件, 日期) 预聚合的变动统计，覆盖更长的时间范围且不受 max_count 限制，
+热点查询只需对其中的日汇总计分（见 scoring.py）。
+
+file_churn 中的 "文件" 是跨重命名的文件身份（file_ids），而不是路径：path_ids 记录截至
+churn_head 每个路径指向的文件，重命名只是把路径改挂到同一个文件上，并更新文件的最新路径。
+这份映射随变动索引一起增量扩展，已有的日汇总不需要改写。
+
+作者名只在 authors 表中保存一次，其余表记录作者编号；提交正文在解析时已按 git.body_max_chars 截断。
+"""
+
+import json
+import sqlite3
+import sys
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from itertools import groupby
+from pathlib import Path
+from .document import ensure_cache_dir
+from .memory import get_cache_dir
+from .scoring import DEFAULT_CHURN_WEIGHT, DEFAULT_HALF_LIFE, follow_renames, rank_hotspots
+
+SCHEMA_VERSION = 5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS commits (
+    hash TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    parents TEXT NOT NULL,
+    date TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    body TEXT NOT NULL,
+    trailers TEXT NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commits_seq ON commits(seq);
+CREATE INDEX IF NOT EXISTS commits_date ON commits(date);
+CREATE TABLE IF NOT EXISTS file_changes (
+    hash TEXT NOT NULL REFERENCES commits(hash) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    added INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    old_path TEXT
+);
+CREATE INDEX IF NOT EXISTS file_changes_hash ON file_changes(hash);
+CREATE INDEX IF NOT EXISTS file_changes_path ON file_changes(path);
+CREATE TABLE IF NOT EXISTS file_ids (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS path_ids (
+    path TEXT PRIMARY KEY,
+    file_id INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS file_churn (
+    file_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    commits INTEGER NOT NULL,
+    added INTEGER NOT NULL,
+    deleted INTEGER NOT NULL,
+    PRIMARY KEY (file_id, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_churn_day ON file_churn(day);
+CREATE TABLE IF NOT EXISTS file_churn_authors (
+    file_id INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    author_id INTEGER NOT NULL,
+    commits INTEGER NOT NULL,
+    PRIMARY KEY (file_id, day, author_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS file_churn_authors_day ON file_churn_authors(day);
+"""
+
+# 提交窗口的同步状态，clear_commits 只清除这些键，不影响 churn_* 状态
+COMMIT_META_KEYS = ("head", "filters", "complete_since")
+# 变动索引的同步状态
+CHURN_META_KEYS = ("churn_head", "churn_since", "churn_filters")
+
+# 窗口内的提交: seq 越大越新，与 git log 的输出顺序一致
+_WINDOW = "SELECT hash FROM commits WHERE date >= ? ORDER BY seq DESC LIMIT ?"
+
+
+def get_store_path(project_path: str = None) -> Path:
+    """获取提交缓存数据库路径"""
+    return get_cache_dir(project_path) / "commits.db"
+
+
+def open_store(project_path: str = None, check_same_thread: bool = True) -> sqlite3.Connection:
+    """
+    打开（必要时创建）项目的提交缓存数据库。
+
+    schema 版本不匹配时会清空重建，因为其中的数据总能从 git 重新生成。
+    check_same_thread=False 时连接可以依次在不同线程中使用（mnemos.aio 把数据库操作放到工作线程），
+    调用方需保证同一时刻只有一个线程使用它。
+    """
+    path = get_store_path(project_path)
+    ensure_cache_dir(path.parent)
+    conn = sqlite3.connect(path, timeout=10, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        with conn:
+            for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+                conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def get_meta(conn: sqlite3.Connection) -> dict:
+    """读取缓存元数据（head、过滤条件、完整覆盖的起始日期等）"""
+    return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM meta")}
+
+
+def set_meta(conn: sqlite3.Connection, **values) -> None:
+    """写入缓存元数据"""
+    conn.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        [(key, json.dumps(value, ensure_ascii=False)) for key, value in values.items()],
+    )
+
+
+def begin_update(conn: sqlite3.Connection, **expected) -> bool:
+    """
+    开始写事务，并确认元数据仍是同步开始时读到的值。
+
+    同步逻辑在事务之外执行 git（异步版本会在其间 await），写入前需要确认没有其他连接抢先
+    更新了缓存；已被更新时返回 False，调用方应放弃这次写入。须在 `with conn:` 中调用。
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    meta = get_meta(conn)
+    return all(meta.get(key) == value for key, value in expected.items())
+
+
+def clear_commits(conn: sqlite3.Connection) -> None:
+    """清空窗口内的提交数据（全量重扫前调用）"""
+    conn.execute("DELETE FROM file_changes")
+    conn.execute("DELETE FROM commits")
+    conn.execute(f"DELETE FROM meta WHERE key IN ({', '.join('?' * len(COMMIT_META_KEYS))})", COMMIT_META_KEYS)
+
+
+def _author_ids(conn: sqlite3.Connection, commits: Iterable[dict]) -> dict[str, int]:
+    """登记这批提交的作者，返回 作者名 → 编号（作者表很小，直接整表读取）"""
+    conn.executemany("INSERT OR IGNORE INTO authors (name) VALUES (?)", [(name,) for name in {c.get("author", "") for c in commits}])
+    return {name: author_id for author_id, name in conn.execute("SELECT id, name FROM authors")}
+
+
+def _author_names(conn: sqlite3.Connection) -> dict[int, str]:
+    """作者编号 → 作者名；同一作者的提交共享一个字符串对象"""
+    return {author_id: sys.intern(name) for author_id, name in conn.execute("SELECT id, name FROM authors")}
+
+
+def _encode_trailers(trailers: Iterable[tuple[str, str]]) -> str:
+    return "\n".join(f"{key}: {value}" for key, value in trailers)
+
+
+def _decode_trailers(text: str) -> list[tuple[str, str]]:
+    if not text:
+        return []
+    return [(sys.intern(key), value) for key, _, value in (line.partition(": ") for line in text.split("\n"))]
+
+
+def insert_commits(conn: sqlite3.Connection, commits: list[dict]) -> None:
+    """
+    写入一批按 git log 顺序（新到旧）排列的提交。
+
+    新批次的 seq 排在已有提交之后；调用方只在 `<last>..HEAD` 的提交都是 last 的后代时
+    追加（此时它们在 git log 中整体排在已有提交之前），因此 seq 与 git log 的顺序一致。
+    """
+    if not commits:
+        return
+    top = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM commits").fetchone()[0]
+    base = top + len(commits)
+    authors = _author_ids(conn, commits)
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO commits (hash, seq, parents, date, timestamp, author_id, message, body, trailers, type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                c["full_hash"], base - i, " ".join(c.get("parents", ())), c["date"], c.get("timestamp", 0), authors[c.get("author", "")],
+                c["message"], c.get("body", ""), _encode_trailers(c.get("trailers", ())), c["type"],
+            )
+            for i, c in enumerate(commits)
+        ],
+    )
+    renamed = {(c["full_hash"], new): old for c in commits for old, new in c["renames"]}
+    conn.executemany(
+        "INSERT INTO file_changes (hash, path, added, deleted, old_path) VALUES (?, ?, ?, ?, ?)",
+        [
+            (c["full_hash"], path, added, deleted, renamed.get((c["full_hash"], path)))
+            for c in commits
+            for added, deleted, path in c["files"]
+        ],
+    )
+
+
+def trim_commits(conn: sqlite3.Connection, since_date: str, max_count: int) -> str | None:
+    """
+    删除窗口之外的提交，file_changes 随之级联删除。
+
+    Returns:
+        被删除的提交中最新的日期，没有删除时为 None
+    """
+    params = (since_date, max_count)
+    newest = conn.execute(f"SELECT MAX(date) FROM commits WHERE hash NOT IN ({_WINDOW})", params).fetchone()[0]
+    if newest is not None:
+        conn.execute(f"DELETE FROM commits WHERE hash NOT IN ({_WINDOW})", params)
+    return newest
+
+
+def count_commits_since(conn: sqlite3.Connection, since_date: str) -> int:
+    """统计指定日期之后的提交数"""
+    return conn.execute("SELECT COUNT(*) FROM commits WHERE date >= ?", (since_date,)).fetchone()[0]
+
+
+def query_commits(conn: sqlite3.Connection, since_date: str, max_count: int) -> list[dict]:
+    """
+    查询窗口内的提交，结构与 get_recent_commits 的返回值一致。
+    """
+    rows = conn.execute(
+        """
+        SELECT hash, parents, date, timestamp, author_id, message, body, trailers, type
+        FROM commits WHERE date >= ? ORDER BY seq DESC LIMIT ?
+        """,
+        (since_date, max_count),
+    ).fetchall()
+    names = _author_names(conn)
+    commits = {}
+    for full_hash, parents, date, timestamp, author_id, message, body, trailers, commit_type in rows:
+        commits[full_hash] = {
+            "hash": full_hash[:8],
+            "full_hash": full_hash,
+            "parents": parents.split(),
+            "date": date,
+            "author": names.get(author_id, ""),
+            "timestamp": timestamp,
+            "message": message,
+            "body": body,
+            "trailers": _decode_trailers(trailers),
+            "type": commit_type,
+            "files": [],
+            "renames": [],
+        }
+
+    for full_hash, path, added, deleted, old_path in conn.execute(
+        f"SELECT hash, path, added, deleted, old_path FROM file_changes WHERE hash IN ({_WINDOW}) ORDER BY rowid",
+        (since_date, max_count),
+    ):
+        commit = commits[full_hash]
+        commit["files"].append((added, deleted, path))
+        if old_path is not None:
+            commit["renames"].append((old_path, path))
+
+    return list(commits.values())
+
+
+def query_activity(
+    conn: sqlite3.Connection,
+    since_date: str,
+    max_count: int,
+    top: int = 5,
+    half_life: float = DEFAULT_HALF_LIFE,
+    churn_weight: float = DEFAULT_CHURN_WEIGHT,
+) -> dict:
+    """
+    直接用 SQL 聚合窗口内的活动，结构与 aggregate_activity 的返回值一致。
+    """
+    params = (since_date, max_count)
+    type_distribution = dict(conn.execute(
+        f"SELECT type, COUNT(*) FROM commits WHERE hash IN ({_WINDOW}) GROUP BY type ORDER BY MAX(seq) DESC",
+        params,
+    ).fetchall())
+    # 逐条取出窗口内的变动（新到旧），与 aggregate_activity 一样沿重命名归并到最新路径
+    rows = conn.execute(
+        f"""
+        SELECT f.hash, c.date, f.path, f.added, f.deleted, f.old_path
+        FROM file_changes f JOIN commits c ON c.hash = f.hash
+        WHERE f.hash IN ({_WINDOW})
+        ORDER BY c.seq DESC, f.rowid
+        """,
+        params,
+    )
+    churn = {}
+    for c, path, added, deleted in follow_renames(_changes_by_commit(rows)):
+        row = churn.setdefault((path, c["date"]), [0, 0, 0])
+        row[0] += 1
+        row[1] += added
+        row[2] += deleted
+    hotspots, hot_dirs = rank_hotspots(((path, day, *row) for (path, day), row in churn.items()), top, half_life, churn_weight)
+    return {
+        "total_commits": sum(type_distribution.values()),
+        "type_distribution": type_distribution,
+        "hotspots": hotspots,
+        "hot_dirs": hot_dirs,
+    }
+
+
+def _changes_by_commit(rows: Iterable[tuple]) -> Iterator[dict]:
+    """把按提交排列的 (hash, date, path, added, deleted, old_path) 行还原为 follow_renames 需要的提交"""
+    for _, group in groupby(rows, key=lambda r: r[0]):
+        group = list(group)
+        yield {
+            "date": group[0][1],
+            "files": [(added, deleted, path) for _, _, path, added, deleted, _ in group],
+            "renames": [(old, path) for _, _, path, _, _, old in group if old is not None],
+        }
+
+
+def clear_churn(conn: sqlite3.Connection) -> None:
+    """清空变动索引和路径身份映射（重建前调用）"""
+    conn.execute("DELETE FROM file_churn")
+    conn.execute("DELETE FROM file_churn_authors")
+    conn.execute("DELETE FROM path_ids")
+    conn.execute("DELETE FROM file_ids")
+
+
+class _PathIds:
+    """path_ids 的读写缓存：路径 → 文件身份，按需从数据库加载"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self._ids: dict[str, int] = {}
+
+    def get(self, path: str) -> int:
+        """路径当前指向的文件，第一次出现的路径登记为新文件"""
+        file_id = self._ids.get(path)
+        if file_id is None:
+            row = self._conn.execute("SELECT file_id FROM path_ids WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                file_id = row[0]
+            else:
+                file_id = self._conn.execute("INSERT INTO file_ids (path) VALUES (?)", (path,)).lastrowid
+                self._conn.execute("INSERT INTO path_ids (path, file_id) VALUES (?, ?)", (path, file_id))
+            self._ids[path] = file_id
+        return file_id
+
+    def rename(self, old: str, new: str) -> None:
+        """old 上的文件移动到 new；之后在 old 出现的是另一个文件"""
+        file_id = self.get(old)
+        self._conn.execute("DELETE FROM path_ids WHERE path = ?", (old,))
+        self._conn.execute("INSERT OR REPLACE INTO path_ids (path, file_id) VALUES (?, ?)", (new, file_id))
+        self._conn.execute("UPDATE file_ids SET path = ? WHERE id = ?", (new, file_id))
+        del self._ids[old]
+        self._ids[new] = file_id
+
+
+def insert_churn(conn: sqlite3.Connection, commits: list[dict]) -> None:
+    """
+    把一批按 git log 顺序（新到旧）排列的新提交按 (文件, 日期) 累加进变动索引。
+
+    提交按从旧到新的顺序回放，途中的重命名会扩展路径身份映射。
+    """
+    ids = _PathIds(conn)
+    author_ids = _author_ids(conn, commits)
+    churn = {}
+    authors = Counter()
+    for c in reversed(commits):
+        author = author_ids[c.get("author", "")]
+        # numstat 中重命名条目的路径已经是新路径，先移动再记账
+        for old, new in c["renames"]:
+            ids.rename(old, new)
+        for added, deleted, path in c["files"]:
+            file_id = ids.get(path)
+            row = churn.setdefault((file_id, c["date"]), [0, 0, 0])
+            row[0] += 1
+            row[1] += added
+            row[2] += deleted
+            authors[(file_id, c["date"], author)] += 1
+    conn.executemany(
+        """
+        INSERT INTO file_churn (file_id, day, commits, added, deleted) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (file_id, day) DO UPDATE SET
+            commits = commits + excluded.commits,
+            added = added + excluded.added,
+            deleted = deleted + excluded.deleted
+        """,
+        [(file_id, day, *row) for (file_id, day), row in churn.items()],
+    )
+    conn.executemany(
+        """
+        INSERT INTO file_churn_authors (file_id, day, author_id, commits) VALUES (?, ?, ?, ?)
+        ON CONFLICT (file_id, day, author_id) DO UPDATE SET commits = commits + excluded.commits
+        """,
+        [(*key, n) for key, n in authors.items()],
+    )
+
+
+def query_hotspots(
+    conn: sqlite3.Connection,
+    since_date: str,
+    top: int,
+    half_life: float = DEFAULT_HALF_LIFE,
+    churn_weight: float = DEFAULT_CHURN_WEIGHT,
+) -> dict:
+    """
+    对变动索引中 since_date 以来的日汇总计分，选出热点文件和热点目录。
+
+    文件以最新路径显示，重命名前的变动已经归入同一个文件。
+
+    Returns:
+        {'hotspots': [(path, {'count', 'added', 'deleted', 'authors'})],
+         'hot_dirs': [('dir/', {'count', 'added', 'deleted', 'files'})]}，按得分降序
+    """
+    files, dirs = rank_hotspots(
+        conn.execute(
+            """
+            SELECT f.path, c.day, c.commits, c.added, c.deleted
+            FROM file_churn c JOIN file_ids f ON f.id = c.file_id WHERE c.day >= ?
+            """,
+            (since_date,),
+        ),
+        top, half_life, churn_weight,
+    )
+    if not files:
+        return {"hotspots": [], "hot_dirs": dirs}
+    paths = [path for path, _ in files]
+    authors = dict(conn.execute(
+        f"""
+        SELECT f.path, COUNT(DISTINCT a.author_id)
+        FROM file_churn_authors a JOIN file_ids f ON f.id = a.file_id
+        WHERE a.day >= ? AND f.path IN ({', '.join('?' * len(paths))}) GROUP BY f.path
+        """,
+        (since_date, *paths),
+    ).fetchall())
+    return {
+        "hotspots": [(path, {**info, "authors": authors.get(path, 0)}) for path, info in files],
+        "hot_dirs": dirs,
+    }
@@ -0,0 +1,176 @@
+"""
+mnemos.timing - 轻量的分段计时
+
+在关键阶段（git 子进程、日志解析、聚合、渲染、配置加载、文件读写）埋入命名的 span，
+用于回答 "这次 update 的时间花在哪里"：
+
+    with span("aggregate"):
+        ...
+
+未启用计时且没有注册 hook 时，span() 直接返回一个共享的空上下文，几乎没有开销。
+启用方式：`mnemos --profile <命令>`、环境变量 MNEMOS_PROFILE，或在代码中调用 enable()。
+宿主程序可以用 add_hook 注册回调，把每个 span 转发到自己的指标系统。
+
+span 的父子关系记录在 contextvars 中，线程池和 asyncio 任务中的 span 互不干扰。
+"""
+
+import functools
+import json
+import time
+from collections.abc import Callable
+from contextlib import nullcontext
+from contextvars import ContextVar
+
+# hook(name, seconds, attrs)
+Hook = Callable[[str, float, dict], None]
+
+_enabled = False
+_hooks: list[Hook] = []
+_records: list[dict] = []
+_current: ContextVar = ContextVar("mnemos_timing_span", default=None)
+_NULL = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "attrs", "parent", "depth", "children", "start", "token")
+
+    def __init__(self, name: str, attrs: dict):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.parent = _current.get()
+        self.depth = self.parent.depth + 1 if self.parent is not None else 0
+        self.children = 0.0
+        self.token = _current.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        _current.reset(self.token)
+        if self.parent is not None:
+            self.parent.children += elapsed
+        _emit(self.name, self.start, elapsed, elapsed - self.children, self.depth, self.attrs)
+        return False
+
+
+def _emit(name: str, start: float, seconds: float, self_seconds: float, depth: int, attrs: dict) -> None:
+    if _enabled:
+        _records.append({"name": name, "start": start, "seconds": seconds, "self": self_seconds, "depth": depth, "attrs": attrs})
+    for hook in _hooks:
+        hook(name, seconds, attrs)
+
+
+def is_active() -> bool:
+    """计时是否生效（已启用或注册了 hook）"""
+    return _enabled or bool(_hooks)
+
+
+def span(name: str, **attrs):
+    """
+    计时上下文；嵌套的 span 会被记为子阶段，父阶段的 self 时间不含子阶段。
+
+    Args:
+        name: 阶段名，如 "git.run"、"file.write"
+        attrs: 附加属性，原样传给 hook 并写入 JSON 报告
+    """
+    if not _enabled and not _hooks:
+        return _NULL
+    return _Span(name, attrs)
+
+
+def timed(name: str):
+    """把整个函数调用记为一个 span 的装饰器"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled and not _hooks:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name: str, seconds: float, **attrs) -> None:
+    """
+    记录一段在别处累计的耗时，作为当前 span 的子阶段。
+
+    用于无法用 with 包住的情况，例如生成器中在多次 yield 之间分散执行的解析循环。
+    """
+    if not _enabled and not _hooks:
+        return
+    parent = _current.get()
+    if parent is not None:
+        parent.children += seconds
+    depth = parent.depth + 1 if parent is not None else 0
+    start = time.perf_counter() - seconds
+    if parent is not None:
+        start = max(start, parent.start)
+    _emit(name, start, seconds, seconds, depth, attrs)
+
+
+def enable() -> None:
+    """开始收集 span 记录（清空之前的记录）"""
+    global _enabled
+    _records.clear()
+    _enabled = True
+
+
+def disable() -> None:
+    """停止收集 span 记录；已收集的记录保留到下次 enable()"""
+    global _enabled
+    _enabled = False
+
+
+def add_hook(hook: Hook) -> None:
+    """注册回调，每个 span 结束时以 (name, seconds, attrs) 调用"""
+    _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    """注销 add_hook 注册的回调"""
+    _hooks.remove(hook)
+
+
+def summarize() -> list[dict]:
+    """
+    按阶段名汇总已收集的记录，按首次开始时间排序。
+
+    Returns:
+        [{'name', 'depth', 'calls', 'total_ms', 'self_ms'}]
+    """
+    rows = {}
+    for r in sorted(_records, key=lambda r: (r["start"], r["depth"])):
+        row = rows.setdefault(r["name"], {"name": r["name"], "depth": r["depth"], "calls": 0, "total_ms": 0.0, "self_ms": 0.0})
+        row["depth"] = min(row["depth"], r["depth"])
+        row["calls"] += 1
+        row["total_ms"] += r["seconds"] * 1000
+        row["self_ms"] += r["self"] * 1000
+    return list(rows.values())
+
+
+def _total_ms() -> float:
+    return sum(r["seconds"] for r in _records if r["depth"] == 0) * 1000
+
+
+def format_report() -> str:
+    """分阶段耗时表（子阶段缩进显示）"""
+    lines = [
+        f"=== mnemos 性能剖析（总计 {_total_ms():.1f} ms）===",
+        f"{'阶段':<34}{'调用':>6}{'总计(ms)':>12}{'自身(ms)':>12}",
+    ]
+    for row in summarize():
+        name = "  " * row["depth"] + row["name"]
+        lines.append(f"{name:<36}{row['calls']:>6}{row['total_ms']:>12.2f}{row['self_ms']:>12.2f}")
+    return "\n".join(lines)
+
+
+def format_json() -> str:
+    """JSON 格式的汇总和原始 span 记录"""
+    spans = [
+        {"name": r["name"], "depth": r["depth"], "ms": r["seconds"] * 1000, "self_ms": r["self"] * 1000, "attrs": r["attrs"]}
+        for r in sorted(_records, key=lambda r: (r["start"], r["depth"]))
+    ]
+    return json.dumps({"total_ms": _total_ms(), "phases": summarize(), "spans": spans}, ensure_ascii=False, indent=2, default=str)
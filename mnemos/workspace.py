@@ -0,0 +1,176 @@
+"""
+mnemos.workspace - 多仓库工作区
+
+在包含多个 git 仓库的目录中并发更新各仓库的短期记忆，并生成跨仓库的热点报告。
+每个仓库的耗时主要花在等待 git 子进程上，因此使用有界线程池即可获得并行度。
+"""
+
+import datetime
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .document import write_document
+from .git import _update_short_term, format_hot_dir, format_hotspot
+from .memory import get_memory_dir
+from .scoring import follow_renames, rank_hotspots
+from .timing import span
+
+# 默认并发数；工作主要是等待 git 子进程
+DEFAULT_WORKERS = 8
+
+# 发现仓库时跳过的目录
+_SKIP_DIRS = {"node_modules", "__pycache__", "venv", ".venv", "target", "build", "dist"}
+
+
+def discover_repositories(workspace_dir: str, max_depth: int = 3) -> list[Path]:
+    """
+    在工作区内查找 git 仓库（含 `.git` 目录或文件的目录），不进入仓库内部继续查找。
+
+    Args:
+        workspace_dir: 工作区目录
+        max_depth: 最大查找深度（工作区本身为 0）
+
+    Returns:
+        按路径排序的仓库目录列表；工作区本身是仓库时也包含在内
+    """
+    root = Path(workspace_dir).resolve()
+    if not root.is_dir():
+        raise FileNotFoundError(f"工作区目录不存在: {root}")
+
+    repos = [root] if (root / ".git").exists() else []
+    pending = [(root, 0)]
+    while pending:
+        directory, depth = pending.pop()
+        if depth >= max_depth:
+            continue
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False) or entry.name.startswith(".") or entry.name in _SKIP_DIRS:
+                continue
+            path = Path(entry.path)
+            if (path / ".git").exists():
+                repos.append(path)
+            else:
+                pending.append((path, depth + 1))
+
+    return sorted(repos)
+
+
+def _update_repository(repo: Path, days: int | None) -> dict:
+    """更新单个仓库；异常被捕获并记录在结果中，不影响其他仓库"""
+    result = {"path": repo, "ok": False, "written": False, "commits": [], "error": None}
+    try:
+        # 线程池中的 span 没有父阶段，每个仓库单独成为一个顶层阶段
+        with span("workspace.repo", repo=repo.name):
+            # 与 `mnemos update` 走同一流程；只为已初始化的仓库写入短期记忆，未初始化的仓库只参与跨仓库统计
+            commits, _, result["written"] = _update_short_term(str(repo), days, create=False)
+            result["commits"] = commits
+            result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def _render_report(root: Path, results: list[dict], top: int) -> str:
+    """渲染跨仓库热点报告"""
+    churn = {}
+    for r in results:
+        name = r["path"].relative_to(root).as_posix() if r["path"] != root else "."
+        for c, filename, added, deleted in follow_renames(r["commits"]):
+            row = churn.setdefault((f"{name}/{filename}", c.get("date")), [0, 0, 0])
+            row[0] += 1
+            row[1] += added
+            row[2] += deleted
+    # 路径带仓库前缀，目录热点可以跨仓库比较
+    hotspots, hot_dirs = rank_hotspots(((path, day, *row) for (path, day), row in churn.items()), top)
+
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
+    lines = [
+        "# 工作区活动",
+        "",
+        f"*最后更新: {now}*",
+        "",
+        "## 跨仓库热点",
+        "",
+    ]
+    if not hotspots:
+        lines.append("暂无最近的提交记录。")
+    for filename, info in hotspots:
+        lines.append(format_hotspot(filename, info))
+    if hot_dirs:
+        lines += ["", "**热点目录**", ""]
+        lines += [format_hot_dir(dirname, info) for dirname, info in hot_dirs]
+
+    lines += ["", "## 仓库", ""]
+    for r in results:
+        name = r["path"].relative_to(root).as_posix() if r["path"] != root else "."
+        if r["ok"]:
+            lines.append(f"- `{name}`: {len(r['commits'])} 条提交")
+        else:
+            lines.append(f"- `{name}`: ✗ {r['error']}")
+    return "\n".join(lines) + "\n"
+
+
+def _report_path(root: Path) -> Path | None:
+    """
+    默认的报告位置 `<工作区>/.memory/workspace.md`。
+
+    工作区本身是未初始化的 git 仓库时不创建 `.memory/`（否则下次运行会把它当作已初始化的仓库，
+    写入短期记忆和缓存），返回 None。
+    """
+    memory_dir = get_memory_dir(str(root))
+    if (root / ".git").exists() and not memory_dir.exists():
+        return None
+    return memory_dir / "workspace.md"
+
+
+def update_workspace(workspace_dir: str, days: int = None, max_workers: int = None, top: int = 20, output: str = None) -> str:
+    """
+    并发更新工作区内所有仓库的短期记忆，并生成跨仓库热点报告。
+
+    单个仓库失败时记录错误并继续处理其余仓库。报告写入 output，默认 `<工作区>/.memory/workspace.md`；
+    工作区本身是未初始化的 git 仓库且未指定 output 时，报告直接附在返回的消息中。
+
+    Args:
+        workspace_dir: 工作区目录
+        days: 获取最近多少天的提交，默认使用各仓库自己的配置
+        max_workers: 最大并发数，默认 DEFAULT_WORKERS
+        top: 报告中列出的热点文件数
+        output: 报告写入的文件
+
+    Returns:
+        执行结果消息
+    """
+    root = Path(workspace_dir).resolve()
+    repos = discover_repositories(str(root))
+    if not repos:
+        raise FileNotFoundError(f"工作区中未找到 git 仓库: {root}")
+
+    with ThreadPoolExecutor(max_workers=min(max_workers or DEFAULT_WORKERS, len(repos))) as pool:
+        results = list(pool.map(lambda repo: _update_repository(repo, days), repos))
+
+    report = _render_report(root, results, top)
+    report_path = Path(output).resolve() if output else _report_path(root)
+    if report_path is not None:
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        write_document(report_path, report, "## ")
+
+    failed = [r for r in results if not r["ok"]]
+    written = sum(r["written"] for r in results)
+    output = [
+        f"工作区已更新: {len(repos)} 个仓库，{written} 个写入了短期记忆，"
+        f"共 {sum(len(r['commits']) for r in results)} 条提交。",
+    ]
+    if report_path is not None:
+        output.append(f"跨仓库热点报告: {report_path}")
+    if failed:
+        output.append("")
+        output.append(f"以下 {len(failed)} 个仓库更新失败:")
+        for r in failed:
+            output.append(f"  ✗ {r['path']}: {r['error']}")
+    if report_path is None:
+        output += ["", "工作区本身是未初始化的 git 仓库，报告未写入文件（可用 --output 指定）:", "", report.rstrip("\n")]
+    return "\n".join(output)
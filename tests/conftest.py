@@ -0,0 +1,41 @@
+import shutil
+import subprocess
+import sys
+import pytest
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="需要安装 git")
+# Python 3.11 以下没有 tomllib，load_config 忽略 .mnemos.toml 并使用默认配置
+requires_tomllib = pytest.mark.skipif(sys.version_info < (3, 11), reason="需要 tomllib（Python 3.11+）")
+
+
+def git(repo, *args):
+    """在 repo 中执行 git 命令，返回去掉首尾空白的 stdout"""
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit_file(repo, name, text, message, author=None):
+    """写入文件并提交；指定 author 时以该作者身份提交"""
+    path = repo / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    git(repo, "add", name)
+    identity = ["-c", f"user.name={author}", "-c", f"user.email={author.lower()}@example.com"] if author else []
+    git(repo, *identity, "commit", "-q", "-m", message)
+
+
+def make_repo(path, message="feat: first", name="a.py", text="a\n", initialized=True):
+    """创建一个含一条提交的真实 git 仓库；initialized 时带有 .memory 目录"""
+    path.mkdir(parents=True, exist_ok=True)
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "test@example.com")
+    git(path, "config", "user.name", "Test")
+    if initialized:
+        (path / ".memory").mkdir()
+    commit_file(path, name, text, message)
+    return path
+
+
+@pytest.fixture
+def git_repo(tmp_path):
+    """创建一个带有 .memory 目录的真实 git 仓库"""
+    return make_repo(tmp_path)
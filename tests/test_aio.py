@@ -0,0 +1,143 @@
+import asyncio
+import time
+from unittest.mock import patch
+from mnemos import aio
+from mnemos.git import get_recent_commits
+from conftest import commit_file, make_repo, requires_git
+
+
+@requires_git
+def test_aio_get_recent_commits_matches_sync(git_repo):
+    """异步版本与同步版本返回相同的提交，且共用同一个缓存"""
+    commit_file(git_repo, "b.py", "b\n", "fix: second")
+    commits = asyncio.run(aio.get_recent_commits(str(git_repo), days=30))
+    assert [c["message"] for c in commits] == ["fix: second", "feat: first"]
+
+    # 缓存已由异步版本同步，同步版本直接读取，不再启动 git log
+    with patch("mnemos.git._fetch_commits") as fetch:
+        assert get_recent_commits(str(git_repo), days=30) == commits
+        fetch.assert_not_called()
+
+
+@requires_git
+def test_aio_summarize_many_projects_concurrently(tmp_path):
+    """多个项目在同一个事件循环中并发更新"""
+    repos = [make_repo(tmp_path / f"repo{i}", f"feat: module {i}") for i in range(4)]
+
+    async def update_all():
+        return await asyncio.gather(*(aio.summarize_commits(str(r), days=30) for r in repos))
+
+    results = asyncio.run(update_all())
+    assert all("分析了 1 条提交" in r for r in results)
+    for i, repo in enumerate(repos):
+        memory = asyncio.run(aio.read_memory("short", project_path=str(repo)))
+        assert f"feat: module {i}" in memory
+
+
+@requires_git
+def test_aio_summarize_matches_sync(git_repo):
+    """异步版本与 `mnemos update` 写出相同的短期记忆"""
+    from mnemos.git import summarize_commits
+
+    commit_file(git_repo, "b.py", "b\n", "fix: second")
+    short_term = git_repo / ".memory" / "short_term.md"
+
+    def content():
+        return [line for line in short_term.read_text(encoding="utf-8").splitlines() if not line.startswith("*最后更新")]
+
+    message = summarize_commits(str(git_repo))
+    expected = content()
+    assert asyncio.run(aio.summarize_commits(str(git_repo))) == message
+    assert content() == expected
+
+
+@requires_git
+def test_aio_same_project_concurrently(git_repo):
+    """同一项目的并发调用不会在数据库写锁上阻塞事件循环，也不会重复写入"""
+    project = str(git_repo)
+
+    async def twice(func):
+        return await asyncio.gather(func(project, days=30), func(project, days=30))
+
+    start = time.perf_counter()
+    first, second = asyncio.run(twice(aio.get_recent_commits))
+    assert first == second and len(first) == 1
+
+    # 增量同步和变动索引同样如此
+    commit_file(git_repo, "a.py", "a\nb\n", "fix: second")
+    first, second = asyncio.run(twice(aio.get_recent_commits))
+    assert first == second == get_recent_commits(project, days=30)
+    assert [c["files"] for c in first] == [[(1, 0, "a.py")], [(1, 0, "a.py")]]
+    first, second = asyncio.run(twice(aio.get_hotspots))
+    assert first == second
+    assert first["hotspots"][0][1]["count"] == 2
+    assert time.perf_counter() - start < 5
+
+
+@requires_git
+def test_aio_iter_commits_early_close(git_repo):
+    """提前退出异步迭代时终止 git 子进程"""
+    for i in range(3):
+        commit_file(git_repo, "a.py", f"{i}\n", f"fix: change {i}")
+
+    async def first():
+        async for commit in aio.aiter_commits(str(git_repo), "2000-01-01", 100):
+            return commit
+
+    assert asyncio.run(first())["message"] == "fix: change 2"
+
+
+@requires_git
+def test_aio_memory_and_doctor(git_repo):
+    """读写、搜索和诊断的异步版本"""
+    (git_repo / ".memory" / "long_term.md").write_text("## 项目概述\n旧内容\n", encoding="utf-8")
+
+    async def run():
+        await aio.update_long_term_memory("项目概述", "异步写入的概述", project_path=str(git_repo))
+        return (
+            await aio.read_memory("long", project_path=str(git_repo)),
+            await aio.search_memory("异步写入", project_path=str(git_repo)),
+            await aio.run_doctor(str(git_repo)),
+        )
+
+    memory, search, report = asyncio.run(run())
+    assert "异步写入的概述" in memory
+    assert "异步写入" in search
+    assert "[✓] Git 环境正常" in report
+
+
+def test_aio_write_waits_for_lock_off_the_loop(tmp_path):
+    """其他线程或进程持有记忆文件锁时，异步写入在工作线程中等待，事件循环照常运行"""
+    import threading
+    from mnemos.document import lock_file
+
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    long_term = memory_dir / "long_term.md"
+    long_term.write_text("## 项目概述\n旧内容\n", encoding="utf-8")
+    locked, release = threading.Event(), threading.Event()
+
+    def hold():
+        with lock_file(long_term):
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    locked.wait(5)
+
+    async def run():
+        update = asyncio.create_task(aio.update_long_term_memory("项目概述", "新内容", project_path=str(tmp_path)))
+        start = time.perf_counter()
+        await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - start
+        pending = not update.done()
+        release.set()
+        await update
+        return elapsed, pending
+
+    threading.Timer(1.0, release.set).start()
+    elapsed, pending = asyncio.run(run())
+    holder.join()
+    assert elapsed < 0.5 and pending
+    assert "新内容" in long_term.read_text(encoding="utf-8")
@@ -0,0 +1,69 @@
+import datetime
+import gzip
+from unittest.mock import patch
+import pytest
+import mnemos.archive as archive
+from mnemos.archive import append_blocks, load_archived_blocks, load_manifest, get_archive_dir
+from mnemos.compress import extract_old_short_term, get_memory_stats
+from mnemos.search import search_memory
+
+def _days_ago(n):
+    return (datetime.date.today() - datetime.timedelta(days=n)).isoformat()
+
+@pytest.fixture
+def archive_project(tmp_path):
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text("## 项目概述\n概述\n", encoding="utf-8")
+    (memory_dir / "short_term.md").write_text(
+        "# 短期记忆\n\n## 最近活动\n\n"
+        f"### {_days_ago(0)}\n- 新的记录\n\n"
+        f"### {_days_ago(10)}\n- 修复了数据库连接 bug\n\n"
+        "### 2020-01-01\n- 很久以前的数据库迁移\n",
+        encoding="utf-8",
+    )
+    return tmp_path
+
+def test_extract_appends_to_archive(archive_project):
+    """旧日期块按月份追加到压缩分段，清单记录日期范围和统计"""
+    result = extract_old_short_term(3, str(archive_project))
+    assert "修复了数据库连接 bug" in result
+
+    manifest = load_manifest(str(archive_project))
+    assert manifest["totals"]["blocks"] == 2
+    assert manifest["totals"]["first"] == "2020-01-01"
+    assert manifest["totals"]["last"] == _days_ago(10)
+
+    segment = manifest["segments"]["2020-01"]
+    data = gzip.decompress((get_archive_dir(str(archive_project)) / segment["file"]).read_bytes())
+    assert data.decode("utf-8") == "### 2020-01-01\n- 很久以前的数据库迁移\n"
+
+    stats = get_memory_stats(str(archive_project))
+    assert stats["archive"]["exists"]
+    assert stats["archive"]["blocks"] == 2
+
+def test_append_is_multi_member(archive_project):
+    """同一分段的多次追加各自写入一个压缩帧，读取时依次解出"""
+    append_blocks([{"header": "2020-01-02", "text": "### 2020-01-02\n- 第一次"}], str(archive_project))
+    append_blocks([{"header": "2020-01-03", "text": "### 2020-01-03\n- 第二次\n"}], str(archive_project))
+
+    blocks = load_archived_blocks(project_path=str(archive_project))
+    assert [b["header"] for b in blocks] == ["2020-01-03", "2020-01-02"]
+    segment = load_manifest(str(archive_project))["segments"]["2020-01"]
+    assert segment["blocks"] == 2
+    assert (segment["first"], segment["last"]) == ("2020-01-02", "2020-01-03")
+
+def test_search_days_reaches_archive(archive_project):
+    """search --days 能检索归档，且只解压日期范围相交的分段"""
+    extract_old_short_term(3, str(archive_project))
+
+    with patch.object(archive, "_decompress", wraps=archive._decompress) as decompress:
+        result = search_memory("数据库", memory_type="short", days=30, project_path=str(archive_project))
+    assert "=== 归档记忆匹配 ===" in result
+    assert "修复了数据库连接 bug" in result
+    assert "数据库迁移" not in result
+    # 2020-01 分段与最近 30 天不相交，不会被解压
+    assert decompress.call_count == 1
+
+    # 不指定 days 时只搜索 short_term.md
+    assert "未在记忆中找到" in search_memory("数据库", memory_type="short", project_path=str(archive_project))
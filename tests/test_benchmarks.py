@@ -0,0 +1,48 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="需要安装 git")
+
+
+def run_bench(*args, cwd):
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    return subprocess.run([sys.executable, "-m", "benchmarks", *args], cwd=cwd, env=env, capture_output=True, text=True)
+
+
+@requires_git
+def test_benchmarks_smoke(tmp_path):
+    """小规模运行基准测试，输出可解析的 JSON 且覆盖全部操作"""
+    output = tmp_path / "result.json"
+    result = run_bench("--commits", "20", "--sizes", "2KB", "-r", "1", "--hotspot-rows", "3000",
+                       "-o", str(output), "--workdir", str(tmp_path), cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["schema"] == 1
+    names = {r["name"].split("[")[0] for r in report["results"]}
+    assert names == {
+        "get_recent_commits", "aggregate_activity", "summarize_commits", "get_hotspots", "read_commits",
+        "search_memory", "update_long_term_memory", "extract_old_short_term", "rank_hotspots",
+    }
+    assert all(r["median_s"] >= 0 for r in report["results"])
+
+
+def test_benchmarks_compare_detects_regression(tmp_path):
+    """--compare 在 median 超过阈值倍数时返回非零退出码"""
+    def report(seconds):
+        return {"results": [{"name": "search_memory[warm_index]", "params": {"size": "1MB"}, "median_s": seconds}]}
+
+    (tmp_path / "old.json").write_text(json.dumps(report(1.0)), encoding="utf-8")
+    (tmp_path / "new.json").write_text(json.dumps(report(1.5)), encoding="utf-8")
+
+    result = run_bench("--compare", "old.json", "new.json", cwd=tmp_path)
+    assert result.returncode == 1
+    assert "1.50x" in result.stdout
+    assert run_bench("--compare", "old.json", "old.json", cwd=tmp_path).returncode == 0
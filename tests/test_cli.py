@@ -1,3 +1,4 @@
+import io
 import pytest
 import sys
 from unittest.mock import patch
@@ -28,3 +29,18 @@ def test_cli_write_missing_args(capsys):
         with pytest.raises(SystemExit) as excinfo:
             main()
         assert excinfo.value.code != 0
+
+def test_cli_write_batch(tmp_path, capsys):
+    """验证 write --batch 从 stdin 读取多 section Markdown"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text("## 项目概述\n旧概述\n\n## 架构决策\n旧决策\n", encoding="utf-8")
+
+    stdin = io.StringIO("## 项目概述\n新概述\n\n## 架构决策\n新决策\n")
+    with patch.object(sys, "argv", ["mnemos", "write", str(tmp_path), "--batch"]), patch.object(sys, "stdin", stdin):
+        main()
+    assert "批量更新 2 项" in capsys.readouterr().out
+
+    content = (memory_dir / "long_term.md").read_text(encoding="utf-8")
+    assert "新概述" in content and "新决策" in content
+    assert "旧概述" not in content and "旧决策" not in content
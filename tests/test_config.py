@@ -0,0 +1,65 @@
+import os
+import pytest
+from unittest.mock import patch
+from mnemos.config import DEFAULT_CONFIG, load_config, merge_config
+from mnemos.memory import update_long_term_memory
+from conftest import requires_tomllib
+
+
+def write_config(path, text):
+    (path / ".mnemos.toml").write_text(text, encoding="utf-8")
+
+
+@requires_tomllib
+def test_load_config_deep_merge(tmp_path):
+    """用户配置逐层合并到默认配置，未覆盖的键保留默认值"""
+    write_config(tmp_path, "[git]\ndays = 30\n\n[custom]\nkey = 'v'\n")
+    config = load_config(str(tmp_path))
+    assert config["git"]["days"] == 30
+    assert config["git"]["max_count"] == DEFAULT_CONFIG["git"]["max_count"]
+    assert config["custom"]["key"] == "v"
+    assert config["memory"]["valid_sections"] == tuple(DEFAULT_CONFIG["memory"]["valid_sections"])
+
+
+def test_load_config_is_immutable(tmp_path):
+    """返回的配置只读，不会污染默认配置或缓存"""
+    config = load_config(str(tmp_path))
+    with pytest.raises(TypeError):
+        config["git"]["days"] = 1
+    with pytest.raises(AttributeError):
+        config["memory"]["valid_sections"].append("x")
+
+    # merge_config 生成可修改的副本
+    modified = merge_config(config, {"git": {"days": 1}})
+    modified["memory"]["valid_sections"].append("x")
+    assert load_config(str(tmp_path))["git"]["days"] == DEFAULT_CONFIG["git"]["days"]
+    assert "x" not in DEFAULT_CONFIG["memory"]["valid_sections"]
+
+
+@requires_tomllib
+def test_load_config_cached_until_file_changes(tmp_path):
+    """配置文件未变化时不重新解析，修改后立即生效"""
+    write_config(tmp_path, "[git]\ndays = 30\n")
+    first = load_config(str(tmp_path))
+
+    with patch("tomllib.load") as load:
+        assert load_config(str(tmp_path)) is first
+        load.assert_not_called()
+
+    write_config(tmp_path, "[git]\ndays = 14\n")
+    stat = (tmp_path / ".mnemos.toml").stat()
+    os.utime(tmp_path / ".mnemos.toml", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_config(str(tmp_path))["git"]["days"] == 14
+
+
+def test_preloaded_config_is_not_reloaded(tmp_path):
+    """显式传入的配置直接使用，不再读取 .mnemos.toml"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text("## 自定义\n旧内容\n", encoding="utf-8")
+    config = merge_config(DEFAULT_CONFIG, {"memory": {"valid_sections": ["自定义"]}})
+
+    with patch("mnemos.memory.load_config") as load:
+        update_long_term_memory("自定义", "新内容", project_path=str(tmp_path), config=config)
+        load.assert_not_called()
+    assert "新内容" in (memory_dir / "long_term.md").read_text(encoding="utf-8")
@@ -0,0 +1,67 @@
+import pytest
+from mnemos.context import build_context, estimate_tokens
+
+@pytest.fixture
+def context_project(tmp_path):
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text(
+        "# 项目长期记忆\n\n"
+        "## 项目概述\nMnemos 是 AI Agent 的记忆系统。\n\n"
+        "## 架构决策\n使用 SQLite 缓存 git 历史。\n" + "细节说明。" * 200 + "\n\n"
+        "## 技术选型\n<!-- 使用的关键技术栈及选择理由 -->\n",
+        encoding="utf-8",
+    )
+    (memory_dir / "short_term.md").write_text(
+        "# 短期记忆\n\n## 核心变动区域\n\n- `mnemos/git.py` (3 次修改, +120/-40)\n\n## 最近活动\n\n"
+        "### 2026-10-18\n\n#### ✨ 功能\n- `aaaa1111` 新增上下文构建\n\n"
+        "### 2026-10-17\n\n#### 🐛 修复\n- `bbbb2222` 修复索引失效\n\n"
+        "### 2026-10-01\n\n#### 🐛 修复\n- `cccc3333` 修复数据库锁\n",
+        encoding="utf-8",
+    )
+    return tmp_path
+
+def test_estimate_tokens():
+    """中日韩字符按 1 token，其余按约 4 字符 1 token"""
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("记忆系统") == 4
+    assert estimate_tokens("a" * 40) == 10
+
+def test_context_fits_budget(context_project):
+    """小预算下跳过放不下的大块，继续放入更小的块，且不超出预算"""
+    result = build_context(200, project_path=str(context_project))
+    assert estimate_tokens(result) <= 200
+    assert "## 项目概述" in result
+    assert "## 核心变动区域" in result
+    assert "### 2026-10-18" in result
+    # 超大的 section 和只有模板注释的 section 都不进入上下文
+    assert "## 架构决策" not in result
+    assert "## 技术选型" not in result
+    assert "省略了" in result
+
+def test_context_query_boosts_hits(context_project):
+    """查询命中的旧日期块优先于更新但无关的日期块"""
+    result = build_context(200, query="数据库", project_path=str(context_project))
+    assert "### 2026-10-01" in result
+    assert "修复数据库锁" in result
+
+def test_context_sections(context_project):
+    """指定 sections 时只考虑这些长期记忆 section"""
+    result = build_context(5000, sections=["项目概述"], project_path=str(context_project))
+    assert "## 项目概述" in result
+    assert "## 架构决策" not in result
+    with pytest.raises(ValueError, match="未找到 section"):
+        build_context(5000, sections=["不存在"], project_path=str(context_project))
+
+def test_context_small_budget(tmp_path):
+    """预算只比内容略大时仍放入内容；任何预算下输出（包括提示信息）都不超出预算"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text("## 项目概述\nMnemos 是记忆系统。\n\n## 架构决策\n使用 SQLite 缓存。\n", encoding="utf-8")
+    (memory_dir / "short_term.md").write_text("### 2026-10-18\n- 修复索引失效\n", encoding="utf-8")
+
+    result = build_context(60, project_path=str(tmp_path))
+    assert "## 项目概述" in result and "## 架构决策" in result and "修复索引失效" in result
+    for budget in range(1, 120):
+        assert estimate_tokens(build_context(budget, project_path=str(tmp_path))) <= budget
+        assert estimate_tokens(build_context(budget, query="缓存", project_path=str(tmp_path))) <= budget
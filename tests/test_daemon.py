@@ -0,0 +1,111 @@
+import socket
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from mnemos.daemon import get_socket_path, request, serve
+
+requires_unix_socket = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="需要 Unix domain socket")
+
+@pytest.fixture
+def daemon_project(tmp_path):
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text("## 架构决策\n使用 SQLite 数据库。\n", encoding="utf-8")
+    (memory_dir / "short_term.md").write_text("### 2026-02-06\n- 修复了数据库连接 bug。\n", encoding="utf-8")
+    return tmp_path
+
+def test_request_without_daemon(daemon_project):
+    """没有守护进程时 request 返回 None，由调用方回退为本地执行"""
+    assert request("show", str(daemon_project)) is None
+
+@requires_unix_socket
+def test_serve_forwards_commands(daemon_project):
+    """守护进程执行命令的输出与本地执行一致，异常类型原样传回客户端"""
+    from mnemos.cli import execute
+
+    root = str(daemon_project)
+    thread = threading.Thread(target=serve, args=(root,), daemon=True)
+    thread.start()
+    socket_path = get_socket_path(root)
+    for _ in range(100):
+        if socket_path.exists():
+            break
+        time.sleep(0.05)
+
+    try:
+        assert request("ping", root) == "pong"
+        assert request("show", root, memory_type="long") == execute("show", root, memory_type="long")
+
+        result = request("search", root, queries=["数据库"], memory_type="all", days=None)
+        assert "=== 长期记忆匹配 ===" in result
+        assert "=== 短期记忆匹配 ===" in result
+
+        with pytest.raises(ValueError):
+            request("search", root, queries=["(未闭合"], memory_type="all", days=None)
+    finally:
+        request("shutdown", root)
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+
+@requires_unix_socket
+def test_request_not_retried_after_send(daemon_project):
+    """请求发出后守护进程退出时抛出异常，不回退为本地执行（避免追加写入执行两次）"""
+    from mnemos.cli import _run
+
+    socket_path = get_socket_path(str(daemon_project))
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    received = []
+
+    def crash_after_read(server):
+        for _ in range(2):
+            conn, _ = server.accept()
+            with conn:
+                received.append(conn.recv(65536))
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(socket_path))
+        server.listen()
+        thread = threading.Thread(target=crash_after_read, args=(server,), daemon=True)
+        thread.start()
+        with pytest.raises(RuntimeError, match="命令可能已经执行"):
+            request("show", str(daemon_project))
+        with patch("mnemos.cli.execute") as execute, pytest.raises(RuntimeError):
+            _run("write", str(daemon_project), section="项目概述", content="追加", mode="append")
+        execute.assert_not_called()
+        thread.join(timeout=5)
+    assert len(received) == 2
+
+    # 残留的 socket 文件（无人监听）仍回退为本地执行
+    assert request("show", str(daemon_project)) is None
+
+def test_long_socket_path_prefers_runtime_dir(tmp_path, monkeypatch):
+    """路径过长时 socket 放到 $XDG_RUNTIME_DIR，没有时放到按用户区分的临时目录"""
+    project = tmp_path / ("p" * 120)
+    runtime_dir = tmp_path / "run"
+    runtime_dir.mkdir()
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(runtime_dir))
+    assert get_socket_path(str(project)).parent == runtime_dir
+
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    path = get_socket_path(str(project))
+    assert path.parent.name.startswith("mnemos-")
+    assert path.parent != runtime_dir
+
+@requires_unix_socket
+def test_request_ignores_foreign_socket(daemon_project):
+    """socket 不属于当前用户时不连接，serve 也拒绝启动"""
+    socket_path = get_socket_path(str(daemon_project))
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(socket_path))
+        server.listen()
+        foreign_uid = socket_path.stat().st_uid + 1
+        with patch("mnemos.daemon.os.getuid", return_value=foreign_uid), \
+                patch("mnemos.daemon.socket.socket") as connect:
+            assert request("show", str(daemon_project)) is None
+            connect.assert_not_called()
+            with pytest.raises(RuntimeError, match="其他用户"):
+                serve(str(daemon_project))
@@ -0,0 +1,134 @@
+import datetime
+import threading
+from unittest.mock import patch
+import pytest
+from mnemos.document import parse_document, load_document, write_document, update_document, get_file_stats
+from mnemos.memory import read_long_term, update_long_term_memory
+from mnemos.compress import extract_old_short_term
+
+LONG_TERM = "# 项目长期记忆\n\n## 架构决策\n使用 SQLite。\n\n## 架构决策补充\n其他内容\n"
+
+def test_parse_document_blocks():
+    """块带有行号、偏移和内容哈希，偏移可以精确还原原文"""
+    doc = parse_document(LONG_TERM, "## ")
+    assert [b["header"] for b in doc.blocks] == ["Header", "架构决策", "架构决策补充"]
+
+    block = doc.section("架构决策")
+    assert block["start"] == 3
+    assert block["line"] == 4
+    assert block["lines"] == ["使用 SQLite。", ""]
+    assert doc.raw(block) == "## 架构决策\n使用 SQLite。\n\n"
+    assert doc.text[block["body_offset"]:block["end_offset"]] == "使用 SQLite。\n\n"
+    assert "".join(doc.raw(b) for b in doc.blocks) == LONG_TERM
+
+    # 内容相同的块哈希相同，与所在位置无关
+    moved = parse_document("## 架构决策\n使用 SQLite。\n\n", "## ")
+    assert moved.section("架构决策")["hash"] == block["hash"]
+
+def test_section_lookup_is_exact(tmp_path):
+    """section 按名称精确匹配，读写两侧规则一致"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text(LONG_TERM.replace("架构决策补充", "架构决策 (旧)"), encoding="utf-8")
+
+    with pytest.raises(ValueError, match="未找到 section"):
+        read_long_term(section="架构", project_path=str(tmp_path))
+
+    update_long_term_memory("架构决策", "改用 PostgreSQL。", project_path=str(tmp_path))
+    assert "改用 PostgreSQL。" in read_long_term(section="架构决策", project_path=str(tmp_path))
+    assert read_long_term(section="架构决策 (旧)", project_path=str(tmp_path)) == "## 架构决策 (旧)\n其他内容"
+
+def test_load_document_cache(tmp_path):
+    """文件未变化时复用解析结果，写入后立即可见"""
+    path = tmp_path / "long_term.md"
+    path.write_text(LONG_TERM, encoding="utf-8")
+
+    doc = load_document(path, "## ")
+    assert load_document(path, "## ") is doc
+
+    # 同样大小的改写也不会读到旧缓存
+    new = write_document(path, LONG_TERM.replace("SQLite", "DuckDB"), "## ")
+    assert load_document(path, "## ") is new
+    assert "DuckDB" in new.section("架构决策")["lines"][0]
+
+def test_extract_old_short_term_keeps_header(tmp_path):
+    """旧日期块被移出，header 部分原样保留且不会重复"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    today = datetime.date.today().isoformat()
+    header = "# 短期记忆\n\n## 最近活动\n\n"
+    (memory_dir / "short_term.md").write_text(
+        f"{header}### {today}\n- 新的记录\n\n### 2020-01-01\n- 旧的记录\n", encoding="utf-8"
+    )
+
+    result = extract_old_short_term(3, str(tmp_path))
+    assert result.endswith("### 2020-01-01\n- 旧的记录")
+    assert (memory_dir / "short_term.md").read_text(encoding="utf-8") == f"{header}### {today}\n- 新的记录\n\n"
+
+def test_update_document_retries_on_conflict(tmp_path):
+    """计算期间文件被其他写入者替换时，基于新内容重试而不是覆盖对方"""
+    path = tmp_path / "long_term.md"
+    path.write_text(LONG_TERM, encoding="utf-8")
+    calls = []
+
+    def edit(doc):
+        calls.append(doc.text)
+        if len(calls) == 1:
+            # 模拟另一个 agent 在此刻完成了对其他 section 的写入
+            write_document(path, doc.text.replace("其他内容", "并发写入"), "## ")
+        return doc.text.replace("SQLite", "DuckDB")
+
+    result = update_document(path, "## ", edit)
+    assert len(calls) == 2
+    assert "DuckDB" in result.text and "并发写入" in result.text
+    assert path.read_text(encoding="utf-8") == result.text
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
+
+def test_concurrent_section_updates(tmp_path):
+    """多个写入者并发追加不同 section，所有更新都被保留"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    sections = ["项目概述", "架构决策", "代码风格与约定", "技术选型"]
+    (memory_dir / "long_term.md").write_text(
+        "# 项目长期记忆\n\n" + "".join(f"## {s}\n\n" for s in sections), encoding="utf-8"
+    )
+
+    def worker(section):
+        for i in range(5):
+            update_long_term_memory(section, f"{section}-{i}", mode="append", project_path=str(tmp_path))
+
+    threads = [threading.Thread(target=worker, args=(s,)) for s in sections]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for section in sections:
+        body = read_long_term(section=section, project_path=str(tmp_path))
+        assert all(f"{section}-{i}" in body for i in range(5))
+
+def test_file_stats_sidecar(tmp_path):
+    """写入方维护的 sidecar 元数据在文件未变化时直接使用，外部修改后回退为计数"""
+    path = tmp_path / "short_term.md"
+    write_document(path, "# 短期记忆\n\n### 2026-10-18\n- a\n### 2026-10-17\n- b", "### ")
+
+    with patch("mnemos.document._count_file") as count_file:
+        stats = get_file_stats(path, "### ")
+    count_file.assert_not_called()
+    assert stats == {"lines": 6, "bytes": path.stat().st_size, "blocks": 2}
+
+    # 外部编辑器直接改写文件
+    text = "### 2026-10-19\n- c\n" + path.read_text(encoding="utf-8") + "\n"
+    path.write_text(text, encoding="utf-8")
+    assert get_file_stats(path, "### ") == {"lines": len(text.splitlines()), "bytes": len(text.encode("utf-8")), "blocks": 3}
+
+def test_file_stats_chunk_boundary(tmp_path):
+    """分块计数时跨越块边界的标题只统计一次"""
+    path = tmp_path / "short_term.md"
+    text = "".join(f"### 2026-10-{i:02d}\n- 记录 {i}\n" for i in range(1, 29))
+    path.write_text(text, encoding="utf-8")
+
+    for chunk in (1, 3, 7, 64):
+        with patch("mnemos.document._COUNT_CHUNK", chunk):
+            (tmp_path / ".cache" / "short_term.md.meta.json").unlink(missing_ok=True)
+            assert get_file_stats(path, "### ") == {"lines": 56, "bytes": len(text.encode("utf-8")), "blocks": 28}
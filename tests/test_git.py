@@ -1,7 +1,26 @@
+import io
 import pytest
+import sqlite3
+import subprocess
+from contextlib import closing
 from unittest.mock import patch, MagicMock
 from pathlib import Path
-from mnemos.git import get_recent_commits, summarize_commits, parse_commit_type
+from mnemos import git as mnemos_git
+from mnemos.store import get_store_path
+from mnemos.git import (
+    get_recent_commits,
+    iter_recent_commits,
+    aggregate_activity,
+    summarize_commits,
+    parse_commit_type,
+    compile_ignore_matcher,
+    split_trailers,
+    truncate_body,
+)
+from mnemos.config import DEFAULT_CONFIG, merge_config
+from conftest import commit_file, git, requires_git, requires_tomllib
+
+
 
 def test_parse_commit_type():
     assert parse_commit_type("feat: add something") == "feat"
@@ -9,32 +28,111 @@ def test_parse_commit_type():
     assert parse_commit_type("chore!: important杂务") == "chore"
     assert parse_commit_type("Merge branch...") == "other"
 
-def test_get_recent_commits_mocked():
-    # 模拟 git log --numstat 的输出
-    # 格式: hash||date||message \n added deleted filename
+def test_get_recent_commits_mocked(tmp_path):
+    # 模拟 git log -z --numstat 的输出
+    # 格式: \x1ehash\0parents\0date\0author\0timestamp\0message\0body\0 \n added\tdeleted\tfilename\0 ...
     mock_output = (
-        "hash1||2026-02-01||feat: first commit\n"
-        "10\t5\tfile1.py\n"
-        "hash2||2026-02-02||fix: second commit\n"
-        "1\t1\tfile2.py\n"
-        "0\t0\timage.png\n"
+        b"\x1ehash1\x00hash2\x002026-02-01\x00Alice\x001769904000\x00feat: first commit\x00\x00\n"
+        b"10\t5\tfile1.py\x00\x00"
+        b"\x1ehash2\x00\x002026-02-02\x00Bob\x001769990400\x00fix: second commit\x00"
+        b"Why: the old path leaked.\n\nFixes: #7\nCo-authored-by: Carol <c@example.com>\n\x00\n"
+        b"1\t1\tfile2.py\x00"
+        b"0\t0\timage.png\x00"
     )
     
-    with patch("subprocess.run") as mock_run:
-        mock_run.return_value = MagicMock(
-            returncode=0,
-            stdout=mock_output
+    with patch("subprocess.Popen") as mock_popen:
+        mock_popen.return_value = MagicMock(
+            stdout=io.BytesIO(mock_output)
         )
         
-        commits = get_recent_commits(days=7)
+        commits = get_recent_commits(str(tmp_path), days=7)
         
         assert len(commits) == 2
         assert commits[0]["type"] == "feat"
+        assert commits[0]["author"] == "Alice"
         assert len(commits[0]["files"]) == 1
         assert commits[0]["files"][0] == (10, 5, "file1.py")
         
         assert commits[1]["type"] == "fix"
         assert len(commits[1]["files"]) == 2
+        assert commits[1]["timestamp"] == 1769990400
+        assert commits[1]["body"] == "Why: the old path leaked."
+        assert commits[1]["trailers"] == [("Fixes", "#7"), ("Co-authored-by", "Carol <c@example.com>")]
+
+def test_parse_log_output_edge_cases():
+    raw = (
+        b"\x1eh1\x00h2\x002026-02-03\x00Alice\x001770076800\x00no separator here\x00\x00\n"
+        b"-\t-\tlogo.png\x00"
+        b"3\t1\t\x00src/old.py\x00src/new.py\x00"
+        b"2\t0\tweird||name.txt\x00\x00"
+        b"\x1eh2\x00\x002026-02-02\x00Bob\x001769990400\x00docs: a || b\x00see http://example.com\n\x00"
+    )
+    # 任意切分字节块都应得到相同结果
+    parser = mnemos_git._LogParser()
+    commits = []
+    for i in range(0, len(raw), 7):
+        commits.extend(parser.feed(raw[i:i + 7]))
+    commits.extend(parser.close())
+
+    assert commits == mnemos_git._parse_log_output(raw)
+    assert commits[0]["message"] == "no separator here"
+    assert commits[0]["files"] == [
+        (0, 0, "logo.png"),
+        (3, 1, "src/new.py"),
+        (2, 0, "weird||name.txt"),
+    ]
+    assert commits[0]["renames"] == [("src/old.py", "src/new.py")]
+    assert commits[1]["message"] == "docs: a || b"
+    assert commits[1]["files"] == []
+    # URL 不是 trailer
+    assert commits[1]["body"] == "see http://example.com"
+    assert commits[1]["trailers"] == []
+    parser = mnemos_git._LogParser()
+    assert [c for b in range(len(raw)) for c in parser.feed(raw[b:b + 1])] + parser.close() == commits
+
+def test_parse_large_record_linear():
+    """单条记录很大时按小块喂入也是线性的，不会每块都重新拼接、查找整条记录"""
+    import time
+
+    files = b"".join(b"1\t1\tsrc/f%d.py\x00" % i for i in range(1000))
+    raw = b"\x1eh1\x00\x002026-02-03\x00Alice\x001770076800\x00big\x00" + b"x" * (8 << 20) + b"\x00\n" + files
+    parser = mnemos_git._LogParser(body_max_chars=10)
+    start = time.perf_counter()
+    commits = [c for i in range(0, len(raw), 4096) for c in parser.feed(raw[i:i + 4096])] + parser.close()
+    # 逐块重新拼接整条记录需要数秒
+    assert time.perf_counter() - start < 2
+    assert len(commits) == 1 and len(commits[0]["files"]) == 1000
+
+def test_split_trailers_and_truncate():
+    body, trailers = split_trailers("改动原因。\n\n第二段。\n\nRefs: #1\nReviewed-by: A\n  continued\n")
+    assert body == "改动原因。\n\n第二段。"
+    assert trailers == [("Refs", "#1"), ("Reviewed-by", "A continued")]
+    assert split_trailers("Note: 只有一段说明，\n而且第二行不是 trailer") == ("Note: 只有一段说明，\n而且第二行不是 trailer", [])
+    assert truncate_body("abcdef", 3) == "abc…"
+    assert truncate_body("abc", 3) == "abc"
+    assert truncate_body("abc", 0) == ""
+
+def test_compile_ignore_matcher():
+    ignore = compile_ignore_matcher(("*.lock", "package-lock.json", "docs/**/*.md", "gen/*.py"))
+    assert ignore("Cargo.lock")
+    assert ignore("sub/dir/poetry.lock")
+    assert ignore("web/package-lock.json")
+    assert ignore("docs/a/b/c.md")
+    assert ignore("gen/x.py")
+    assert not ignore("gen/sub/x.py")
+    assert not ignore("my-package-lock.json")
+    assert not ignore("src/lock.py")
+    assert compile_ignore_matcher(()) is None
+
+def test_aggregate_activity_lazy():
+    def gen():
+        yield {"type": "feat", "files": [(1, 0, "a.py")]}
+        yield {"type": "fix", "files": [(2, 1, "a.py"), (3, 0, "b.py")]}
+
+    stats = aggregate_activity(gen())
+    assert stats["total_commits"] == 2
+    assert stats["type_distribution"] == {"feat": 1, "fix": 1}
+    assert stats["hotspots"][0] == ("a.py", {"count": 2, "added": 3, "deleted": 1})
 
 def test_summarize_commits_success(tmp_path):
     # 模拟一个 git 仓库环境
@@ -63,3 +161,182 @@ def test_summarize_commits_success(tmp_path):
         assert "main.py" in content
         assert "✨ 功能" in content
         assert "abc1234" in content
+
+
+@requires_git
+def test_get_recent_commits_incremental(git_repo):
+    commits = get_recent_commits(str(git_repo), days=7)
+    assert [c["message"] for c in commits] == ["feat: first"]
+    assert get_store_path(str(git_repo)).exists()
+
+    commit_file(git_repo, "b.py", "b\n", "fix: second")
+
+    with patch("mnemos.git._fetch_commits", wraps=mnemos_git._fetch_commits) as fetch:
+        commits = get_recent_commits(str(git_repo), days=7)
+        # 只拉取了 <last>..HEAD 区间
+        assert fetch.call_count == 1
+        assert ".." in fetch.call_args.args[3]
+
+    assert [c["message"] for c in commits] == ["fix: second", "feat: first"]
+    assert commits[0]["files"] == [(1, 0, "b.py")]
+
+
+@requires_git
+def test_cache_dir_ignores_itself(git_repo):
+    """缓存目录自带 .gitignore，不依赖 init 模板也不会出现在 git status 中"""
+    from mnemos.search import search_memory
+
+    (git_repo / ".memory" / "long_term.md").write_text("## 项目概述\n缓存测试\n", encoding="utf-8")
+    get_recent_commits(str(git_repo), days=7)
+    search_memory("缓存", project_path=str(git_repo))
+    assert (git_repo / ".memory" / ".cache" / ".gitignore").read_text(encoding="utf-8") == "*\n"
+    status = git(git_repo, "status", "--porcelain", "--untracked-files=all").splitlines()
+    assert status == ["?? .memory/long_term.md"]
+
+
+@requires_git
+def test_get_recent_commits_after_rewrite(git_repo):
+    commit_file(git_repo, "b.py", "b\n", "fix: second")
+    get_recent_commits(str(git_repo), days=7)
+
+    # 改写历史后缓存的 HEAD 不再是祖先，应回退为全量扫描
+    git(git_repo, "commit", "-q", "--amend", "-m", "fix: rewritten")
+    commits = get_recent_commits(str(git_repo), days=7)
+    assert [c["message"] for c in commits] == ["fix: rewritten", "feat: first"]
+
+
+@requires_git
+def test_store_keeps_only_window(git_repo):
+    """增量写入后裁掉配置窗口之外的提交"""
+    config = merge_config(DEFAULT_CONFIG, {"git": {"max_count": 3}})
+    for i in range(20):
+        commit_file(git_repo, "a.py", f"{i}\n", f"fix: change {i}")
+        commits = get_recent_commits(str(git_repo), days=7, config=config)
+    assert [c["message"] for c in commits] == ["fix: change 19", "fix: change 18", "fix: change 17"]
+    with closing(sqlite3.connect(get_store_path(str(git_repo)))) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM commits").fetchone()[0] == 3
+        assert conn.execute("SELECT COUNT(*) FROM file_changes").fetchone()[0] == 3
+    assert get_recent_commits(str(git_repo), days=7, max_count=10) == get_recent_commits(str(git_repo), days=7, max_count=10, use_cache=False)
+
+
+@requires_git
+def test_narrow_request_keeps_cached_window(git_repo):
+    """窄窗口的请求不会把缓存裁小，之后按默认窗口读取不再启动 git"""
+    for i in range(5):
+        commit_file(git_repo, "a.py", f"{i}\n", f"fix: change {i}")
+    default = get_recent_commits(str(git_repo))
+    assert len(default) == 6
+
+    for new in (1, 3):
+        for i in range(new):
+            commit_file(git_repo, "b.py", f"{new}-{i}\n", f"feat: more {new}-{i}")
+        assert len(get_recent_commits(str(git_repo), max_count=2)) == 2
+        with patch("subprocess.Popen", wraps=subprocess.Popen) as popen, \
+                patch("subprocess.run", wraps=subprocess.run) as run:
+            for _ in range(2):
+                default = get_recent_commits(str(git_repo))
+                get_recent_commits(str(git_repo), days=1, max_count=2)
+            assert popen.call_count == 0 and run.call_count == 0
+        assert default == get_recent_commits(str(git_repo), use_cache=False)
+
+
+@requires_git
+def test_store_matches_git_after_merge(git_repo):
+    """合并旁支后缓存的顺序与 git log 一致"""
+    git(git_repo, "checkout", "-q", "-b", "side")
+    for i in range(3):
+        commit_file(git_repo, f"side{i}.py", "s\n", f"feat: side {i}")
+    git(git_repo, "checkout", "-q", "-")
+    for i in range(3):
+        commit_file(git_repo, f"main{i}.py", "m\n", f"feat: main {i}")
+        get_recent_commits(str(git_repo), days=7)
+    git(git_repo, "merge", "-q", "--no-ff", "-m", "chore: merge side", "side")
+    commit_file(git_repo, "after.py", "a\n", "fix: after merge")
+
+    for max_count in (2, 5, 8, 50):
+        assert get_recent_commits(str(git_repo), days=7) == get_recent_commits(str(git_repo), days=7, use_cache=False)
+        cached = get_recent_commits(str(git_repo), days=7, max_count=max_count)
+        assert cached == get_recent_commits(str(git_repo), days=7, max_count=max_count, use_cache=False)
+
+
+@requires_git
+def test_iter_recent_commits_streaming(git_repo):
+    commit_file(git_repo, "b.py", "b\n", "fix: second")
+    stream = iter_recent_commits(str(git_repo), days=7)
+    first = next(stream)
+    assert first["message"] == "fix: second"
+    # 提前关闭生成器应终止 git 子进程
+    stream.close()
+
+
+@requires_git
+@requires_tomllib
+def test_get_recent_commits_ignore_files(git_repo):
+    (git_repo / ".mnemos.toml").write_text('[git]\nignore_files = ["*.lock"]\n', encoding="utf-8")
+    (git_repo / "deps.lock").write_text("x\n", encoding="utf-8")
+    commit_file(git_repo, "b.py", "b\n", "chore: deps")
+    commit_file(git_repo, "deps.lock", "y\n", "chore: lock only")
+
+    commits = get_recent_commits(str(git_repo), days=7)
+    assert [c["message"] for c in commits] == ["chore: lock only", "chore: deps", "feat: first"]
+    assert all(f[2] != "deps.lock" for c in commits for f in c["files"])
+
+    # 下推到 git 后，只改动被忽略文件的提交不再出现
+    (git_repo / ".mnemos.toml").write_text(
+        '[git]\nignore_files = ["*.lock"]\nexclude_in_git = true\n', encoding="utf-8"
+    )
+    commits = get_recent_commits(str(git_repo), days=7)
+    assert [c["message"] for c in commits] == ["chore: deps", "feat: first"]
+
+
+@requires_git
+def test_read_head_without_subprocess(git_repo):
+    expected = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=git_repo, capture_output=True, text=True
+    ).stdout.strip()
+    assert mnemos_git.read_head(str(git_repo)) == expected
+
+    # 打包后的 ref 也能解析
+    git(git_repo, "pack-refs", "--all")
+    assert mnemos_git.read_head(str(git_repo)) == expected
+
+
+@requires_git
+def test_store_serves_repeated_queries_without_git(git_repo):
+    commit_file(git_repo, "a.py", "a\nb\n", "fix: second")
+    commits = get_recent_commits(str(git_repo), days=7)
+
+    with patch("subprocess.run") as mock_run, patch("subprocess.Popen") as mock_popen:
+        again = get_recent_commits(str(git_repo), days=5, max_count=10)
+        assert not mock_run.called and not mock_popen.called
+    assert again == commits
+
+    # SQL 聚合结果与内存聚合一致
+    _, stats = mnemos_git._collect_activity(str(git_repo), 7)
+    assert stats == aggregate_activity(commits)
+    assert stats["hotspots"][0] == ("a.py", {"count": 2, "added": 2, "deleted": 0})
+
+
+@requires_git
+def test_commit_bodies_and_trailers(git_repo):
+    """正文和 trailer 在同一次 git log 中取得，经缓存读回不变，并写入短期记忆"""
+    body = "旧实现在并发写入时会丢数据。" * 20
+    commit_file(git_repo, "b.py", "b\n", f"fix: lock writes\n\n{body}\n\nFixes: #42\nSigned-off-by: Test <test@example.com>")
+    config = merge_config(DEFAULT_CONFIG, {"git": {"body_max_chars": 30}})
+
+    commits = get_recent_commits(str(git_repo), days=7, use_cache=False, config=config)
+    assert commits[0]["body"] == body[:30] + "…"
+    assert commits[0]["trailers"] == [("Fixes", "#42"), ("Signed-off-by", "Test <test@example.com>")]
+    assert commits[0]["timestamp"] > 0
+    assert commits[0]["author"] is commits[1]["author"]
+
+    assert get_recent_commits(str(git_repo), days=7, config=config) == commits
+    # 截断长度变化时缓存重建
+    assert get_recent_commits(str(git_repo), days=7)[0]["body"] == body[:200] + "…"
+
+    summarize_commits(str(git_repo), config=config)
+    content = (git_repo / ".memory" / "short_term.md").read_text(encoding="utf-8")
+    assert f"  > {body[:30]}…" in content
+    assert "  > Fixes: #42" in content
+    assert "Signed-off-by" not in content
+
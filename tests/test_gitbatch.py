@@ -0,0 +1,107 @@
+import shutil
+import subprocess
+import pytest
+from unittest.mock import patch
+from mnemos import git as mnemos_git
+from mnemos.doctor import check_git
+from mnemos.gitbatch import GitBatch, get_batch, parse_commit, read_commits
+from conftest import commit_file, git, requires_git
+
+
+@pytest.fixture
+def git_repo(git_repo):
+    """在共享仓库上追加一条带正文和 trailer 的提交"""
+    commit_file(git_repo, "a.py", "print(2)\n", "fix: second\n\n修复输出。\n\nRefs: #12", author="Alice")
+    return git_repo
+
+
+@requires_git
+def test_batch_queries_share_one_process(git_repo):
+    """多次查询复用同一个 cat-file 进程"""
+    head = git(git_repo, "rev-parse", "HEAD")
+    with GitBatch(str(git_repo)) as batch, patch("subprocess.Popen", wraps=subprocess.Popen) as popen:
+        assert batch.info("HEAD") == (head, "commit", batch.info(head)[2])
+        assert batch.info_many(["HEAD:a.py", "HEAD:missing.py", "0" * 40])[1:] == [None, None]
+        assert batch.read("HEAD:a.py")[1:] == ("blob", b"print(2)\n")
+        assert batch.read("HEAD~1:a.py")[2] == b"a\n"
+        # --batch-check 和 --batch 各启动一次
+        assert popen.call_count == 2
+
+    # 关闭后再次查询会重新启动进程
+    assert batch.info("HEAD")[0] == head
+    batch.close()
+
+
+@requires_git
+def test_read_commits(git_repo):
+    head, parent = git(git_repo, "rev-parse", "HEAD", "HEAD~1").split()
+    commits = read_commits([head, parent, "HEAD:a.py"], str(git_repo))
+    assert commits[0]["parents"] == [parent]
+    assert commits[0]["author"] == "Alice"
+    assert commits[0]["author_email"] == "alice@example.com"
+    assert commits[0]["committer_time"] > 0
+    assert commits[0]["subject"] == "fix: second"
+    assert commits[0]["body"] == "修复输出。"
+    assert commits[0]["trailers"] == [("Refs", "#12")]
+    assert commits[1]["parents"] == [] and commits[1]["body"] == ""
+    assert commits[2] is None
+    assert get_batch(str(git_repo)) is get_batch(str(git_repo))
+
+
+@requires_git
+def test_batch_pipelines_many_requests(git_repo):
+    """超过一轮流水线的批量请求按顺序返回"""
+    head = git(git_repo, "rev-parse", "HEAD")
+    with GitBatch(str(git_repo)) as batch:
+        infos = batch.info_many(["HEAD", "HEAD:nope"] * 200)
+    assert len(infos) == 400
+    assert infos[0][0] == head and infos[1] is None and infos[398][0] == head
+
+
+@requires_git
+def test_batch_missing_path_with_spaces(git_repo):
+    """对象名含空格时 "<rev> missing" 仍返回 None，后续响应不会错位"""
+    commit_file(git_repo, "my notes.md", "笔记\n", "docs: notes")
+    with GitBatch(str(git_repo)) as batch:
+        infos = batch.info_many(["HEAD:no such", "HEAD:my notes.md", "HEAD:a b c", "HEAD"])
+        assert infos[0] is None and infos[2] is None
+        assert infos[1][1] == "blob" and infos[3][1] == "commit"
+        assert batch.read_many(["HEAD:no such", "HEAD:my notes.md"]) == [None, (infos[1][0], "blob", "笔记\n".encode())]
+
+
+def test_batch_errors(tmp_path):
+    with GitBatch(str(tmp_path)) as batch:
+        with pytest.raises(ValueError):
+            batch.info("HEAD\nHEAD")
+        if shutil.which("git"):
+            # 不是 git 仓库时 cat-file 立即退出
+            with pytest.raises(RuntimeError):
+                batch.info("HEAD")
+
+
+def test_parse_commit_skips_signature():
+    data = (
+        b"tree abc\nparent p1\nparent p2\n"
+        b"author Bob <bob@example.com> 1700000000 +0800\n"
+        b"committer Carol <carol@example.com> 1700000100 +0000\n"
+        b"gpgsig -----BEGIN PGP SIGNATURE-----\n xyz\n -----END PGP SIGNATURE-----\n"
+        b"\nmerge: branch\n"
+    )
+    commit = parse_commit("h", data)
+    assert commit["parents"] == ["p1", "p2"]
+    assert (commit["author"], commit["author_time"]) == ("Bob", 1700000000)
+    assert (commit["committer"], commit["committer_time"]) == ("Carol", 1700000100)
+    assert commit["subject"] == "merge: branch" and commit["body"] == ""
+
+
+@requires_git
+def test_resolve_head_fallback_and_doctor(git_repo, tmp_path_factory):
+    """HEAD 文件无法解析时回退到 cat-file；doctor 只启动一次 git"""
+    head = git(git_repo, "rev-parse", "HEAD")
+    with patch("mnemos.git.read_head", return_value=None):
+        assert mnemos_git._resolve_head(str(git_repo)) == head
+
+    with patch("subprocess.run", wraps=subprocess.run) as run:
+        assert check_git(str(git_repo))[0]
+        assert run.call_count == 1
+    assert not check_git(str(tmp_path_factory.mktemp("plain")))[0]
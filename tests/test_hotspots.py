@@ -0,0 +1,127 @@
+import shutil
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from mnemos import hotspots as mnemos_hotspots
+from mnemos.cli import main
+from mnemos import git as mnemos_git
+from mnemos.git import aggregate_activity, get_recent_commits, summarize_commits
+from mnemos.hotspots import get_hotspots
+from mnemos.store import get_store_path
+from conftest import commit_file, git, requires_git
+
+
+@pytest.fixture
+def churn_repo(tmp_path):
+    """三条提交、两位作者的仓库，带有 .memory 目录"""
+    git(tmp_path, "init", "-q")
+    (tmp_path / ".memory").mkdir()
+    commit_file(tmp_path, "src/a.py", "1\n", "feat: a", author="Alice")
+    commit_file(tmp_path, "src/a.py", "1\n2\n", "fix: a", author="Bob")
+    commit_file(tmp_path, "src/b.py", "1\n", "feat: b", author="Alice")
+    return tmp_path
+
+
+@requires_git
+def test_get_hotspots(churn_repo):
+    """按修改次数排序，并统计增删行数和作者数"""
+    hotspots = get_hotspots(str(churn_repo), days=90, top=5)["hotspots"]
+    assert hotspots[0] == ("src/a.py", {"count": 2, "added": 2, "deleted": 0, "authors": 2})
+    assert hotspots[1][0] == "src/b.py"
+    assert len(get_hotspots(str(churn_repo), days=90, top=1)["hotspots"]) == 1
+
+
+@requires_git
+def test_hotspots_incremental(churn_repo):
+    """HEAD 未变时不启动 git log，新提交只拉取 <last>..HEAD"""
+    get_hotspots(str(churn_repo), days=90)
+
+    with patch("mnemos.git._fetch_commits") as fetch:
+        get_hotspots(str(churn_repo), days=30)
+        fetch.assert_not_called()
+
+    commit_file(churn_repo, "src/b.py", "1\n2\n3\n", "fix: b", author="Carol")
+    with patch("mnemos.git._fetch_commits", wraps=mnemos_hotspots._fetch_commits) as fetch:
+        hotspots = dict(get_hotspots(str(churn_repo), days=90)["hotspots"])
+        assert fetch.call_count == 1
+        assert ".." in fetch.call_args.args[3]
+    assert hotspots["src/b.py"] == {"count": 2, "added": 3, "deleted": 0, "authors": 2}
+
+    # 请求的范围超出已覆盖的范围时全量重建
+    with patch("mnemos.git._fetch_commits", wraps=mnemos_hotspots._fetch_commits) as fetch:
+        assert dict(get_hotspots(str(churn_repo), days=365)["hotspots"]) == hotspots
+        assert ".." not in fetch.call_args.args[3]
+
+
+@requires_git
+def test_hotspots_without_memory_dir(churn_repo):
+    """未初始化的项目直接扫描 git 历史"""
+    shutil.rmtree(churn_repo / ".memory")
+    assert get_hotspots(str(churn_repo), days=90)["hotspots"][0][1]["authors"] == 2
+    assert not (churn_repo / ".memory").exists()
+
+
+@requires_git
+def test_summarize_uses_churn_index(churn_repo):
+    """短期记忆的核心变动区域来自变动索引，包含作者数"""
+    summarize_commits(str(churn_repo))
+    content = (churn_repo / ".memory" / "short_term.md").read_text(encoding="utf-8")
+    assert "*最近 30 天*" in content
+    assert "`src/a.py` (2 次修改, +2/-0, 2 位作者)" in content
+    assert "`src/` (2 个文件, 3 次修改, +3/-0)" in content
+
+
+@requires_git
+def test_summarize_single_git_log(churn_repo):
+    """提交缓存和变动索引停在同一个 HEAD 时，一条新提交只需一次 git log"""
+    summarize_commits(str(churn_repo))
+    commit_file(churn_repo, "src/b.py", "1\n2\n", "fix: b", author="Carol")
+    with patch("subprocess.Popen", wraps=subprocess.Popen) as popen, patch("subprocess.run", wraps=subprocess.run) as run:
+        summarize_commits(str(churn_repo))
+    assert popen.call_count == 1 and not run.called
+    assert ".." in popen.call_args.args[0][-1]
+
+    # 与全量重建的索引一致
+    hotspots = get_hotspots(str(churn_repo))
+    assert dict(hotspots["hotspots"])["src/b.py"] == {"count": 2, "added": 2, "deleted": 0, "authors": 2}
+    get_store_path(str(churn_repo)).unlink()
+    assert get_hotspots(str(churn_repo)) == hotspots
+
+
+@requires_git
+def test_cli_hotspots(churn_repo, capsys):
+    with patch.object(sys, "argv", ["mnemos", "hotspots", str(churn_repo), "--days", "90", "--top", "1"]):
+        main()
+    output = capsys.readouterr().out
+    assert "最近 90 天" in output
+    assert "src/a.py" in output and "src/b.py" not in output
+
+
+@requires_git
+def test_hotspots_follow_renames(churn_repo):
+    """重命名前后的变动归入同一个文件；增量更新时沿用已保存的路径映射"""
+    get_hotspots(str(churn_repo), days=90)
+
+    (churn_repo / "lib").mkdir()
+    git(churn_repo, "mv", "src/a.py", "lib/a2.py")
+    git(churn_repo, "-c", "user.name=Alice", "-c", "user.email=alice@example.com", "commit", "-q", "-m", "refactor: move a")
+    commit_file(churn_repo, "lib/a2.py", "1\n2\n3\n", "fix: a2", author="Alice")
+    # 旧路径上新建的是另一个文件
+    commit_file(churn_repo, "src/a.py", "new\n", "feat: new a", author="Alice")
+
+    with patch("mnemos.git._fetch_commits", wraps=mnemos_hotspots._fetch_commits) as fetch:
+        hotspots = dict(get_hotspots(str(churn_repo), days=90)["hotspots"])
+        assert ".." in fetch.call_args.args[3]
+    assert hotspots["lib/a2.py"] == {"count": 4, "added": 3, "deleted": 0, "authors": 2}
+    assert hotspots["src/a.py"]["count"] == 1
+
+    # 全量重建得到相同的结果
+    assert dict(get_hotspots(str(churn_repo), days=365)["hotspots"]) == hotspots
+
+    # 未初始化的项目、提交窗口的统计同样合并重命名
+    _, stats = mnemos_git._collect_activity(str(churn_repo), 7)
+    assert stats == aggregate_activity(get_recent_commits(str(churn_repo), days=7))
+    assert dict(stats["hotspots"])["lib/a2.py"]["count"] == 4
+    shutil.rmtree(churn_repo / ".memory")
+    assert get_hotspots(str(churn_repo), days=90)["hotspots"][0] == ("lib/a2.py", hotspots["lib/a2.py"])
@@ -0,0 +1,67 @@
+import pytest
+from contextlib import closing
+from mnemos.index import tokenize, split_blocks, open_index, refresh_index, score_blocks, term_blocks
+from mnemos.search import search_memory
+
+@pytest.fixture
+def index_project(tmp_path):
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text(
+        "# 项目长期记忆\n"
+        "## 项目概述\n提到一次缓存。\n"
+        "## 架构决策\n缓存使用 SQLite。\n缓存按 mtime 失效，缓存文件放在 .cache。\n",
+        encoding="utf-8",
+    )
+    (memory_dir / "short_term.md").write_text("### 2026-02-06\n- 修复缓存 bug。\n", encoding="utf-8")
+    return tmp_path
+
+def test_tokenize_cjk_ngrams():
+    assert tokenize("数据库 SQLite") == ["数", "据", "库", "数据", "据库", "sqlite"]
+    # 查询时多字串只用双字，单字保持原样
+    assert tokenize("数据库", query=True) == ["数据", "据库"]
+    assert tokenize("库", query=True) == ["库"]
+
+def test_split_blocks():
+    blocks = split_blocks("前言\n## A\na1\n## B\nb1\nb2", "## ")
+    assert [(b["header"], b["line"], b["lines"]) for b in blocks] == [
+        ("Header", 1, ["前言"]),
+        ("A", 3, ["a1"]),
+        ("B", 5, ["b1", "b2"]),
+    ]
+
+def test_term_blocks_and_bm25_ranking(index_project):
+    with closing(open_index(str(index_project))) as conn:
+        refresh_index(conn, str(index_project))
+        headers = dict(conn.execute("SELECT id, header FROM blocks"))
+        matched = term_blocks(conn, "缓存")
+        assert {headers[i] for i in matched} == {"项目概述", "架构决策", "2026-02-06"}
+        scores = score_blocks(conn, tokenize("缓存", query=True))
+        assert headers[max(scores, key=scores.get)] == "架构决策"
+        # 拉丁单词按子串匹配；没有可索引字符的词无法缩小范围
+        assert {headers[i] for i in term_blocks(conn, "sql")} == {"架构决策"}
+        assert {headers[i] for i in term_blocks(conn, "lite")} == {"架构决策"}
+        assert term_blocks(conn, "缓存 向量") == set()
+        assert term_blocks(conn, "++") is None
+
+def test_search_ranked_output(index_project):
+    result = search_memory("缓存", memory_type="long", project_path=str(index_project))
+    lines = result.splitlines()
+    assert lines[3].startswith("[架构决策] L5:")
+    assert lines[-1].startswith("[项目概述] L3:")
+
+def test_index_invalidated_on_change(index_project):
+    assert "未在记忆中找到" in search_memory("向量", project_path=str(index_project))
+    path = index_project / ".memory" / "long_term.md"
+    path.write_text(path.read_text(encoding="utf-8") + "引入向量检索。\n", encoding="utf-8")
+    assert "[架构决策] L7: 引入向量检索。" in search_memory("向量", project_path=str(index_project))
+
+def test_latin_terms_match_inside_words(tmp_path):
+    """拉丁查询词在单词中间出现时也能命中，与不使用索引时的子串语义一致"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text(
+        "## 项目概述\n调用 my_cache 模块。\n## 架构决策\n维护 CHANGELOG。\n", encoding="utf-8"
+    )
+    for term, section in (("cache", "项目概述"), ("_cache", "项目概述"), ("log", "架构决策")):
+        assert f"[{section}]" in search_memory(term, project_path=str(tmp_path))
@@ -5,7 +5,9 @@ from mnemos.memory import (
     get_memory_dir,
     read_short_term,
     read_long_term,
-    update_long_term_memory
+    update_long_term_memory,
+    update_long_term_sections,
+    parse_section_updates,
 )
 
 @pytest.fixture
@@ -86,4 +88,52 @@ def test_update_long_term_invalid_section(temp_project):
 def test_update_long_term_missing_file(tmp_path):
     # 没有 .memory 目录
     with pytest.raises(FileNotFoundError):
-        update_long_term_memory("项目概述", "内容", project_path=str(tmp_path))
\ No newline at end of file
+        update_long_term_memory("项目概述", "内容", project_path=str(tmp_path))
+
+def test_update_long_term_sections(temp_project):
+    """多个 section 在一次写入中更新，同一 section 的多项按顺序生效"""
+    result = update_long_term_sections([
+        {"section": "架构决策", "content": "新的架构"},
+        {"section": "项目概述", "content": "补充一", "mode": "append"},
+        {"section": "项目概述", "content": "补充二", "mode": "append"},
+    ], project_path=str(temp_project))
+    assert "批量更新 3 项" in result
+
+    overview = read_long_term(section="项目概述", project_path=str(temp_project))
+    assert overview.index("初始概述") < overview.index("补充一") < overview.index("补充二")
+    assert "新的架构" in read_long_term(section="架构决策", project_path=str(temp_project))
+
+def test_update_long_term_sections_all_or_nothing(temp_project):
+    """任意一项无效时整批都不写入"""
+    path = temp_project / ".memory" / "long_term.md"
+    before = path.read_text(encoding="utf-8")
+    with pytest.raises(ValueError, match="未找到 section"):
+        # 技术选型在配置中有效，但文件里没有这个 section
+        update_long_term_sections([
+            {"section": "项目概述", "content": "不应写入"},
+            {"section": "技术选型", "content": "内容"},
+        ], project_path=str(temp_project))
+    with pytest.raises(ValueError, match="无效的更新模式"):
+        update_long_term_sections([{"section": "项目概述", "content": "x", "mode": "prepend"}], project_path=str(temp_project))
+    assert path.read_text(encoding="utf-8") == before
+
+def test_parse_section_updates():
+    """批量输入支持 JSON 列表、JSON 对象和多 section Markdown"""
+    assert parse_section_updates('[{"section": "项目概述", "content": "a", "mode": "append"}]') == [
+        {"section": "项目概述", "content": "a", "mode": "append"}
+    ]
+    assert parse_section_updates('{"项目概述": "a"}', mode="append") == [
+        {"section": "项目概述", "content": "a", "mode": "append"}
+    ]
+    # -a 优先于各项自带的 mode
+    assert parse_section_updates('[{"section": "项目概述", "content": "a", "mode": "replace"}]', mode="append") == [
+        {"section": "项目概述", "content": "a", "mode": "append"}
+    ]
+    assert parse_section_updates("## 项目概述\n概述\n\n## 架构决策\n- 决策一\n- 决策二\n") == [
+        {"section": "项目概述", "content": "概述", "mode": "replace"},
+        {"section": "架构决策", "content": "- 决策一\n- 决策二", "mode": "replace"},
+    ]
+    with pytest.raises(ValueError):
+        parse_section_updates("没有标题的内容\n## 项目概述\n概述")
+    with pytest.raises(ValueError):
+        parse_section_updates('[{"section": "项目概述"}]')
@@ -0,0 +1,83 @@
+import datetime
+import pytest
+from mnemos.git import aggregate_activity
+from mnemos.scoring import follow_renames, rank_hotspots, scoring_options
+
+TODAY = datetime.date(2026, 3, 10)
+
+
+def day(offset):
+    return (TODAY - datetime.timedelta(days=offset)).isoformat()
+
+
+def test_recent_rewrite_outranks_old_churn():
+    """今天重写 3 次的文件排在六天前改了 10 次的文件前面"""
+    rows = [
+        ("old.py", day(6), 10, 50, 50),
+        ("new.py", day(0), 3, 400, 200),
+    ]
+    files, _ = rank_hotspots(rows, today=TODAY)
+    assert [path for path, _ in files] == ["new.py", "old.py"]
+    assert files[1][1] == {"count": 10, "added": 50, "deleted": 50}
+
+    # 不衰减、不计变动量时退化为按修改次数排序
+    files, _ = rank_hotspots(rows, half_life=0, churn_weight=0, today=TODAY)
+    assert [path for path, _ in files] == ["old.py", "new.py"]
+
+
+def test_churn_weight():
+    """修改次数相同时，改动行数多的文件在前"""
+    rows = [("small.py", day(1), 2, 2, 0), ("large.py", day(1), 2, 300, 100)]
+    files, _ = rank_hotspots(rows, today=TODAY)
+    assert files[0][0] == "large.py"
+
+
+def test_directory_rollups():
+    """分散在一个包中的多个文件汇总为热点目录，只有一个子项的目录不单独列出"""
+    rows = [(f"src/payments/m{i}.py", day(0), 1, 5, 0) for i in range(6)]
+    rows += [("src/core/big.py", day(0), 4, 10, 0), ("docs/guide/index.md", day(0), 1, 1, 0)]
+    files, dirs = rank_hotspots(rows, top=2, today=TODAY)
+    assert files[0][0] == "src/core/big.py"
+    assert dirs == [
+        ("src/", {"count": 10, "added": 40, "deleted": 0, "files": 7}),
+        ("src/payments/", {"count": 6, "added": 30, "deleted": 0, "files": 6}),
+    ]
+    _, dirs = rank_hotspots(rows, top=10, today=TODAY)
+    assert "docs/" not in dict(dirs) and "src/core/" not in dict(dirs)
+
+
+def test_ranking_independent_of_row_order():
+    rows = [(f"pkg{i % 3}/f{i}.py", day(i % 4), 1 + i % 2, i, 0) for i in range(30)]
+    assert rank_hotspots(rows, today=TODAY) == rank_hotspots(rows[::-1], today=TODAY)
+    assert rank_hotspots([], today=TODAY) == ([], [])
+
+
+def test_aggregate_activity_scores_by_day():
+    commits = [
+        {"type": "feat", "date": datetime.date.today().isoformat(), "files": [(100, 20, "a/new.py")]},
+        *({"type": "fix", "date": day(30), "files": [(1, 0, "a/old.py")]} for _ in range(3)),
+    ]
+    stats = aggregate_activity(commits)
+    assert stats["hotspots"][0] == ("a/new.py", {"count": 1, "added": 100, "deleted": 20})
+    assert stats["hot_dirs"] == [("a/", {"count": 4, "added": 103, "deleted": 20, "files": 2})]
+
+
+def test_scoring_options():
+    assert scoring_options({}) == {"half_life": 5, "churn_weight": 1.0}
+    assert scoring_options({"hotspots": {"half_life": 0}})["half_life"] == 0
+    with pytest.raises(ValueError):
+        scoring_options({"hotspots": {"churn_weight": -1}})
+
+
+def test_follow_renames():
+    """旧路径的历史归入最新路径；重命名之后在旧路径新建的文件不受影响"""
+    commits = [
+        {"files": [(1, 0, "a.py")], "renames": []},
+        {"files": [(2, 0, "c.py")], "renames": []},
+        {"files": [(0, 0, "c.py")], "renames": [("b.py", "c.py")]},
+        {"files": [(0, 0, "b.py")], "renames": [("a.py", "b.py")]},
+        {"files": [(5, 0, "a.py")], "renames": []},
+    ]
+    assert [(path, added) for _, path, added, _ in follow_renames(commits)] == [
+        ("a.py", 1), ("c.py", 2), ("c.py", 0), ("c.py", 0), ("c.py", 5),
+    ]
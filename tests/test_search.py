@@ -1,5 +1,8 @@
 import pytest
-from mnemos.search import search_memory
+from unittest.mock import patch
+from mnemos.index import load_blocks
+from mnemos.search import search_memory, query_memory
+from mnemos.query import parse_query
 
 @pytest.fixture
 def search_project(tmp_path):
@@ -33,4 +36,101 @@ def test_search_days_filter(search_project):
 
 def test_search_no_match(search_project):
     result = search_memory("不存在的词", project_path=str(search_project))
-    assert "未在记忆中找到" in result
\ No newline at end of file
+    assert "未在记忆中找到" in result
+
+@pytest.fixture
+def query_project(tmp_path):
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text(
+        "## 架构决策\n使用 SQLite 缓存。\n索引按 mtime 失效。\n## 技术选型\nSQLite 与 Redis。\n",
+        encoding="utf-8",
+    )
+    (memory_dir / "short_term.md").write_text(
+        "# 短期记忆\n\n## 最近活动\n\n"
+        "### 2026-10-02\n\n#### 🐛 修复\n- `aaaa1111` fix: 缓存失效 bug\n\n"
+        "#### ✨ 功能\n- `bbbb2222` feat: 新增缓存\n\n"
+        "### 2026-09-20\n\n#### 🐛 修复\n- `cccc3333` fix: 旧的缓存问题\n",
+        encoding="utf-8",
+    )
+    return tmp_path
+
+def test_parse_query_errors():
+    with pytest.raises(ValueError, match="无效的查询"):
+        parse_query("(缓存 OR")
+    with pytest.raises(ValueError, match="无效的查询"):
+        parse_query("/[/")
+
+def test_query_boolean_and_fields(query_project):
+    (long_and, long_not, section, typed, dated, regex) = query_memory(
+        [
+            "SQLite AND 索引",
+            "SQLite -Redis",
+            "section:技术选型",
+            "type:fix 缓存",
+            "date:>=2026-10-01 缓存",
+            "/fix: .*bug/",
+        ],
+        project_path=str(query_project),
+    )
+    assert [m["header"] for m in long_and["long"]] == ["架构决策", "架构决策"]
+    assert {m["header"] for m in long_not["long"]} == {"架构决策"}
+    assert [m["content"] for m in section["long"]] == ["SQLite 与 Redis。"]
+    assert [m["content"] for m in typed["short"]] == ["- `aaaa1111` fix: 缓存失效 bug", "- `cccc3333` fix: 旧的缓存问题"]
+    assert [m["content"] for m in dated["short"]] == ["- `aaaa1111` fix: 缓存失效 bug", "- `bbbb2222` feat: 新增缓存"]
+    assert [m["line_no"] for m in regex["short"]] == [8]
+
+def test_search_multiple_queries(query_project):
+    result = search_memory(['"SQLite 缓存"', "Redis OR 不存在"], memory_type="long", project_path=str(query_project))
+    first, second = result.split("\n\n搜索关键词")
+    assert "[架构决策] L2: 使用 SQLite 缓存。" in first
+    assert "[技术选型] L5: SQLite 与 Redis。" in second
+
+def test_index_selects_candidate_blocks(query_project):
+    """含正向文本词的查询只读取倒排列表选出的块，纯 NOT / 正则查询才读取全部块"""
+    loaded = []
+
+    def load(conn, file, ids=None):
+        blocks = load_blocks(conn, file, ids)
+        loaded.append((ids is None, [b["header"] for b in blocks]))
+        return blocks
+
+    def run(*queries):
+        loaded.clear()
+        with patch("mnemos.search.load_blocks", side_effect=load):
+            return query_memory(list(queries), project_path=str(query_project))
+
+    (redis,) = run("Redis OR 不存在")
+    assert loaded == [(False, ["技术选型"]), (False, [])]
+    assert [m["header"] for m in redis["long"]] == ["技术选型"]
+
+    run("缓存 失效", "SQLite")
+    assert loaded == [(False, ["架构决策", "技术选型"]), (False, ["2026-10-02"])]
+
+    (negated,) = run("-Redis")
+    assert loaded == [(True, ["架构决策", "技术选型"]), (True, ["Header", "2026-10-02", "2026-09-20"])]
+    assert {m["header"] for m in negated["long"]} == {"架构决策"}
+
+def test_candidates_cover_all_matches(query_project):
+    """倒排列表选出的候选块必须包含查询求值会接受的全部块"""
+    from mnemos.search import _iter_records, _load_memory_blocks
+
+    long_term = query_project / ".memory" / "long_term.md"
+    long_term.write_text(long_term.read_text(encoding="utf-8") + "## 项目概述\n调用 my_cache 与 CHANGELOG。\n", encoding="utf-8")
+    queries = [parse_query(q) for q in (
+        "cache", "_cache", "log", "ite", "LITE", "my_c", "缓", "缓存 OR change", "存失", "ache -redis",
+        '"qlite 与"', "(cache OR mtime) sql", "fix: 旧", "`aaaa",
+    )]
+    _, candidates, conn = _load_memory_blocks(["long", "short"], queries, str(query_project))
+    # 不经过候选筛选，对全部块逐条求值
+    blocks = {name: load_blocks(conn, name) for name in ("long", "short")}
+    conn.close()
+    for q, found in zip(queries, candidates):
+        matched = {
+            record["block"]
+            for name in blocks
+            for record in _iter_records(name, blocks[name])
+            if q.matches(record)
+        }
+        assert matched, q.source
+        assert found is not None and matched <= found, q.source
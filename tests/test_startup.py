@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# `import mnemos` 本身的耗时上限（微秒），留出足够余量避免在慢机器上误报
+IMPORT_BUDGET_US = 100_000
+
+# 只读命令不应加载的模块：git 解析、缓存数据库、搜索索引、子进程和 TOML 解析
+HEAVY_MODULES = {
+    "mnemos.git", "mnemos.store", "mnemos.search", "mnemos.index", "mnemos.compress",
+    "mnemos.workspace", "subprocess", "sqlite3", "tomllib", "concurrent.futures",
+}
+
+
+def importtime(code: str, cwd: Path) -> dict[str, int]:
+    """在子进程中以 `-X importtime` 运行代码，返回 {模块名: 累计导入耗时（微秒）}"""
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_import_mnemos_is_lazy(tmp_path):
+    """`import mnemos` 不导入任何子模块，访问属性时才按需加载"""
+    modules = importtime("import mnemos", tmp_path)
+    assert "mnemos" in modules
+    assert not [m for m in modules if m.startswith("mnemos.")]
+    assert modules["mnemos"] < IMPORT_BUDGET_US
+
+    # importlib.import_module 导入的模块不出现在 importtime 输出中，这里直接检查 sys.modules
+    code = "import sys, mnemos; mnemos.read_memory; print(' '.join(sys.modules))"
+    env = {**os.environ, "PYTHONPATH": str(ROOT)}
+    result = subprocess.run([sys.executable, "-c", code], cwd=tmp_path, env=env, capture_output=True, text=True, check=True)
+    loaded = set(result.stdout.split())
+    assert "mnemos.memory" in loaded
+    assert "mnemos.git" not in loaded
+
+
+def test_show_does_not_load_heavy_modules(tmp_path):
+    """`mnemos show` 只加载读取记忆所需的模块"""
+    memory_dir = tmp_path / ".memory"
+    memory_dir.mkdir()
+    (memory_dir / "long_term.md").write_text("## 项目概述\n内容\n", encoding="utf-8")
+    (memory_dir / "short_term.md").write_text("# 短期记忆\n", encoding="utf-8")
+
+    code = "import sys; sys.argv = ['mnemos', 'show']; from mnemos.cli import main; main()"
+    modules = importtime(code, tmp_path)
+    assert "mnemos.memory" in modules
+    assert not HEAVY_MODULES & set(modules)
+
+
+def test_lazy_attributes():
+    """惰性导出的名称与子模块中的定义一致"""
+    import mnemos
+    from mnemos import git
+
+    assert mnemos.summarize_commits is git.summarize_commits
+    assert set(mnemos.__all__) <= set(dir(mnemos))
+    with pytest.raises(AttributeError):
+        mnemos.not_a_function
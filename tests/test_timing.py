@@ -0,0 +1,70 @@
+import json
+import shutil
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from mnemos import timing
+from mnemos.cli import main
+
+
+@pytest.fixture
+def profiling():
+    timing.enable()
+    yield
+    timing.disable()
+
+
+def test_span_disabled_is_noop():
+    """未启用且没有 hook 时不记录任何内容"""
+    timing.disable()
+    timing.enable()
+    timing.disable()
+    with timing.span("idle"):
+        pass
+    assert timing.summarize() == []
+
+
+def test_nested_spans_and_self_time(profiling):
+    """子阶段缩进记录，父阶段的 self 时间不含子阶段"""
+    with timing.span("outer"):
+        with timing.span("inner"):
+            pass
+        timing.record("manual", 0.5)
+
+    rows = {r["name"]: r for r in timing.summarize()}
+    assert [r["name"] for r in timing.summarize()][0] == "outer"
+    assert rows.keys() == {"outer", "inner", "manual"}
+    assert rows["outer"]["depth"] == 0 and rows["inner"]["depth"] == 1
+    # 手动记录的 0.5s 计入父阶段的子阶段，不计入父阶段的 self 时间
+    assert rows["outer"]["self_ms"] < 100
+    assert "outer" in timing.format_report()
+    assert json.loads(timing.format_json())["phases"][0]["name"] == "outer"
+
+
+def test_hooks_receive_spans():
+    """宿主注册的 hook 无需启用记录也能收到每个 span"""
+    events = []
+    hook = lambda name, seconds, attrs: events.append((name, attrs))
+    timing.add_hook(hook)
+    try:
+        with timing.span("git.run", command="log"):
+            pass
+    finally:
+        timing.remove_hook(hook)
+    assert events == [("git.run", {"command": "log"})]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="需要安装 git")
+def test_cli_profile_json(tmp_path):
+    """`mnemos --profile-json` 输出 update 各阶段的耗时"""
+    for args in (["init", "-q"], ["-c", "user.email=t@e.com", "-c", "user.name=T", "commit", "-q", "--allow-empty", "-m", "feat: x"]):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+    (tmp_path / ".memory").mkdir()
+
+    output = tmp_path / "profile.json"
+    with patch.object(sys, "argv", ["mnemos", "--profile-json", str(output), "update", str(tmp_path)]):
+        main()
+
+    phases = {p["name"] for p in json.loads(output.read_text(encoding="utf-8"))["phases"]}
+    assert {"command.update", "store.sync", "git.log", "git.parse", "render", "file.write"} <= phases
@@ -0,0 +1,92 @@
+from unittest.mock import patch
+import pytest
+import mnemos.workspace as workspace
+from mnemos.git import summarize_commits
+from mnemos.workspace import discover_repositories, update_workspace
+from conftest import make_repo, requires_git
+
+
+@pytest.fixture
+def workspace_dir(tmp_path):
+    """三个仓库：已初始化、未初始化、嵌套在分组目录中"""
+    make_repo(tmp_path / "api", "feat: add api", "main.py")
+    make_repo(tmp_path / "web", "fix: web bug", "main.py", initialized=False)
+    make_repo(tmp_path / "libs" / "core", "feat: core", "main.py", initialized=False)
+    (tmp_path / "node_modules" / "dep" / ".git").mkdir(parents=True)
+    (tmp_path / "docs").mkdir()
+    return tmp_path
+
+
+@requires_git
+def test_discover_repositories(workspace_dir):
+    """发现各层级的仓库，跳过 node_modules 等目录"""
+    repos = discover_repositories(str(workspace_dir))
+    assert [p.relative_to(workspace_dir).as_posix() for p in repos] == ["api", "libs/core", "web"]
+
+
+@requires_git
+def test_update_workspace(workspace_dir):
+    """并发更新所有仓库：已初始化的写入短期记忆，报告汇总跨仓库热点"""
+    result = update_workspace(str(workspace_dir), max_workers=2)
+    assert "3 个仓库，1 个写入了短期记忆，共 3 条提交" in result
+
+    assert "add api" in (workspace_dir / "api" / ".memory" / "short_term.md").read_text(encoding="utf-8")
+    assert not (workspace_dir / "web" / ".memory").exists()
+
+    report = (workspace_dir / ".memory" / "workspace.md").read_text(encoding="utf-8")
+    assert "`api/main.py` (1 次修改" in report
+    assert "`libs/core/main.py`" in report
+    assert "`web`: 1 条提交" in report
+
+
+@requires_git
+def test_update_workspace_matches_single_update(workspace_dir):
+    """工作区更新与 `mnemos update` 写出相同的短期记忆"""
+    short_term = workspace_dir / "api" / ".memory" / "short_term.md"
+
+    def content():
+        return [line for line in short_term.read_text(encoding="utf-8").splitlines() if not line.startswith("*最后更新")]
+
+    update_workspace(str(workspace_dir))
+    from_workspace = content()
+    summarize_commits(str(workspace_dir / "api"))
+    assert content() == from_workspace
+    assert "*最近 30 天*" in from_workspace
+
+
+@requires_git
+def test_update_workspace_reports_failures(workspace_dir):
+    """单个仓库失败不影响其他仓库"""
+    update = workspace._update_short_term
+
+    def flaky(project_path, days, **kwargs):
+        if project_path.endswith("web"):
+            raise RuntimeError("git 进程异常退出")
+        return update(project_path, days, **kwargs)
+
+    with patch.object(workspace, "_update_short_term", side_effect=flaky):
+        result = update_workspace(str(workspace_dir))
+
+    assert "以下 1 个仓库更新失败" in result
+    assert "RuntimeError: git 进程异常退出" in result
+    assert "add api" in (workspace_dir / "api" / ".memory" / "short_term.md").read_text(encoding="utf-8")
+    report = (workspace_dir / ".memory" / "workspace.md").read_text(encoding="utf-8")
+    assert "`web`: ✗ RuntimeError" in report
+
+
+@requires_git
+def test_update_workspace_root_repository(tmp_path):
+    """工作区本身是未初始化的仓库时不创建 `.memory/`，重复运行不会把它当作已初始化"""
+    make_repo(tmp_path, "feat: root", "root.py", initialized=False)
+    make_repo(tmp_path / "api", "feat: add api", "main.py")
+
+    for _ in range(2):
+        result = update_workspace(str(tmp_path))
+        assert "2 个仓库，1 个写入了短期记忆" in result
+        assert "`./root.py` (1 次修改" in result
+        assert not (tmp_path / ".memory").exists()
+
+    report = tmp_path.parent / "report.md"
+    update_workspace(str(tmp_path), output=str(report))
+    assert "`api/main.py`" in report.read_text(encoding="utf-8")
+    assert not (tmp_path / ".memory").exists()